@@ -1,43 +1,74 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends
+import time
+from collections.abc import AsyncIterator
+from dataclasses import asdict
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.app.api.dependencies import get_db, get_llm_service
+from backend.app.api.streaming import Event, StreamFormat, stream_events
 from backend.app.models.schemas.agents import (
     AgentExecuteRequest,
     AgentExecuteResponse,
     AgentStepModel,
+    AgentUsageModel,
 )
-from backend.app.services.agents import DocumentSearchTool, SimpleAgent
+from backend.app.services.agents import AgentStep, AgentUsage, DocumentSearchTool, SimpleAgent
 from backend.app.services.llm import LLMService
+from backend.app.services.search_filters import SearchFilters
 
 router = APIRouter(prefix="/agents", tags=["agents"])
 
 
+def _step_model(step: AgentStep) -> AgentStepModel:
+    return AgentStepModel(**asdict(step))
+
+
 @router.post("/execute", response_model=AgentExecuteResponse)
 async def execute_agent(
     payload: AgentExecuteRequest,
+    stream: StreamFormat | None = Query(default=None),
     db: AsyncSession = Depends(get_db),
     llm_service: LLMService = Depends(get_llm_service),
-) -> AgentExecuteResponse:
-    """Execute a simple multi-step agent over stored documents."""
+) -> AgentExecuteResponse | StreamingResponse:
+    """Execute a simple multi-step agent over stored documents.
+
+    Every step reports its duration, queue wait, token counts, context bytes and cache
+    hits, and ``usage`` sums them up for the run.
+
+    Streamed responses send a ``step`` event per completed step and the answer as
+    ``token`` events, then ``done`` carrying ``usage``. Either way the search tool only
+    keeps the request session's engine and opens a session of its own per search, so a
+    streamed body can outlive the request's session.
+    """
 
-    tool = DocumentSearchTool(db)
+    filters = SearchFilters(**payload.filters.model_dump()) if payload.filters else None
+    tool = DocumentSearchTool(db, filters=filters)
     agent = SimpleAgent(llm=llm_service, tools=[tool])
+    if stream is not None:
+
+        async def events() -> AsyncIterator[Event]:
+            start = time.perf_counter()
+            steps: list[AgentStep] = []
+            async for item in agent.stream(payload.goal, max_chunks=payload.max_chunks):
+                if isinstance(item, AgentStep):
+                    steps.append(item)
+                    yield "step", _step_model(item).model_dump()
+                else:
+                    yield "token", {"text": item}
+            duration_ms = round((time.perf_counter() - start) * 1000, 3)
+            usage = AgentUsage.from_steps(steps, duration_ms)
+            yield "done", {"usage": asdict(usage)}
+
+        return stream_events(events(), stream)
+
     result = await agent.execute(goal=payload.goal, max_chunks=payload.max_chunks)
 
     return AgentExecuteResponse(
         answer=result.answer,
-        steps=[
-            AgentStepModel(
-                kind=step.kind,
-                message=step.message,
-                tool_name=step.tool_name,
-                tool_input=step.tool_input,
-                tool_output=step.tool_output,
-            )
-            for step in result.steps
-        ],
+        steps=[_step_model(step) for step in result.steps],
+        usage=AgentUsageModel(**asdict(result.usage)),
     )
-
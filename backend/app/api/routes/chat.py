@@ -1,7 +1,11 @@
-from fastapi import APIRouter, Depends
+from collections.abc import AsyncIterator
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.app.api.dependencies import get_db, get_llm_service
+from backend.app.api.streaming import Event, StreamFormat, stream_events
 from backend.app.models.schemas.chat import (
     ChatRequest,
     ChatResponse,
@@ -9,56 +13,106 @@ from backend.app.models.schemas.chat import (
     RagChatResponse,
     RagContext,
 )
+from backend.app.services.context_packing import pack_context
 from backend.app.services.llm import LLMService
 from backend.app.services.search import SearchService
+from backend.app.services.search_filters import SearchFilters
 
 router = APIRouter(tags=["chat"])
 
+_NO_CONTEXT_ANSWER = "No relevant documents found for your query yet. Try uploading more context."
+
 
 @router.post("/chat", response_model=ChatResponse)
 async def chat_endpoint(
     body: ChatRequest,
+    stream: StreamFormat | None = Query(default=None),
     llm_service: LLMService = Depends(get_llm_service),
-) -> ChatResponse:
-    """Return a simple LLM-generated response for the provided prompt."""
+) -> ChatResponse | StreamingResponse:
+    """Return a simple LLM-generated response for the provided prompt.
+
+    With ``?stream=sse`` or ``?stream=ndjson`` the answer is sent as ``token`` events
+    while it is generated, followed by ``done``.
+    """
+
+    if stream is not None:
+
+        async def events() -> AsyncIterator[Event]:
+            async for token in llm_service.stream(body.prompt):
+                yield "token", {"text": token}
+            yield "done", {"provider": llm_service.provider}
+
+        return stream_events(events(), stream)
 
     result = await llm_service.chat(body.prompt)
     return ChatResponse(provider=result.provider, answer=result.answer)
 
 
+def _rag_prompt(query: str, context_lines: list[str]) -> str:
+    return (
+        "You are a retrieval-augmented assistant. Use ONLY the provided "
+        "context to answer the user's question.\n\n"
+        f"Question: {query}\n\nContext:\n" + "\n".join(context_lines)
+    )
+
+
 @router.post("/chat/rag", response_model=RagChatResponse)
 async def chat_rag_endpoint(
     body: RagChatRequest,
+    stream: StreamFormat | None = Query(default=None),
     db: AsyncSession = Depends(get_db),
     llm_service: LLMService = Depends(get_llm_service),
-) -> RagChatResponse:
-    """RAG-style chat that retrieves document chunks before answering."""
+) -> RagChatResponse | StreamingResponse:
+    """RAG-style chat that retrieves document chunks before answering.
+
+    The retrieved chunks are packed into the prompt within ``CONTEXT_TOKEN_BUDGET``
+    (see ``services.context_packing``); ``contexts`` still lists every retrieved chunk.
+
+    Streamed responses send one ``contexts`` event as soon as retrieval finishes, then
+    the answer as ``token`` events, then ``done``.
+    """
 
     search_service = SearchService(db)
-    # Prefer vector search (pgvector) with a graceful fallback to keyword search.
-    matches = await search_service.search_by_vector(query=body.query, limit=body.top_k)
+    # Vector search by default (falls back to keyword search); hybrid fuses both.
+    matches = await search_service.retrieve(
+        query=body.query,
+        limit=body.top_k,
+        mode=body.mode,
+        rerank=body.rerank,
+        filters=SearchFilters(**body.filters.model_dump()) if body.filters else None,
+    )
+    context_lines = pack_context(matches).lines()
+    prompt = _rag_prompt(body.query, context_lines)
+    contexts = [
+        RagContext(
+            document_id=m["document_id"],
+            chunk_index=m["chunk_index"],
+            content=m["content"],
+        )
+        for m in matches
+    ]
+
+    if stream is not None:
+
+        async def events() -> AsyncIterator[Event]:
+            yield "contexts", {"contexts": [context.model_dump() for context in contexts]}
+            if not matches:
+                yield "token", {"text": _NO_CONTEXT_ANSWER}
+            else:
+                # question/contexts let the response cache reuse an answer to a similar
+                # question over the same chunks.
+                tokens = llm_service.stream(prompt, question=body.query, contexts=context_lines)
+                async for token in tokens:
+                    yield "token", {"text": token}
+            yield "done", {"provider": llm_service.provider}
+
+        return stream_events(events(), stream)
 
     if not matches:
-        answer = "No relevant documents found for your query yet. Try uploading more context."
+        answer = _NO_CONTEXT_ANSWER
         return RagChatResponse(provider=llm_service.provider, answer=answer, contexts=[])
 
-    context_lines = [f"[{m['document_id']}#{m['chunk_index']}] {m['content']}" for m in matches]
-    prompt = (
-        "You are a retrieval-augmented assistant. Use ONLY the provided "
-        "context to answer the user's question.\n\n"
-        f"Question: {body.query}\n\nContext:\n" + "\n".join(context_lines)
-    )
-
-    llm_result = await llm_service.chat(prompt)
+    llm_result = await llm_service.chat(prompt, question=body.query, contexts=context_lines)
     return RagChatResponse(
-        provider=llm_result.provider,
-        answer=llm_result.answer,
-        contexts=[
-            RagContext(
-                document_id=m["document_id"],
-                chunk_index=m["chunk_index"],
-                content=m["content"],
-            )
-            for m in matches
-        ],
+        provider=llm_result.provider, answer=llm_result.answer, contexts=contexts
     )
@@ -1,41 +1,332 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
+import asyncio
+import os
+import tempfile
+from collections.abc import AsyncIterator
+from contextlib import AsyncExitStack
+from pathlib import Path
+from uuid import UUID
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    Form,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    UploadFile,
+)
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.datastructures import UploadFile as StarletteUploadFile
 
 from backend.app.api.dependencies import get_db
-from backend.app.models.schemas.documents import DocumentIngestResponse
-from backend.app.services.documents import DocumentService
+from backend.app.core.config import get_settings
+from backend.app.models.db.jobs import JOB_RUNNING, IngestionJob
+from backend.app.models.schemas.documents import (
+    BatchIngestResponse,
+    BatchTextItem,
+    DocumentExportLine,
+    DocumentIngestResponse,
+    DocumentListResponse,
+    DocumentSummaryResponse,
+    IngestionJobResponse,
+)
+from backend.app.services.chunking import ChunkingOptions, ChunkStrategy
+from backend.app.services.documents import (
+    BatchDocument,
+    DocumentService,
+    DocumentSummary,
+    IngestResult,
+)
+from backend.app.services.extraction import ExtractionError, ExtractionQueueFull
+from backend.app.services.ingestion_jobs import get_ingestion_queue
 
 router = APIRouter(prefix="/documents", tags=["documents"])
 
+_SPOOL_BLOCK_SIZE = 1 << 20
+_NDJSON_TYPES = ("application/x-ndjson", "application/jsonl", "application/json-seq")
+
+
+async def _spool_upload(file: StarletteUploadFile) -> tuple[Path, int]:
+    """Copy the upload to a temp file block by block; return its path and size."""
+
+    suffix = Path(file.filename or "").suffix
+    spool_dir = get_settings().upload_spool_dir
+    fd, name = tempfile.mkstemp(prefix="upload-", suffix=suffix, dir=spool_dir)
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as spool:
+            while block := await file.read(_SPOOL_BLOCK_SIZE):
+                await asyncio.to_thread(spool.write, block)
+                size += len(block)
+    except BaseException:
+        Path(name).unlink(missing_ok=True)
+        raise
+    return Path(name), size
+
+
+def get_chunking(
+    chunk_strategy: ChunkStrategy | None = Query(default=None),
+    chunk_max_tokens: int | None = Query(default=None, ge=1),
+    chunk_overlap_tokens: int | None = Query(default=None, ge=0),
+) -> ChunkingOptions:
+    """Per-request chunking options; anything not given falls back to the settings."""
+
+    return DocumentService.chunking_options(
+        strategy=chunk_strategy,
+        max_tokens=chunk_max_tokens,
+        overlap_tokens=chunk_overlap_tokens,
+    )
+
+
+def _text_document(line: bytes) -> BatchDocument:
+    item = BatchTextItem.model_validate_json(line)
+    return BatchDocument(
+        title=item.title,
+        source=item.source,
+        meta=item.meta or {},
+        pieces=[item.content],
+        external_id=item.external_id,
+    )
+
+
+async def _ndjson_documents(request: Request) -> AsyncIterator[BatchDocument]:
+    """Parse an NDJSON body line by line as it arrives."""
+
+    buffer = b""
+    async for block in request.stream():
+        buffer += block
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield _text_document(line)
+    if buffer.strip():
+        yield _text_document(buffer)
+
+
+def _ingest_response(result: IngestResult) -> DocumentIngestResponse:
+    return DocumentIngestResponse(
+        id=result.document.id,
+        title=result.document.title,
+        source=result.document.source,
+        external_id=result.document.external_id,
+        chunk_count=result.chunk_count,
+        duplicate_count=result.duplicate_count,
+        reused_count=result.reused_count,
+    )
+
+
+def _summary_fields(summary: DocumentSummary) -> dict:
+    return {
+        "id": summary.id,
+        "title": summary.title,
+        "source": summary.source,
+        "external_id": summary.external_id,
+        "meta": summary.meta,
+        "chunk_count": summary.chunk_count,
+        "created_at": summary.created_at,
+        "updated_at": summary.updated_at,
+    }
+
+
+def _job_response(job: IngestionJob, chunks_processed: int | None = None) -> IngestionJobResponse:
+    return IngestionJobResponse(
+        id=job.id,
+        status=job.status,
+        filename=job.filename,
+        title=job.title,
+        source=job.source,
+        document_id=job.document_id,
+        chunk_count=job.chunk_count,
+        chunks_processed=chunks_processed if chunks_processed is not None else job.chunk_count,
+        error=job.error,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+    )
+
+
+@router.get("", response_model=DocumentListResponse)
+async def list_documents(
+    cursor: str | None = Query(default=None),
+    limit: int = Query(default=50, ge=1, le=500),
+    db: AsyncSession = Depends(get_db),
+) -> DocumentListResponse:
+    """List documents with chunk counts, oldest first; pass ``next_cursor`` back for more."""
+
+    try:
+        page = await DocumentService(db).list_documents(cursor=cursor, limit=limit)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return DocumentListResponse(
+        documents=[DocumentSummaryResponse(**_summary_fields(doc)) for doc in page.documents],
+        next_cursor=page.next_cursor,
+    )
+
+
+@router.get("/export")
+async def export_documents(
+    include_chunks: bool = Query(default=False),
+    db: AsyncSession = Depends(get_db),
+) -> StreamingResponse:
+    """Stream every document as NDJSON, optionally with its chunk texts.
+
+    The body is produced from its own session on the same engine, since the request's
+    session may be closed before a streamed body finishes.
+    """
+
+    bind = db.bind
 
-@router.post("", response_model=DocumentIngestResponse)
+    async def lines() -> AsyncIterator[bytes]:
+        async with AsyncSession(bind) as session:
+            exported = DocumentService(session).export_documents(include_chunks=include_chunks)
+            async for summary, chunks in exported:
+                line = DocumentExportLine(**_summary_fields(summary), chunks=chunks)
+                yield line.model_dump_json(exclude_none=True).encode() + b"\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@router.post("", response_model=DocumentIngestResponse | IngestionJobResponse)
 async def upload_document(
+    response: Response,
     file: UploadFile = File(...),
     title: str | None = Form(default=None),
     source: str | None = Form(default=None),
+    external_id: str | None = Form(default=None),
+    background: bool = Query(default=False),
+    match_source: bool = Query(default=False),
+    chunking: ChunkingOptions = Depends(get_chunking),
     db: AsyncSession = Depends(get_db),
-) -> DocumentIngestResponse:
-    raw = await file.read()
-    if not raw:
-        raise HTTPException(status_code=400, detail="Uploaded file is empty or unreadable.")
+) -> DocumentIngestResponse | IngestionJobResponse:
+    """Ingest an upload inline, or with ``?background=true`` queue it and return 202.
 
-    service = DocumentService(db)
+    An upload with a known ``external_id`` (or, with ``?match_source=true``, a known
+    ``source``) updates that document, re-embedding only the chunks that changed.
+    """
+
+    path, size = await _spool_upload(file)
+    handed_off = False
     try:
-        document = await service.ingest_file(
-            filename=file.filename or "upload",
-            content_type=file.content_type,
-            data=raw,
-            title=title,
-            source=source,
-        )
-    except ValueError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
+        if not size:
+            raise HTTPException(status_code=400, detail="Uploaded file is empty or unreadable.")
 
-    return DocumentIngestResponse(
-        id=document.id,
-        title=document.title,
-        source=document.source,
-        chunk_count=len(document.chunks),
+        if background:
+            job = await get_ingestion_queue(db).submit(
+                db,
+                spool_path=path,
+                filename=file.filename or "upload",
+                content_type=file.content_type,
+                title=title,
+                source=source,
+                chunking=chunking,
+                external_id=external_id,
+                match_source=match_source,
+            )
+            handed_off = True
+            response.status_code = 202
+            return _job_response(job)
+
+        service = DocumentService(db)
+        try:
+            result = await service.ingest_path(
+                path=path,
+                filename=file.filename or "upload",
+                content_type=file.content_type,
+                title=title,
+                source=source,
+                chunking=chunking,
+                external_id=external_id,
+                match_source=match_source,
+            )
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        except ExtractionQueueFull as exc:
+            raise HTTPException(status_code=503, detail=str(exc)) from exc
+        except ExtractionError as exc:
+            raise HTTPException(status_code=422, detail=str(exc)) from exc
+        except TimeoutError as exc:
+            raise HTTPException(status_code=504, detail="Text extraction timed out.") from exc
+    finally:
+        if not handed_off:
+            path.unlink(missing_ok=True)
+
+    return _ingest_response(result)
+
+
+@router.post("/batch", response_model=BatchIngestResponse)
+async def upload_documents_batch(
+    request: Request,
+    match_source: bool = Query(default=False),
+    chunking: ChunkingOptions = Depends(get_chunking),
+    db: AsyncSession = Depends(get_db),
+) -> BatchIngestResponse:
+    """Ingest many documents in one transaction.
+
+    Accepts either multipart uploads (repeated ``files`` fields, optional ``source``) or an
+    NDJSON body with one ``{"title", "content", "source"?, "external_id"?, "meta"?}``
+    object per line. Documents are upserted as in ``POST /documents``.
+    """
+
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    service = DocumentService(db)
+
+    async with AsyncExitStack() as stack:
+        if content_type == "multipart/form-data":
+            form = await request.form()
+            stack.push_async_callback(form.close)
+            uploads = [f for f in form.getlist("files") if isinstance(f, StarletteUploadFile)]
+            if not uploads:
+                raise HTTPException(status_code=400, detail="No files were uploaded.")
+            source = form.get("source")
+            documents: list[BatchDocument] | AsyncIterator[BatchDocument] = []
+            for upload in uploads:
+                path, _ = await _spool_upload(upload)
+                stack.callback(path.unlink, missing_ok=True)
+                documents.append(
+                    service.file_document(
+                        path=path,
+                        filename=upload.filename or "upload",
+                        content_type=upload.content_type,
+                        source=source if isinstance(source, str) else None,
+                    )
+                )
+        elif content_type in _NDJSON_TYPES:
+            documents = _ndjson_documents(request)
+        else:
+            raise HTTPException(
+                status_code=415, detail="Send multipart/form-data files or an NDJSON body."
+            )
+
+        try:
+            results = await service.ingest_many(
+                documents, chunking=chunking, match_source=match_source
+            )
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        except ExtractionQueueFull as exc:
+            raise HTTPException(status_code=503, detail=str(exc)) from exc
+        except ExtractionError as exc:
+            raise HTTPException(status_code=422, detail=str(exc)) from exc
+        except TimeoutError as exc:
+            raise HTTPException(status_code=504, detail="Text extraction timed out.") from exc
+
+    return BatchIngestResponse(
+        documents=[_ingest_response(result) for result in results],
+        chunk_count=sum(result.chunk_count for result in results),
     )
+
+
+@router.get("/jobs/{job_id}", response_model=IngestionJobResponse)
+async def get_ingestion_job(
+    job_id: UUID, db: AsyncSession = Depends(get_db)
+) -> IngestionJobResponse:
+    job = await db.get(IngestionJob, job_id, populate_existing=True)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Ingestion job not found.")
+    progress = get_ingestion_queue(db).progress(job.id) if job.status == JOB_RUNNING else None
+    return _job_response(job, progress)
@@ -1,8 +1,13 @@
+from typing import Any
+
 from fastapi import APIRouter, Depends
 
 from backend.app.api.dependencies import get_app_settings
 from backend.app.core.config import Settings
 from backend.app.models.schemas.health import HealthResponse
+from backend.app.services.embedding_cache import get_embedding_cache
+from backend.app.services.response_cache import get_response_cache
+from backend.app.services.stage_metrics import get_stage_metrics
 
 router = APIRouter(tags=["health"])
 
@@ -13,3 +18,22 @@ async def health(settings: Settings = Depends(get_app_settings)) -> HealthRespon
 
     detail = f"env={settings.environment}"
     return HealthResponse(status="ok", detail=detail)
+
+
+@router.get("/health/caches")
+async def cache_stats() -> dict[str, dict[str, float] | None]:
+    """Hit/miss counters of this worker's in-process caches (``null`` when disabled)."""
+
+    response_cache = get_response_cache()
+    embedding_cache = get_embedding_cache()
+    return {
+        "llm_responses": response_cache.stats() if response_cache else None,
+        "embeddings": dict(embedding_cache.stats()) if embedding_cache else None,
+    }
+
+
+@router.get("/health/stages")
+async def stage_latencies() -> dict[str, dict[str, Any]]:
+    """Latency histograms of this worker's timed stages (search, LLM, agent), by name."""
+
+    return get_stage_metrics().snapshot()
@@ -1,9 +1,13 @@
+from typing import Literal
+
 from fastapi import APIRouter, Depends
 from pydantic import BaseModel, Field
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.app.api.dependencies import get_db
-from backend.app.services.search import SearchService
+from backend.app.models.schemas.search import SearchFiltersModel
+from backend.app.services.search import SearchService, SnippetOptions
+from backend.app.services.search_filters import SearchFilters
 
 router = APIRouter(prefix="/search", tags=["search"])
 
@@ -11,6 +15,14 @@ router = APIRouter(prefix="/search", tags=["search"])
 class SearchRequest(BaseModel):
     query: str = Field(..., min_length=1, max_length=500)
     limit: int = Field(default=5, ge=1, le=20)
+    mode: Literal["vector", "keyword", "hybrid"] = "vector"
+    # Return a window of about this many characters around the matches, not whole chunks.
+    snippet_chars: int | None = Field(default=None, ge=20, le=2000)
+    highlight: bool = False
+    # Over-fetch candidates and reorder them with the second-stage reranker.
+    rerank: bool = False
+    # Only search chunks of documents matching these filters.
+    filters: SearchFiltersModel | None = None
 
 
 class SearchResult(BaseModel):
@@ -24,5 +36,15 @@ async def search_chunks(
     payload: SearchRequest, db: AsyncSession = Depends(get_db)
 ) -> list[SearchResult]:
     service = SearchService(db)
-    matches = await service.search_by_vector(query=payload.query, limit=payload.limit)
+    snippet = None
+    if payload.snippet_chars is not None or payload.highlight:
+        snippet = SnippetOptions(width=payload.snippet_chars, highlight=payload.highlight)
+    matches = await service.retrieve(
+        query=payload.query,
+        limit=payload.limit,
+        mode=payload.mode,
+        snippet=snippet,
+        rerank=payload.rerank,
+        filters=SearchFilters(**payload.filters.model_dump()) if payload.filters else None,
+    )
     return [SearchResult(**match) for match in matches]
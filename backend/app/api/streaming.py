@@ -0,0 +1,57 @@
+"""Incremental responses: a sequence of named events sent as SSE or NDJSON.
+
+Routes produce ``(event, data)`` pairs. With ``?stream=sse`` each pair becomes a
+``text/event-stream`` message (``event:`` line plus a JSON ``data:`` line); with
+``?stream=ndjson`` it becomes one ``{"event": ..., **data}`` JSON line.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from collections.abc import AsyncIterator
+from typing import Any, Literal
+
+from fastapi.responses import StreamingResponse
+
+from backend.app.services.llm import LLMProviderError
+
+logger = logging.getLogger(__name__)
+
+StreamFormat = Literal["sse", "ndjson"]
+Event = tuple[str, dict[str, Any]]
+
+# Failures whose message is meant for the client, as the non-streamed routes send it.
+_EXPECTED_ERRORS = (LLMProviderError, ValueError)
+
+
+def encode_event(name: str, data: dict[str, Any], fmt: StreamFormat) -> bytes:
+    if fmt == "sse":
+        return f"event: {name}\ndata: {json.dumps(data)}\n\n".encode()
+    return (json.dumps({"event": name, **data}) + "\n").encode()
+
+
+def stream_events(events: AsyncIterator[Event], fmt: StreamFormat) -> StreamingResponse:
+    """Send ``events`` as they are produced.
+
+    The status line has already gone out by the time most failures happen, so an
+    exception ends the stream with an ``error`` event instead of a 500. Like a 500, the
+    event carries the exception's message only for expected failures.
+    """
+
+    async def body() -> AsyncIterator[bytes]:
+        try:
+            async for name, data in events:
+                yield encode_event(name, data, fmt)
+        except _EXPECTED_ERRORS as exc:
+            logger.warning("Streaming response failed: %s", exc)
+            yield encode_event("error", {"detail": str(exc)}, fmt)
+        except Exception:
+            logger.exception("Streaming response failed")
+            yield encode_event("error", {"detail": "Internal Server Error"}, fmt)
+
+    if fmt == "sse":
+        # Proxies such as nginx would otherwise buffer the stream.
+        headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        return StreamingResponse(body(), media_type="text/event-stream", headers=headers)
+    return StreamingResponse(body(), media_type="application/x-ndjson")
@@ -1,4 +1,5 @@
 from functools import lru_cache
+from typing import Literal
 
 from pydantic import field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -14,10 +15,79 @@ class Settings(BaseSettings):
 
     openai_api_key: str | None = None
     llm_provider: str = "openai"
+    llm_base_url: str = "https://api.openai.com/v1"
+    llm_model: str = "gpt-4o-mini"
+    llm_timeout: float = 60.0
+    llm_max_concurrency: int = 16
+    llm_max_retries: int = 3
+    llm_retry_backoff: float = 0.5
+    llm_batch_size: int = 1
+    llm_batch_window_ms: float = 5.0
+    llm_cache_size: int = 1024
+    llm_cache_ttl: float = 600.0
+    # Cosine similarity for reusing an answer to a similar question; unset = exact only.
+    llm_cache_similarity: float | None = None
 
     database_url: str = "sqlite+aiosqlite:///./local.db"
     vector_db_url: str | None = None
 
+    embedding_model: str = "stub"
+    embedding_batch_size: int = 64
+    embedding_device: str = "cpu"
+    embedding_runtime: str = "torch"
+    embedding_cache_size: int = 4096
+    embedding_cache_path: str | None = None
+    embedding_cache_disk_size: int = 200_000
+    embedding_storage: Literal["float32", "float16", "int8"] = "float32"
+
+    chunk_strategy: Literal["fixed", "sentence", "paragraph", "heading"] = "fixed"
+    chunk_max_tokens: int = 256
+    chunk_overlap_tokens: int = 0
+
+    dedup_mode: Literal["off", "exact", "near"] = "exact"
+    dedup_max_distance: int = 4
+    dedup_min_words: int = 8
+
+    ingest_batch_size: int = 256
+    upload_spool_dir: str | None = None
+    ingest_workers: int = 2
+    ingest_job_lease: float = 60.0
+    extraction_workers: int = 2
+    extraction_timeout: float = 120.0
+    extraction_max_pending: int = 32
+    extraction_pdf_pages_per_job: int = 8
+
+    vector_index_nprobe: int = 8
+    vector_index_brute_force_threshold: int = 4096
+    vector_index_quantization: Literal["none", "binary"] = "none"
+    vector_index_rescore_factor: int = 8
+    vector_store_path: str | None = None
+
+    hybrid_candidates: int = 50
+    hybrid_rrf_k: int = 60
+    hybrid_vector_weight: float = 1.0
+    hybrid_keyword_weight: float = 1.0
+
+    query_cache_size: int = 1024
+    query_cache_ttl: float = 300.0
+
+    agent_max_queries: int = 4
+    agent_max_concurrency: int = 8
+    agent_tool_timeout: float = 10.0
+    agent_tool_budget: float = 20.0
+
+    # Prompt context: token budget (0 = no cap), MMR relevance weight, and the word
+    # similarity at which a passage counts as a duplicate of one already chosen.
+    context_token_budget: int = 1500
+    context_mmr_lambda: float = 0.7
+    context_max_similarity: float = 0.9
+
+    # "lexical" (BM25 + term proximity) or a sentence-transformers cross-encoder name.
+    rerank_model: str = "lexical"
+    rerank_candidates: int = 100
+    rerank_batch_size: int = 32
+    rerank_budget_ms: float = 150.0
+
     allowed_origins: list[str] = ["http://localhost:3000"]
 
     notion_api_key: str | None = None
@@ -9,3 +9,4 @@ class Base(DeclarativeBase):
 
 # Import models for metadata registration
 from backend.app.models.db.documents import Document, DocumentChunk  # noqa: E402,F401
+from backend.app.models.db.jobs import IngestionJob  # noqa: E402,F401
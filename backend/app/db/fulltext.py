@@ -0,0 +1,129 @@
+"""Dialect-specific full-text index DDL for ``document_chunks.content``."""
+
+from __future__ import annotations
+
+import logging
+
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import OperationalError
+
+logger = logging.getLogger(__name__)
+
+SQLITE_FTS_TABLE = "document_chunks_fts"
+SQLITE_FTS_ROWIDS_TABLE = "document_chunks_fts_rowids"
+POSTGRES_TSV_CONFIG = "simple"
+
+# The contentless FTS5 table only stores postings; a small rowid map ties each FTS row to
+# its chunk id so the index never depends on document_chunks' implicit (VACUUM-unstable)
+# rowid. Triggers keep it in sync for ORM and Core writes alike; chunks stored as
+# duplicates of another chunk are not indexed. Triggers are recreated on every start so
+# definition changes reach existing databases.
+_SQLITE_DDL = (
+    f"""
+    CREATE TABLE IF NOT EXISTS {SQLITE_FTS_ROWIDS_TABLE} (
+        fts_rowid INTEGER PRIMARY KEY,
+        chunk_id CHAR(32) NOT NULL UNIQUE
+    )
+    """,
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_FTS_TABLE}
+    USING fts5(content, content='', tokenize='unicode61 remove_diacritics 2')
+    """,
+    f"DROP TRIGGER IF EXISTS {SQLITE_FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {SQLITE_FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {SQLITE_FTS_TABLE}_au",
+    f"DROP TRIGGER IF EXISTS {SQLITE_FTS_TABLE}_ap",
+    f"""
+    CREATE TRIGGER {SQLITE_FTS_TABLE}_ai AFTER INSERT ON document_chunks
+    WHEN new.duplicate_of IS NULL
+    BEGIN
+        INSERT INTO {SQLITE_FTS_ROWIDS_TABLE} (chunk_id) VALUES (new.id);
+        INSERT INTO {SQLITE_FTS_TABLE} (rowid, content) VALUES (
+            (SELECT fts_rowid FROM {SQLITE_FTS_ROWIDS_TABLE} WHERE chunk_id = new.id),
+            new.content
+        );
+    END
+    """,
+    f"""
+    CREATE TRIGGER {SQLITE_FTS_TABLE}_ad AFTER DELETE ON document_chunks
+    WHEN old.duplicate_of IS NULL
+    BEGIN
+        INSERT INTO {SQLITE_FTS_TABLE} ({SQLITE_FTS_TABLE}, rowid, content) VALUES (
+            'delete',
+            (SELECT fts_rowid FROM {SQLITE_FTS_ROWIDS_TABLE} WHERE chunk_id = old.id),
+            old.content
+        );
+        DELETE FROM {SQLITE_FTS_ROWIDS_TABLE} WHERE chunk_id = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER {SQLITE_FTS_TABLE}_au AFTER UPDATE OF content ON document_chunks
+    WHEN old.duplicate_of IS NULL AND new.duplicate_of IS NULL
+    BEGIN
+        INSERT INTO {SQLITE_FTS_TABLE} ({SQLITE_FTS_TABLE}, rowid, content) VALUES (
+            'delete',
+            (SELECT fts_rowid FROM {SQLITE_FTS_ROWIDS_TABLE} WHERE chunk_id = old.id),
+            old.content
+        );
+        INSERT INTO {SQLITE_FTS_TABLE} (rowid, content) VALUES (
+            (SELECT fts_rowid FROM {SQLITE_FTS_ROWIDS_TABLE} WHERE chunk_id = new.id),
+            new.content
+        );
+    END
+    """,
+    # A duplicate promoted to canonical (its original was deleted) becomes searchable.
+    f"""
+    CREATE TRIGGER {SQLITE_FTS_TABLE}_ap AFTER UPDATE OF duplicate_of ON document_chunks
+    WHEN old.duplicate_of IS NOT NULL AND new.duplicate_of IS NULL
+    BEGIN
+        INSERT INTO {SQLITE_FTS_ROWIDS_TABLE} (chunk_id) VALUES (new.id);
+        INSERT INTO {SQLITE_FTS_TABLE} (rowid, content) VALUES (
+            (SELECT fts_rowid FROM {SQLITE_FTS_ROWIDS_TABLE} WHERE chunk_id = new.id),
+            new.content
+        );
+    END
+    """,
+)
+
+_SQLITE_BACKFILL = (
+    f"""
+    INSERT INTO {SQLITE_FTS_ROWIDS_TABLE} (chunk_id)
+    SELECT id FROM document_chunks
+    WHERE duplicate_of IS NULL AND id NOT IN (SELECT chunk_id FROM {SQLITE_FTS_ROWIDS_TABLE})
+    """,
+    f"""
+    INSERT INTO {SQLITE_FTS_TABLE} (rowid, content)
+    SELECT m.fts_rowid, c.content
+    FROM document_chunks AS c JOIN {SQLITE_FTS_ROWIDS_TABLE} AS m ON m.chunk_id = c.id
+    """,
+)
+
+_POSTGRES_DDL = (
+    f"""
+    CREATE INDEX IF NOT EXISTS ix_document_chunks_content_tsv
+    ON document_chunks USING gin (to_tsvector('{POSTGRES_TSV_CONFIG}', content))
+    """,
+)
+
+
+def ensure_fulltext_index(connection: Connection) -> None:
+    """Create (and backfill on first run) the full-text index for the current dialect."""
+
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        existed = connection.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+            (SQLITE_FTS_TABLE,),
+        ).first()
+        try:
+            for statement in _SQLITE_DDL:
+                connection.exec_driver_sql(statement)
+        except OperationalError as exc:  # pragma: no cover - SQLite built without FTS5
+            logger.warning("FTS5 unavailable (%s); using the in-process keyword index", exc)
+            return
+        if not existed:
+            for statement in _SQLITE_BACKFILL:
+                connection.exec_driver_sql(statement)
+    elif dialect == "postgresql":
+        for statement in _POSTGRES_DDL:
+            connection.exec_driver_sql(statement)
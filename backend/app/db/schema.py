@@ -0,0 +1,43 @@
+"""Additive schema upgrades for databases created by an older version of the models.
+
+``create_all`` only creates missing tables, so nullable columns and indexes added to
+existing tables later are applied here. A column whose ``info`` has a ``backfill``
+callable is filled from it (``backfill(table)`` returns the SQL value expression).
+Anything beyond that needs a real migration.
+"""
+
+from __future__ import annotations
+
+import logging
+
+from sqlalchemy import inspect
+from sqlalchemy.engine import Connection
+
+from backend.app.db.base import Base
+
+logger = logging.getLogger(__name__)
+
+
+def add_missing_columns(connection: Connection) -> None:
+    inspector = inspect(connection)
+    preparer = connection.dialect.identifier_preparer
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        missing = [column for column in table.columns if column.name not in existing]
+        for column in missing:
+            if not column.nullable:
+                logger.warning("Cannot add NOT NULL column %s.%s", table.name, column.name)
+                continue
+            column_type = column.type.compile(dialect=connection.dialect)
+            connection.exec_driver_sql(
+                f"ALTER TABLE {preparer.format_table(table)} "
+                f"ADD COLUMN {preparer.format_column(column)} {column_type}"
+            )
+            logger.info("Added column %s.%s", table.name, column.name)
+            backfill = column.info.get("backfill")
+            if backfill is not None:
+                connection.execute(table.update().values({column.name: backfill(table)}))
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
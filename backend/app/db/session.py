@@ -13,6 +13,8 @@ from sqlalchemy.ext.asyncio import (
 
 from backend.app.core.config import get_settings
 from backend.app.db.base import Base
+from backend.app.db.fulltext import ensure_fulltext_index
+from backend.app.db.schema import add_missing_columns
 
 logger = logging.getLogger(__name__)
 
@@ -48,6 +50,8 @@ async def init_db(retries: int = 8, base_delay: float = 1.0) -> None:
             engine = get_engine()
             async with engine.begin() as conn:
                 await conn.run_sync(Base.metadata.create_all)
+                await conn.run_sync(add_missing_columns)
+                await conn.run_sync(ensure_fulltext_index)
             logger.info("Database ready")
             break
         except Exception as exc:  # pragma: no cover - exercised in container runtime
@@ -1,22 +1,35 @@
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
 from backend.app.api.routes import agents as agents_route
 from backend.app.api.routes import chat, documents, health
 from backend.app.api.routes import search as search_route
 from backend.app.core.config import get_settings
-from backend.app.db.session import close_db, init_db
+from backend.app.db.session import close_db, get_engine, init_db
+from backend.app.services.extraction import shutdown_extraction_pool
+from backend.app.services.ingestion_jobs import get_ingestion_queue, shutdown_ingestion_queues
+from backend.app.services.llm import LLMProviderError, shutdown_llm_backends
 
 
 @asynccontextmanager
 async def lifespan(_: FastAPI):
     await init_db()
+    # Resume jobs an earlier process left unfinished without waiting for a new upload.
+    await get_ingestion_queue(get_engine()).start()
     yield
+    await shutdown_ingestion_queues()
+    shutdown_extraction_pool()
+    await shutdown_llm_backends()
     await close_db()
 
 
+async def _llm_provider_error(_: Request, exc: Exception) -> JSONResponse:
+    return JSONResponse(status_code=502, content={"detail": str(exc)})
+
+
 def create_app() -> FastAPI:
     settings = get_settings()
     app = FastAPI(title=settings.app_name, debug=settings.debug, lifespan=lifespan)
@@ -29,6 +42,8 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
+    app.add_exception_handler(LLMProviderError, _llm_provider_error)
+
     app.include_router(health.router, prefix="/api/v1")
     app.include_router(chat.router, prefix="/api/v1")
     app.include_router(documents.router, prefix="/api/v1")
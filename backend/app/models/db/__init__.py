@@ -1 +1,3 @@
-
+# Load the declarative base first so importing a model module directly does not trip over
+# the model registration import at the bottom of ``backend.app.db.base``.
+from backend.app.db import base as _base  # noqa: F401
@@ -1,15 +1,43 @@
 from __future__ import annotations
 
+import json
 from datetime import datetime
 from typing import Any
 from uuid import UUID as UUIDType
 from uuid import uuid4
 
-from sqlalchemy import JSON, ForeignKey, Index, String, Text
+from sqlalchemy import JSON, BigInteger, ForeignKey, Index, LargeBinary, String, Text
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.orm import Mapped, mapped_column, relationship, validates
+from sqlalchemy.types import TypeDecorator
 
+from backend.app.core.config import get_settings
 from backend.app.db.base import Base
+from backend.app.services.quantization import decode_embedding, encode_embedding
+
+
+class PackedVector(TypeDecorator):
+    """Embedding stored as a compact binary blob (see ``services.quantization``).
+
+    The encoding follows ``EMBEDDING_STORAGE`` at write time; every blob records its own
+    format, so rows written under different settings (and JSON lists written before this
+    type existed) all read back as float32 arrays or lists.
+    """
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value: Any, dialect: Any) -> bytes | None:
+        if value is None:
+            return None
+        return encode_embedding(value, get_settings().embedding_storage)
+
+    def process_result_value(self, value: Any, dialect: Any) -> Any:
+        if value is None:
+            return None
+        if isinstance(value, str):
+            return json.loads(value)
+        return decode_embedding(value)
 
 
 def vector_column(dimensions: int | None = None):
@@ -18,26 +46,52 @@ def vector_column(dimensions: int | None = None):
 
         return Vector(dimensions=dimensions)
     except Exception:  # pragma: no cover - fallback for local dev without pgvector
-        return JSON
+        return PackedVector()
 
 
 class Document(Base):
     __tablename__ = "documents"
+    __table_args__ = (
+        Index("ix_documents_external_id", "external_id", unique=True),
+        # Keyset pagination order for document listings.
+        Index("ix_documents_created_at_id", "created_at", "id"),
+        # Search filters (see ``services.search_filters``).
+        Index("ix_documents_source", "source"),
+        Index("ix_documents_content_type", "content_type"),
+    )
 
     id: Mapped[UUIDType] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid4)
     title: Mapped[str] = mapped_column(String(255))
     source: Mapped[str | None] = mapped_column(String(255), nullable=True)
     meta: Mapped[dict[str, Any] | None] = mapped_column(JSON, nullable=True)
+    # Indexed copy of ``meta["content_type"]``, kept in step by ``_promote_meta``.
+    content_type: Mapped[str | None] = mapped_column(
+        String(255),
+        nullable=True,
+        info={"backfill": lambda table: table.c.meta["content_type"].as_string()},
+    )
+    # Caller-supplied key under which re-ingesting replaces this document in place.
+    external_id: Mapped[str | None] = mapped_column(String(255), nullable=True)
     created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+    updated_at: Mapped[datetime | None] = mapped_column(nullable=True)
 
     chunks: Mapped[list["DocumentChunk"]] = relationship(
         back_populates="document", cascade="all, delete-orphan"
     )
 
+    @validates("meta")
+    def _promote_meta(self, key: str, meta: dict[str, Any] | None) -> dict[str, Any] | None:
+        value = (meta or {}).get("content_type")
+        self.content_type = None if value is None else str(value)[:255]
+        return meta
+
 
 class DocumentChunk(Base):
     __tablename__ = "document_chunks"
-    __table_args__ = (Index("ix_document_chunks_document_id", "document_id"),)
+    __table_args__ = (
+        Index("ix_document_chunks_document_id", "document_id"),
+        Index("ix_document_chunks_content_hash", "content_hash"),
+    )
 
     id: Mapped[UUIDType] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid4)
     document_id: Mapped[UUIDType] = mapped_column(
@@ -47,5 +101,12 @@ class DocumentChunk(Base):
     chunk_index: Mapped[int] = mapped_column()
     content: Mapped[str] = mapped_column(Text)
     embedding: Mapped[Any | None] = mapped_column(vector_column(1536), nullable=True)
+    content_hash: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    simhash: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    # Set for chunks stored as a reference to an identical or near-identical chunk; such
+    # rows carry no embedding and are left out of the search indexes.
+    duplicate_of: Mapped[UUIDType | None] = mapped_column(
+        ForeignKey("document_chunks.id", ondelete="SET NULL"), nullable=True
+    )
 
     document: Mapped[Document] = relationship(back_populates="chunks")
@@ -4,6 +4,8 @@ from typing import Any
 
 from pydantic import BaseModel, Field
 
+from backend.app.models.schemas.search import SearchFiltersModel
+
 
 class AgentExecuteRequest(BaseModel):
     goal: str = Field(..., min_length=1, description="High-level goal for the agent to solve")
@@ -13,6 +15,9 @@ class AgentExecuteRequest(BaseModel):
         le=20,
         description="Maximum number of document chunks to retrieve via tools",
     )
+    filters: SearchFiltersModel | None = Field(
+        default=None, description="Only search documents matching these filters"
+    )
 
 
 class AgentStepModel(BaseModel):
@@ -21,9 +26,28 @@ class AgentStepModel(BaseModel):
     tool_name: str | None = None
     tool_input: dict[str, Any] | None = None
     tool_output: dict[str, Any] | None = None
+    duration_ms: float | None = None
+    queue_wait_ms: float | None = None
+    tokens_in: int | None = None
+    tokens_out: int | None = None
+    context_bytes: int | None = None
+    cache_hit: bool | None = None
+    stages: dict[str, float] | None = None
+
+
+class AgentUsageModel(BaseModel):
+    duration_ms: float = 0.0
+    queue_wait_ms: float = 0.0
+    tokens_in: int = 0
+    tokens_out: int = 0
+    retrieved_bytes: int = Field(default=0, description="Chunk text returned by all tool calls")
+    context_bytes: int = Field(default=0, description="Context sent to the LLM after merging")
+    cache_hits: int = 0
+    cache_misses: int = 0
 
 
 class AgentExecuteResponse(BaseModel):
     answer: str
     steps: list[AgentStepModel]
+    usage: AgentUsageModel = Field(default_factory=AgentUsageModel)
 
@@ -1,5 +1,9 @@
+from typing import Literal
+
 from pydantic import BaseModel, Field
 
+from backend.app.models.schemas.search import SearchFiltersModel
+
 
 class ChatRequest(BaseModel):
     prompt: str = Field(..., min_length=1, description="User prompt to send to the LLM")
@@ -13,6 +17,15 @@ class ChatResponse(BaseModel):
 class RagChatRequest(BaseModel):
     query: str = Field(..., min_length=1, description="Natural language RAG query")
     top_k: int = Field(default=5, ge=1, le=20)
+    mode: Literal["vector", "keyword", "hybrid"] = Field(
+        default="vector", description="Retrieval mode used to pull context chunks"
+    )
+    rerank: bool = Field(
+        default=False, description="Rerank over-fetched candidates before packing context"
+    )
+    filters: SearchFiltersModel | None = Field(
+        default=None, description="Only retrieve chunks of documents matching these filters"
+    )
 
 
 class RagContext(BaseModel):
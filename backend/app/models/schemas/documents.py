@@ -1,3 +1,5 @@
+from datetime import datetime
+from typing import Any
 from uuid import UUID
 
 from pydantic import BaseModel
@@ -8,3 +10,58 @@ class DocumentIngestResponse(BaseModel):
     title: str
     chunk_count: int
     source: str | None = None
+    external_id: str | None = None
+    duplicate_count: int = 0
+    reused_count: int = 0
+
+
+class IngestionJobResponse(BaseModel):
+    id: UUID
+    status: str
+    filename: str
+    title: str | None = None
+    source: str | None = None
+    document_id: UUID | None = None
+    chunk_count: int | None = None
+    chunks_processed: int | None = None
+    error: str | None = None
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+
+
+class BatchTextItem(BaseModel):
+    """One line of an NDJSON batch upload."""
+
+    title: str
+    content: str
+    source: str | None = None
+    external_id: str | None = None
+    meta: dict[str, Any] | None = None
+
+
+class BatchIngestResponse(BaseModel):
+    documents: list[DocumentIngestResponse]
+    chunk_count: int
+
+
+class DocumentSummaryResponse(BaseModel):
+    id: UUID
+    title: str
+    source: str | None = None
+    external_id: str | None = None
+    meta: dict[str, Any] | None = None
+    chunk_count: int
+    created_at: datetime
+    updated_at: datetime | None = None
+
+
+class DocumentListResponse(BaseModel):
+    documents: list[DocumentSummaryResponse]
+    next_cursor: str | None = None
+
+
+class DocumentExportLine(DocumentSummaryResponse):
+    """One line of ``GET /documents/export``; ``chunks`` only with ``include_chunks``."""
+
+    chunks: list[str] | None = None
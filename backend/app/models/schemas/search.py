@@ -0,0 +1,17 @@
+from datetime import datetime
+from uuid import UUID
+
+from pydantic import BaseModel, Field
+
+
+class SearchFiltersModel(BaseModel):
+    """Restrict search to documents matching every given condition."""
+
+    document_ids: list[UUID] = Field(default_factory=list, max_length=1000)
+    sources: list[str] = Field(default_factory=list, max_length=100)
+    meta: dict[str, str | bool | int | float | None] = Field(
+        default_factory=dict,
+        description="Exact values of document meta keys; true matches true or \"true\"",
+    )
+    created_after: datetime | None = Field(default=None, description="Inclusive")
+    created_before: datetime | None = Field(default=None, description="Exclusive")
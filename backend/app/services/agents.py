@@ -1,12 +1,38 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import asyncio
+import logging
+import re
+import time
+from collections.abc import AsyncIterator
+from contextlib import suppress
+from dataclasses import dataclass, field
 from typing import Any, Protocol
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from backend.app.services.llm import LLMService
+from backend.app.core.config import get_settings
+from backend.app.services.context_packing import pack_context
+from backend.app.services.llm import LLMService, LLMUsage
 from backend.app.services.search import SearchService
+from backend.app.services.search_filters import SearchFilters
+from backend.app.services.stage_metrics import (
+    StageTrace,
+    get_stage_metrics,
+    record,
+    trace_stages,
+)
+
+logger = logging.getLogger(__name__)
+
+# Clause boundaries a goal is split at: sentence ends, semicolons, line breaks and
+# connectives that usually join two separate questions.
+_CLAUSE_SPLIT_RE = re.compile(
+    r"[?;\n]+|\.\s+|\s+(?:and also|as well as|and then|versus|vs\.?|then|and)\s+",
+    re.IGNORECASE,
+)
+# Reciprocal-rank-fusion constant used to merge matches across sub-queries.
+_MERGE_RRF_K = 60
 
 
 class Tool(Protocol):
@@ -23,12 +49,15 @@ class DocumentSearchTool:
     name = "document_search"
     description = (
         "Searches stored document chunks for helpful context. "
-        "Input: {'query': str, 'limit': int}. "
+        "Input: {'query': str, 'limit': int, 'mode': 'vector'|'keyword'|'hybrid', "
+        "'filters': {document_ids, sources, meta, created_after, created_before}}. "
         "Returns: {'matches': [{document_id, chunk_index, content}]}."
     )
 
-    def __init__(self, session: AsyncSession) -> None:
-        self._search = SearchService(session)
+    def __init__(self, session: AsyncSession, *, filters: SearchFilters | None = None) -> None:
+        self._bind = session.bind
+        # Applied to every run whose input carries no filters of its own.
+        self._filters = filters
 
     async def run(self, *, input: dict[str, Any]) -> dict[str, Any]:
         query = str(input.get("query", "")).strip()
@@ -41,78 +70,255 @@ class DocumentSearchTool:
         except (TypeError, ValueError):
             limit = 5
 
-        matches = await self._search.search_by_vector(query=query, limit=limit)
+        mode = input.get("mode", "vector")
+        if mode not in ("vector", "keyword", "hybrid"):
+            mode = "vector"
+
+        filters = self._filters
+        if input.get("filters"):
+            filters = SearchFilters.from_mapping(input["filters"])
+
+        # A session of its own per run: the agent runs several searches at once, and
+        # one AsyncSession must not be used concurrently.
+        async with AsyncSession(self._bind) as session:
+            matches = await SearchService(session).retrieve(
+                query=query, limit=limit, mode=mode, filters=filters
+            )
         return {"matches": matches}
 
 
 @dataclass
 class AgentStep:
-    """Single reasoning step or tool invocation in the agent trace."""
+    """Single reasoning step or tool invocation in the agent trace.
+
+    ``duration_ms`` is the step's own wall-clock time, and ``queue_wait_ms`` is the time
+    a tool call waited for a concurrency slot before it started. ``context_bytes`` is the
+    size of the chunk text a tool returned or the answer step sent to the LLM.
+    ``stages`` breaks the duration down by the stages timed inside it (see
+    ``services.stage_metrics``).
+    """
 
     kind: str
     message: str
     tool_name: str | None = None
     tool_input: dict[str, Any] | None = None
     tool_output: dict[str, Any] | None = None
+    duration_ms: float | None = None
+    queue_wait_ms: float | None = None
+    tokens_in: int | None = None
+    tokens_out: int | None = None
+    context_bytes: int | None = None
+    cache_hit: bool | None = None
+    stages: dict[str, float] | None = None
+
+
+@dataclass
+class AgentUsage:
+    """Run totals of the per-step accounting."""
+
+    duration_ms: float = 0.0
+    queue_wait_ms: float = 0.0
+    tokens_in: int = 0
+    tokens_out: int = 0
+    retrieved_bytes: int = 0
+    context_bytes: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
+
+    @classmethod
+    def from_steps(cls, steps: list[AgentStep], duration_ms: float) -> AgentUsage:
+        usage = cls(duration_ms=duration_ms)
+        for step in steps:
+            usage.queue_wait_ms += step.queue_wait_ms or 0.0
+            usage.tokens_in += step.tokens_in or 0
+            usage.tokens_out += step.tokens_out or 0
+            if step.kind == "tool_call":
+                usage.retrieved_bytes += step.context_bytes or 0
+            elif step.kind == "answer":
+                usage.context_bytes += step.context_bytes or 0
+            if step.cache_hit is not None:
+                usage.cache_hits += step.cache_hit
+                usage.cache_misses += not step.cache_hit
+        usage.queue_wait_ms = round(usage.queue_wait_ms, 3)
+        return usage
 
 
 @dataclass
 class AgentResult:
     answer: str
     steps: list[AgentStep]
+    usage: AgentUsage = field(default_factory=AgentUsage)
+
+
+def _elapsed_ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 3)
+
+
+def _content_bytes(matches: list[dict[str, Any]]) -> int:
+    return sum(len(str(match.get("content", "")).encode("utf-8")) for match in matches)
+
+
+def plan_queries(goal: str, max_queries: int) -> list[str]:
+    """Break a goal into search queries: the goal itself, then each distinct clause.
+
+    Clauses of fewer than two words are dropped; at most ``max_queries`` are returned.
+    """
+
+    queries = [goal]
+    seen = {goal.casefold()}
+    for part in _CLAUSE_SPLIT_RE.split(goal):
+        clause = part.strip(" ,.:")
+        if len(clause.split()) < 2 or clause.casefold() in seen:
+            continue
+        seen.add(clause.casefold())
+        queries.append(clause)
+    return queries[: max(1, max_queries)]
+
+
+def merge_matches(results: list[list[dict[str, Any]]], limit: int) -> list[dict[str, Any]]:
+    """Fuse ranked match lists with reciprocal rank fusion, one entry per chunk.
+
+    A chunk found by several sub-queries ranks above one found by a single query.
+    Ties keep the order of ``results`` so the merge does not depend on which tool call
+    finished first.
+    """
+
+    scores: dict[tuple[Any, Any], float] = {}
+    first_seen: dict[tuple[Any, Any], tuple[int, int]] = {}
+    merged: dict[tuple[Any, Any], dict[str, Any]] = {}
+    for branch, matches in enumerate(results):
+        for rank, match in enumerate(matches):
+            key = (match.get("document_id"), match.get("chunk_index"))
+            scores[key] = scores.get(key, 0.0) + 1.0 / (_MERGE_RRF_K + rank + 1)
+            if key not in merged:
+                merged[key] = match
+                first_seen[key] = (branch, rank)
+    ordered = sorted(merged, key=lambda key: (-scores[key], first_seen[key]))
+    return [merged[key] for key in ordered[:limit]]
+
+
+@dataclass
+class _ToolCall:
+    tool: Tool
+    input: dict[str, Any]
+    output: dict[str, Any] | None = None
+    error: str | None = None
+    queue_wait_ms: float | None = None
+    duration_ms: float | None = None
+    trace: StageTrace | None = None
 
 
 class SimpleAgent:
     """A minimal planner/executor agent for multi-step document Q&A.
 
     Strategy:
-    - Always run `document_search` first to gather context.
+    - Split the goal into sub-queries (see `plan_queries`).
+    - Run every tool on every sub-query concurrently, at most ``max_concurrency`` at a
+      time, each call bounded by ``tool_timeout`` seconds and the whole fan-out by
+      ``tool_budget`` seconds. Calls still running when the budget is spent, or when the
+      caller stops consuming the stream, are cancelled.
+    - Merge and deduplicate the matches (see `merge_matches`) and pack them into a
+      token-budgeted context (see `services.context_packing`).
     - Then call the LLM with a prompt that includes the goal and retrieved chunks.
     - Return the final answer plus a lightweight trace of steps.
     """
 
-    def __init__(self, llm: LLMService, tools: list[Tool]) -> None:
+    def __init__(
+        self,
+        llm: LLMService,
+        tools: list[Tool],
+        *,
+        max_queries: int | None = None,
+        max_concurrency: int | None = None,
+        tool_timeout: float | None = None,
+        tool_budget: float | None = None,
+    ) -> None:
+        settings = get_settings()
         self._llm = llm
         self._tools: dict[str, Tool] = {tool.name: tool for tool in tools}
+        self.max_queries = max_queries if max_queries is not None else settings.agent_max_queries
+        self.max_concurrency = max(
+            1,
+            max_concurrency if max_concurrency is not None else settings.agent_max_concurrency,
+        )
+        self.tool_timeout = (
+            tool_timeout if tool_timeout is not None else settings.agent_tool_timeout
+        )
+        self.tool_budget = tool_budget if tool_budget is not None else settings.agent_tool_budget
 
     async def execute(self, goal: str, *, max_chunks: int = 5) -> AgentResult:
+        start = time.perf_counter()
         steps: list[AgentStep] = []
+        tokens: list[str] = []
+        async for item in self.stream(goal, max_chunks=max_chunks):
+            if isinstance(item, AgentStep):
+                steps.append(item)
+            else:
+                tokens.append(item)
+        usage = AgentUsage.from_steps(steps, _elapsed_ms(start))
+        return AgentResult(answer="".join(tokens), steps=steps, usage=usage)
+
+    async def stream(self, goal: str, *, max_chunks: int = 5) -> AsyncIterator[AgentStep | str]:
+        """Yield each step as soon as it completes and the answer token by token.
+
+        ``tool_call`` steps arrive in completion order. Answer tokens come between the
+        last ``tool_call`` step and the final ``answer`` step. Step durations also feed
+        the ``agent.*`` stage histograms.
+        """
+
         normalized_goal = goal.strip()
 
         if not normalized_goal:
             raise ValueError("Goal must not be empty.")
 
+        run_start = time.perf_counter()
+
         # Step 1: plan
-        steps.append(
-            AgentStep(
-                kind="plan",
-                message="Analyze goal and decide which tool to call.",
-            )
+        step_start = time.perf_counter()
+        queries = plan_queries(normalized_goal, self.max_queries)
+        plan_ms = _elapsed_ms(step_start)
+        record("agent.plan", plan_ms)
+        yield AgentStep(
+            kind="plan",
+            message=(
+                f"Split the goal into {len(queries)} search "
+                f"{'query' if len(queries) == 1 else 'queries'} and run the tools concurrently."
+            ),
+            tool_input={"queries": queries},
+            duration_ms=plan_ms,
         )
 
-        # Step 2: search via tool
-        search_tool = self._tools.get("document_search")
-        matches: list[dict[str, Any]] = []
-        if search_tool is not None:
-            tool_input = {"query": normalized_goal, "limit": max_chunks}
-            tool_output = await search_tool.run(input=tool_input)
-            matches = list(tool_output.get("matches", []))
-            steps.append(
-                AgentStep(
-                    kind="tool_call",
-                    message="Ran document_search to retrieve relevant chunks.",
-                    tool_name=search_tool.name,
-                    tool_input=tool_input,
-                    tool_output={"match_count": len(matches)},
-                )
+        # Step 2: fan out every tool over every sub-query
+        calls = [
+            _ToolCall(tool=tool, input={"query": query, "limit": max_chunks})
+            for query in queries
+            for tool in self._tools.values()
+        ]
+        async for call in self._run_calls(calls):
+            found = list((call.output or {}).get("matches", []))
+            if call.error is not None:
+                tool_output: dict[str, Any] = {"error": call.error}
+            else:
+                tool_output = {"match_count": len(found)}
+            trace = call.trace or StageTrace()
+            yield AgentStep(
+                kind="tool_call",
+                message=f"Ran {call.tool.name} to retrieve relevant chunks.",
+                tool_name=call.tool.name,
+                tool_input=call.input,
+                tool_output=tool_output,
+                duration_ms=call.duration_ms,
+                queue_wait_ms=call.queue_wait_ms,
+                context_bytes=_content_bytes(found),
+                cache_hit=trace.cache_hit,
+                stages={stage: round(ms, 3) for stage, ms in trace.stages.items()},
             )
+        matches = merge_matches(
+            [list((call.output or {}).get("matches", [])) for call in calls], max_chunks
+        )
 
         # Step 3: answer with LLM
-        context_lines: list[str] = []
-        for match in matches[:max_chunks]:
-            context_lines.append(
-                f"[{match.get('document_id')}#{match.get('chunk_index')}] {match.get('content')}"
-            )
+        context_lines = pack_context(matches).lines()
 
         if context_lines:
             prompt = (
@@ -129,13 +335,89 @@ class SimpleAgent:
                 f"Goal: {normalized_goal}"
             )
 
-        llm_response = await self._llm.chat(prompt)
-        steps.append(
-            AgentStep(
-                kind="answer",
-                message="Produced a final answer using the LLM.",
-            )
+        step_start = time.perf_counter()
+        stages: dict[str, float] = {}
+        usage = LLMUsage()
+        tokens = self._llm.stream(
+            prompt, question=normalized_goal, contexts=context_lines, usage=usage
+        )
+        async for token in tokens:
+            if not stages:
+                stages["llm.first_token"] = _elapsed_ms(step_start)
+            yield token
+        answer_ms = _elapsed_ms(step_start)
+        record("agent.answer", answer_ms)
+        record("agent.total", _elapsed_ms(run_start))
+        yield AgentStep(
+            kind="answer",
+            message="Produced a final answer using the LLM.",
+            duration_ms=answer_ms,
+            tokens_in=usage.tokens_in,
+            tokens_out=usage.tokens_out,
+            context_bytes=len("\n".join(context_lines).encode("utf-8")),
+            cache_hit=usage.cache_hit,
+            stages=stages,
         )
 
-        return AgentResult(answer=llm_response.answer, steps=steps)
+    async def _run_calls(self, calls: list[_ToolCall]) -> AsyncIterator[_ToolCall]:
+        """Run ``calls`` concurrently and yield each one as it finishes.
+
+        A call that times out or raises is yielded with ``error`` set. Calls still
+        pending when ``tool_budget`` runs out are cancelled and yielded last with
+        ``error="cancelled"``; closing the iterator early cancels them too.
+        """
+
+        finished: asyncio.Queue[_ToolCall] = asyncio.Queue()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run(call: _ToolCall) -> None:
+            queued = time.perf_counter()
+            try:
+                async with semaphore:
+                    call.queue_wait_ms = _elapsed_ms(queued)
+                    record("agent.queue_wait", call.queue_wait_ms)
+                    started = time.perf_counter()
+                    # Set inside this task, so concurrent calls keep separate traces.
+                    with trace_stages() as call.trace:
+                        try:
+                            async with asyncio.timeout(self.tool_timeout):
+                                call.output = await call.tool.run(input=call.input)
+                        finally:
+                            call.duration_ms = _elapsed_ms(started)
+                            # Straight to the histogram: not a stage of its own trace.
+                            get_stage_metrics().observe(
+                                f"agent.tool.{call.tool.name}", call.duration_ms
+                            )
+            except TimeoutError:
+                call.error = "timeout"
+            except Exception as exc:
+                logger.warning("Agent tool %s failed: %s", call.tool.name, exc)
+                call.error = str(exc) or type(exc).__name__
+            finished.put_nowait(call)
+
+        async def run_all() -> None:
+            async with asyncio.TaskGroup() as group:
+                for call in calls:
+                    group.create_task(run(call))
+
+        runner = asyncio.create_task(run_all())
+        pending = list(calls)
+        deadline = asyncio.get_running_loop().time() + self.tool_budget
+        try:
+            while pending:
+                remaining = deadline - asyncio.get_running_loop().time()
+                try:
+                    call = await asyncio.wait_for(finished.get(), max(0.0, remaining))
+                except TimeoutError:
+                    break
+                pending.remove(call)
+                yield call
+        finally:
+            runner.cancel()
+            with suppress(asyncio.CancelledError):
+                await runner
 
+        for call in pending:
+            if call.output is None and call.error is None:
+                call.error = "cancelled"
+            yield call
@@ -0,0 +1,320 @@
+"""Pluggable text chunking.
+
+Every strategy is an incremental ``Chunker`` (``feed`` pieces, then ``finish``) so the
+streaming ingestion path can use any of them:
+
+- ``fixed``: character windows with character overlap (the original behaviour).
+- ``sentence`` / ``paragraph``: pack whole sentences or paragraphs into chunks of at
+  most ``max_tokens`` tokens, overlapping by up to ``overlap_tokens`` whole segments.
+- ``heading``: like ``paragraph`` but a Markdown heading always starts a new chunk and
+  is repeated at the top of every chunk of its section.
+
+Segments are produced in a single regex pass over the incoming text and token counts
+are computed once per segment, so chunking is linear in the input size.
+"""
+
+from __future__ import annotations
+
+import re
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+from typing import Literal, Protocol
+
+ChunkStrategy = Literal["fixed", "sentence", "paragraph", "heading"]
+TokenCounter = Callable[[str], int]
+Segment = tuple[str, int]
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s]")
+_NON_SPACE = re.compile(r"\S")
+_WORD_RE = re.compile(r"\S+")
+# Han, kana and Hangul: written without spaces, roughly one token per character.
+_CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff"
+_CJK_RE = re.compile(f"[{_CJK}]")
+# Words long enough to span several tokens (URLs, base64, identifiers) or holding CJK.
+_LONG_WORD_RE = re.compile(f"\\S{{16,}}|\\S*[{_CJK}]\\S*")
+_CHARS_PER_TOKEN = 4
+_HEADING_RE = re.compile(r"#{1,6}\s")
+_BOUNDARIES: dict[str, re.Pattern[str]] = {
+    "sentence": re.compile(r"[.!?][\"')\]]*\s+|\n[ \t]*\n\s*"),
+    "paragraph": re.compile(r"\n[ \t]*\n\s*"),
+    "heading": re.compile(r"\n[ \t]*\n\s*|\n(?=#{1,6}\s)"),
+}
+# Characters a boundary match can end with before more text arrives.
+_BOUNDARY_TAIL = " \t\n\r\x0b\x0c\"')]#"
+
+
+def approx_token_count(text: str) -> int:
+    """Cheap tokenizer-free estimate: one token per word plus one per punctuation mark.
+
+    Words of 16 or more characters count one token per ``_CHARS_PER_TOKEN``
+    characters and CJK characters one each, so text without spaces is not undercounted.
+    """
+
+    tokens = len(text.split()) + len(_PUNCTUATION_RE.findall(text))
+    for match in _LONG_WORD_RE.finditer(text):
+        word = match.group()
+        cjk = len(_CJK_RE.findall(word))
+        tokens += cjk + -(-(len(word) - cjk) // _CHARS_PER_TOKEN) - 1
+    return tokens
+
+
+@dataclass(frozen=True)
+class ChunkingOptions:
+    strategy: ChunkStrategy = "fixed"
+    chunk_size: int = 800
+    overlap: int = 80
+    max_tokens: int = 256
+    overlap_tokens: int = 0
+
+
+class Chunker(Protocol):
+    def feed(self, piece: str) -> list[str]: ...
+
+    def finish(self) -> list[str]: ...
+
+
+class _NewlineNormalizer:
+    """``\\r\\n`` -> ``\\n`` across piece boundaries."""
+
+    def __init__(self) -> None:
+        self._pending_cr = False
+
+    def __call__(self, piece: str) -> str:
+        if self._pending_cr:
+            piece = "\r" + piece
+        self._pending_cr = piece.endswith("\r")
+        if self._pending_cr:
+            piece = piece[:-1]
+        return piece.replace("\r\n", "\n")
+
+    def flush(self) -> str:
+        tail, self._pending_cr = ("\r" if self._pending_cr else ""), False
+        return tail
+
+
+class FixedWindowChunker:
+    """Incremental fixed-size character windowing over text fed piece by piece.
+
+    Produces exactly the chunks that windowing the whole (CRLF-normalised, stripped)
+    text would, while only buffering about one window: a window is emitted as soon as
+    non-whitespace text follows it, which proves it is not the final, right-stripped tail.
+    """
+
+    def __init__(self, *, chunk_size: int, overlap: int) -> None:
+        self.chunk_size = chunk_size
+        self.overlap = max(0, min(overlap, chunk_size // 2))
+        self._normalize = _NewlineNormalizer()
+        self._buffer = ""
+
+    def feed(self, piece: str) -> list[str]:
+        piece = self._normalize(piece)
+        if not self._buffer:
+            piece = piece.lstrip()
+        buffer = self._buffer + piece
+
+        chunks: list[str] = []
+        start = 0
+        while _NON_SPACE.search(buffer, start + self.chunk_size):
+            end = start + self.chunk_size
+            chunk = buffer[start:end].strip()
+            if chunk:
+                chunks.append(chunk)
+            start = max(end - self.overlap, start + 1)
+        self._buffer = buffer[start:]
+        return chunks
+
+    def finish(self) -> list[str]:
+        buffer = (self._buffer + self._normalize.flush()).rstrip()
+        self._buffer = ""
+        return _fixed_windows(buffer, self.chunk_size, self.overlap)
+
+
+def _fixed_windows(text: str, chunk_size: int, overlap: int) -> list[str]:
+    """Window already-stripped text; ``overlap`` must not exceed ``chunk_size // 2``."""
+
+    chunks: list[str] = []
+    start = 0
+    text_length = len(text)
+    while start < text_length:
+        end = min(text_length, start + chunk_size)
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        if end == text_length:
+            break
+        start = max(end - overlap, start + 1)
+    return chunks
+
+
+class StructuredChunker:
+    """Packs sentences, paragraphs or heading sections into token-budgeted chunks."""
+
+    def __init__(
+        self,
+        *,
+        unit: Literal["sentence", "paragraph", "heading"],
+        max_tokens: int,
+        overlap_tokens: int = 0,
+        count_tokens: TokenCounter = approx_token_count,
+    ) -> None:
+        self.unit = unit
+        self.max_tokens = max(1, max_tokens)
+        self.overlap_tokens = max(0, min(overlap_tokens, self.max_tokens // 2))
+        self.count_tokens = count_tokens
+        self._boundary = _BOUNDARIES[unit]
+        self._separator = " " if unit == "sentence" else "\n\n"
+        # Text without any boundary is cut at whitespace once it grows this long.
+        self._max_pending = 16 * self.max_tokens + 1024
+        self._normalize = _NewlineNormalizer()
+        self._pending = ""
+        self._scan_from = 0
+        self._heading: Segment | None = None
+        self._current: list[Segment] = []
+        self._tokens = 0
+        self._carried = 0
+        self._out: list[str] = []
+
+    def feed(self, piece: str) -> list[str]:
+        pending = self._pending + self._normalize(piece)
+        consumed = 0
+        for match in self._boundary.finditer(pending, self._scan_from):
+            if match.end() == len(pending):
+                break  # the boundary may continue in the next piece
+            # Sentence boundaries begin with the closing punctuation, which stays put.
+            end = match.start() + len(match.group().rstrip())
+            self._add_segment(pending[consumed:end])
+            consumed = match.end()
+        while len(pending) - consumed > self._max_pending:
+            limit = consumed + self._max_pending
+            cut = pending.rfind(" ", consumed, limit) + 1 or limit
+            self._add_segment(pending[consumed:cut])
+            consumed = cut
+        self._pending = pending[consumed:]
+        # Everything before a trailing run that could still grow into a boundary is scanned.
+        self._scan_from = max(0, len(self._pending.rstrip(_BOUNDARY_TAIL)) - 1)
+        return self._drain()
+
+    def finish(self) -> list[str]:
+        self._add_segment(self._pending + self._normalize.flush())
+        self._pending, self._scan_from = "", 0
+        self._emit()
+        self._heading = None
+        return self._drain()
+
+    def _drain(self) -> list[str]:
+        out, self._out = self._out, []
+        return out
+
+    def _add_segment(self, raw: str) -> None:
+        text = raw.strip()
+        if not text:
+            return
+        if self.unit == "heading" and _HEADING_RE.match(text):
+            heading_line, _, rest = text.partition("\n")
+            heading = (heading_line, self.count_tokens(heading_line))
+            self._emit()
+            self._heading = None
+            self._append(heading)
+            if heading[1] <= self.max_tokens // 4:
+                self._heading = heading
+            self._add_segment(rest)
+            return
+        tokens = self.count_tokens(text)
+        if tokens > self.max_tokens:
+            for segment in self._split_oversized(text):
+                self._append(segment)
+            return
+        self._append((text, tokens))
+
+    def _append(self, segment: Segment) -> None:
+        tokens = segment[1]
+        if self._current and self._tokens + tokens > self.max_tokens:
+            previous = self._current
+            self._emit()
+            self._start(previous, room=self.max_tokens - tokens)
+        elif not self._current:
+            self._start([], room=self.max_tokens - tokens)
+        self._current.append(segment)
+        self._tokens += tokens
+
+    def _start(self, previous: list[Segment], *, room: int) -> None:
+        """Open a chunk with the section heading and overlap carried over from ``previous``."""
+
+        prefix: list[Segment] = []
+        if self._heading is not None and self._heading[1] <= room:
+            prefix.append(self._heading)
+            room -= self._heading[1]
+        budget = min(self.overlap_tokens, room)
+        tail: list[Segment] = []
+        # Never carry the whole previous chunk, so every chunk adds new text.
+        for segment in reversed(previous[1:]):
+            if segment is self._heading or segment[1] > budget:
+                break
+            tail.insert(0, segment)
+            budget -= segment[1]
+        self._current = prefix + tail
+        self._tokens = sum(tokens for _, tokens in self._current)
+        self._carried = len(self._current)
+
+    def _emit(self) -> None:
+        if len(self._current) > self._carried:
+            self._out.append(self._separator.join(text for text, _ in self._current))
+        self._current, self._tokens, self._carried = [], 0, 0
+
+    def _split_oversized(self, text: str) -> Iterator[Segment]:
+        """Cut a segment larger than the budget at word boundaries, or inside a word
+        that is over budget on its own."""
+
+        budget = max(1, self.max_tokens - (self._heading[1] if self._heading else 0))
+        words: list[str] = []
+        total = 0
+        for match in _WORD_RE.finditer(text):
+            word = match.group()
+            tokens = self.count_tokens(word)
+            if words and total + tokens > budget:
+                yield " ".join(words), total
+                words, total = [], 0
+            if tokens > budget:
+                yield from self._split_word(word, budget)
+                continue
+            words.append(word)
+            total += tokens
+        if words:
+            yield " ".join(words), total
+
+    def _split_word(self, word: str, budget: int) -> Iterator[Segment]:
+        # Size pieces from the word's average density, then shrink any that do not fit.
+        size = max(1, len(word) * budget // max(self.count_tokens(word), 1))
+        start = 0
+        while start < len(word):
+            piece = word[start : start + size]
+            while (tokens := self.count_tokens(piece)) > budget and len(piece) > 1:
+                piece = piece[: len(piece) * budget // tokens or 1]
+            yield piece, tokens
+            start += len(piece)
+
+
+def make_chunker(
+    options: ChunkingOptions, *, count_tokens: TokenCounter = approx_token_count
+) -> Chunker:
+    if options.strategy == "fixed":
+        return FixedWindowChunker(chunk_size=options.chunk_size, overlap=options.overlap)
+    return StructuredChunker(
+        unit=options.strategy,
+        max_tokens=options.max_tokens,
+        overlap_tokens=options.overlap_tokens,
+        count_tokens=count_tokens,
+    )
+
+
+def chunk_text(
+    text: str, options: ChunkingOptions, *, count_tokens: TokenCounter = approx_token_count
+) -> list[str]:
+    """Chunk a whole text in one call."""
+
+    if options.strategy == "fixed":
+        normalized = text.replace("\r\n", "\n").strip()
+        overlap = max(0, min(options.overlap, options.chunk_size // 2))
+        return _fixed_windows(normalized, options.chunk_size, overlap) if normalized else []
+    chunker = make_chunker(options, count_tokens=count_tokens)
+    return chunker.feed(text) + chunker.finish()
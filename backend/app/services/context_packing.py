@@ -0,0 +1,235 @@
+"""Token-budgeted context assembly for RAG and agent prompts.
+
+``pack_context`` turns ranked search matches into the passages that go into a prompt:
+
+1. Matches from the same document with consecutive ``chunk_index`` values are merged
+   into one passage, and the text the chunker repeated between them (the
+   ``chunk_overlap`` of ``fixed`` windows, the overlap segments of the structured
+   strategies) is kept once.
+2. Passages are ordered by maximal marginal relevance: relevance from the search rank,
+   minus TF-IDF cosine similarity to the passages already chosen. A passage nearly
+   identical to a chosen one is dropped.
+3. The token budget is filled greedily in that order. A passage that no longer fits is
+   skipped in favour of smaller ones further down.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Any
+
+from backend.app.core.config import get_settings
+from backend.app.services.chunking import TokenCounter, approx_token_count
+
+_WORD_RE = re.compile(r"\w+")
+_PIECE_RE = re.compile(r"\S+\s*")
+# Shorter suffix/prefix matches between neighbours are coincidence, not chunk overlap.
+_MIN_OVERLAP = 16
+_MAX_OVERLAP = 2048
+
+
+@dataclass
+class Passage:
+    document_id: str
+    chunk_indexes: list[int]
+    content: str
+    relevance: float
+    tokens: int = 0
+
+    @property
+    def label(self) -> str:
+        if not self.chunk_indexes:
+            return f"[{self.document_id}]"
+        first, last = self.chunk_indexes[0], self.chunk_indexes[-1]
+        span = str(first) if first == last else f"{first}-{last}"
+        return f"[{self.document_id}#{span}]"
+
+    def line(self) -> str:
+        return f"{self.label} {self.content}"
+
+
+@dataclass
+class ContextPack:
+    """Passages chosen for a prompt, in the order they should appear."""
+
+    passages: list[Passage]
+    tokens: int
+    input_tokens: int
+    merged: int = 0
+    redundant: int = 0
+    skipped: int = 0
+
+    def lines(self) -> list[str]:
+        return [passage.line() for passage in self.passages]
+
+
+def trim_overlap(left: str, right: str) -> str:
+    """Return ``right`` without the prefix it repeats from the end of ``left``."""
+
+    for size in range(min(len(left), len(right), _MAX_OVERLAP), _MIN_OVERLAP - 1, -1):
+        if left.endswith(right[:size]):
+            return right[size:]
+    return right
+
+
+def pack_context(
+    matches: Sequence[dict[str, Any]],
+    *,
+    budget_tokens: int | None = None,
+    mmr_lambda: float | None = None,
+    max_similarity: float | None = None,
+    count_tokens: TokenCounter = approx_token_count,
+) -> ContextPack:
+    """Merge, deduplicate and budget ``matches`` (best first) into prompt passages.
+
+    Unset options come from the ``context_*`` settings; a budget of ``0`` or less means
+    no cap. The best passage is truncated rather than dropped when it alone exceeds the
+    budget, so matches never pack down to an empty context.
+    """
+
+    settings = get_settings()
+    budget = budget_tokens if budget_tokens is not None else settings.context_token_budget
+    mmr_lambda = mmr_lambda if mmr_lambda is not None else settings.context_mmr_lambda
+    max_similarity = (
+        max_similarity if max_similarity is not None else settings.context_max_similarity
+    )
+
+    input_tokens = sum(
+        count_tokens(f"[{match.get('document_id')}#{match.get('chunk_index')}] ")
+        + count_tokens(str(match.get("content", "")))
+        for match in matches
+    )
+    passages, merged = _merge_adjacent(matches)
+    for passage in passages:
+        passage.tokens = count_tokens(passage.line())
+    order, redundant = _mmr_order(passages, mmr_lambda, max_similarity)
+
+    chosen: list[Passage] = []
+    used = skipped = 0
+    for passage in (passages[index] for index in order):
+        if budget <= 0 or used + passage.tokens <= budget:
+            chosen.append(passage)
+            used += passage.tokens
+        elif not chosen:
+            label_tokens = count_tokens(passage.label + " ")
+            passage.content = _truncate(passage.content, budget - label_tokens, count_tokens)
+            passage.tokens = count_tokens(passage.line())
+            chosen.append(passage)
+            used += passage.tokens
+        else:
+            skipped += 1
+    return ContextPack(
+        passages=chosen,
+        tokens=used,
+        input_tokens=input_tokens,
+        merged=merged,
+        redundant=redundant,
+        skipped=skipped,
+    )
+
+
+def _merge_adjacent(matches: Sequence[dict[str, Any]]) -> tuple[list[Passage], int]:
+    """One passage per run of consecutive chunks of a document, at its best rank."""
+
+    total = len(matches)
+    by_document: dict[str, list[tuple[int, int, str]]] = {}
+    seen: set[tuple[str, int]] = set()
+    singles: list[Passage] = []
+    for rank, match in enumerate(matches):
+        relevance = 1.0 - rank / total
+        document_id = str(match.get("document_id"))
+        content = str(match.get("content", ""))
+        try:
+            chunk_index = int(match.get("chunk_index"))  # type: ignore[arg-type]
+        except (TypeError, ValueError):
+            singles.append(Passage(document_id, [], content, relevance))
+            continue
+        if (document_id, chunk_index) in seen:
+            continue
+        seen.add((document_id, chunk_index))
+        by_document.setdefault(document_id, []).append((chunk_index, rank, content))
+
+    passages: list[Passage] = []
+    merged = 0
+    for document_id, chunks in by_document.items():
+        current: Passage | None = None
+        for chunk_index, rank, content in sorted(chunks):
+            relevance = 1.0 - rank / total
+            if current is not None and chunk_index == current.chunk_indexes[-1] + 1:
+                tail = trim_overlap(current.content, content)
+                separator = "" if len(tail) < len(content) else " "
+                current.content = f"{current.content}{separator}{tail}"
+                current.chunk_indexes.append(chunk_index)
+                current.relevance = max(current.relevance, relevance)
+                merged += 1
+                continue
+            current = Passage(document_id, [chunk_index], content, relevance)
+            passages.append(current)
+    return passages + singles, merged
+
+
+def _mmr_order(
+    passages: list[Passage], mmr_lambda: float, max_similarity: float
+) -> tuple[list[int], int]:
+    """Indexes of ``passages`` in maximal-marginal-relevance order, minus near-duplicates."""
+
+    # TF-IDF over the candidates themselves: boilerplate every passage shares counts for
+    # little, so passages only look alike when they share their distinctive words.
+    counts = [Counter(_WORD_RE.findall(passage.content.casefold())) for passage in passages]
+    document_frequency = Counter(word for count in counts for word in count)
+    idf = {
+        word: math.log((len(passages) + 1) / frequency)
+        for word, frequency in document_frequency.items()
+    }
+    vectors = [{word: tf * idf[word] for word, tf in count.items()} for count in counts]
+    norms = [math.sqrt(sum(weight * weight for weight in vector.values())) for vector in vectors]
+
+    def similarity(a: int, b: int) -> float:
+        if not norms[a] or not norms[b]:
+            return 0.0
+        small, large = sorted((vectors[a], vectors[b]), key=len)
+        dot = sum(weight * large.get(word, 0.0) for word, weight in small.items())
+        return dot / (norms[a] * norms[b])
+
+    closest = [0.0] * len(passages)
+    remaining = list(range(len(passages)))
+    order: list[int] = []
+    redundant = 0
+    while remaining:
+        pick = max(
+            remaining,
+            key=lambda index: (
+                mmr_lambda * passages[index].relevance - (1 - mmr_lambda) * closest[index],
+                -index,
+            ),
+        )
+        order.append(pick)
+        kept = []
+        for index in remaining:
+            if index == pick:
+                continue
+            closest[index] = max(closest[index], similarity(index, pick))
+            if closest[index] >= max_similarity:
+                redundant += 1
+            else:
+                kept.append(index)
+        remaining = kept
+    return order, redundant
+
+
+def _truncate(text: str, budget: int, count_tokens: TokenCounter) -> str:
+    """Longest word-aligned prefix of ``text`` within ``budget`` tokens."""
+
+    used = 0
+    end = 0
+    for piece in _PIECE_RE.finditer(text):
+        cost = count_tokens(piece.group())
+        if used + cost > budget:
+            break
+        used += cost
+        end = piece.end()
+    return text[:end].rstrip()
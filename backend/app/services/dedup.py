@@ -0,0 +1,152 @@
+"""Exact and near-duplicate detection for chunks.
+
+Exact duplicates share a SHA-256 of their whitespace-normalised text. Near duplicates
+are found with 64-bit SimHash fingerprints over word shingles: two fingerprints within
+``max_distance`` bits always agree on at least one of ``max_distance + 1`` bands
+(pigeonhole), so an LSH table per band yields all candidates without a corpus scan.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+from collections.abc import Sequence
+from typing import Any, Literal
+from uuid import UUID
+from weakref import WeakKeyDictionary
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.models.db.documents import DocumentChunk
+
+logger = logging.getLogger(__name__)
+
+DedupMode = Literal["off", "exact", "near"]
+
+_SHINGLE_SIZE = 3
+_LOAD_BATCH_SIZE = 5000
+_BIT_POSITIONS = np.arange(64, dtype=np.uint64)
+_MASK_64 = (1 << 64) - 1
+
+
+def content_hash(text: str) -> str:
+    """Hash identifying chunks that differ at most in whitespace."""
+
+    return hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+
+def simhash(text: str, *, min_words: int = 8) -> int | None:
+    """Signed 64-bit SimHash of lower-cased word shingles; ``None`` for very short texts.
+
+    Short texts are left to exact matching: a handful of shingles gives fingerprints
+    that collide far too easily.
+    """
+
+    words = text.lower().split()
+    if len(words) < min_words:
+        return None
+    shingles = {
+        " ".join(words[start : start + _SHINGLE_SIZE])
+        for start in range(len(words) - _SHINGLE_SIZE + 1)
+    }
+    hashes = np.fromiter(
+        (
+            int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little")
+            for s in shingles
+        ),
+        dtype=np.uint64,
+        count=len(shingles),
+    )
+    # Per bit position, count the shingles that set it; keep the bits set by a majority.
+    votes = ((hashes[:, None] >> _BIT_POSITIONS) & np.uint64(1)).sum(axis=0)
+    fingerprint = int(np.packbits(votes * 2 > len(shingles), bitorder="little").view("<u8")[0])
+    return fingerprint - (1 << 64) if fingerprint >= 1 << 63 else fingerprint
+
+
+class SimHashIndex:
+    """Banded LSH over SimHash fingerprints of canonical (non-duplicate) chunks."""
+
+    def __init__(self, *, max_distance: int = 4) -> None:
+        self.max_distance = max(0, min(max_distance, 15))
+        bands = self.max_distance + 1
+        width = 64 // bands
+        # (shift, width) per band; the last band absorbs the remainder bits.
+        self._bands = [
+            (band * width, width if band < bands - 1 else 64 - band * width)
+            for band in range(bands)
+        ]
+        self._tables: list[dict[int, list[UUID]]] = [{} for _ in self._bands]
+        self._fingerprints: dict[UUID, int] = {}
+        self.loaded = False
+        self._load_lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self._fingerprints)
+
+    async def ensure_loaded(self, session: AsyncSession) -> None:
+        if self.loaded:
+            return
+        async with self._load_lock:
+            if self.loaded:
+                return
+            stmt = select(DocumentChunk.id, DocumentChunk.simhash).where(
+                DocumentChunk.simhash.isnot(None), DocumentChunk.duplicate_of.is_(None)
+            )
+            result = await session.stream(stmt)
+            async for rows in result.partitions(_LOAD_BATCH_SIZE):
+                for row in rows:
+                    self.add(row.id, row.simhash)
+            self.loaded = True
+            logger.info("SimHash index loaded with %s fingerprints", len(self))
+
+    def _keys(self, fingerprint: int) -> list[int]:
+        unsigned = fingerprint & _MASK_64
+        return [(unsigned >> shift) & ((1 << width) - 1) for shift, width in self._bands]
+
+    def add(self, chunk_id: UUID, fingerprint: int) -> None:
+        if chunk_id in self._fingerprints:
+            return
+        self._fingerprints[chunk_id] = fingerprint
+        for table, key in zip(self._tables, self._keys(fingerprint)):
+            table.setdefault(key, []).append(chunk_id)
+
+    def remove(self, ids: Sequence[UUID]) -> None:
+        for chunk_id in ids:
+            fingerprint = self._fingerprints.pop(chunk_id, None)
+            if fingerprint is None:
+                continue
+            for table, key in zip(self._tables, self._keys(fingerprint)):
+                bucket = table.get(key)
+                if bucket is not None and chunk_id in bucket:
+                    bucket.remove(chunk_id)
+                    if not bucket:
+                        del table[key]
+
+    def find(self, fingerprint: int) -> UUID | None:
+        """Closest indexed chunk within ``max_distance`` bits, if any."""
+
+        best: tuple[int, UUID] | None = None
+        for table, key in zip(self._tables, self._keys(fingerprint)):
+            for chunk_id in table.get(key, ()):
+                distance = ((self._fingerprints[chunk_id] ^ fingerprint) & _MASK_64).bit_count()
+                if distance <= self.max_distance and (best is None or distance < best[0]):
+                    best = (distance, chunk_id)
+        return best[1] if best else None
+
+
+_indexes: WeakKeyDictionary[Engine, SimHashIndex] = WeakKeyDictionary()
+
+
+def get_simhash_index(session: AsyncSession, *, max_distance: int = 4) -> SimHashIndex:
+    """Return the near-duplicate index for the session's database engine."""
+
+    engine: Any = session.get_bind()
+    index = _indexes.get(engine)
+    if index is None:
+        index = SimHashIndex(max_distance=max_distance)
+        _indexes[engine] = index
+    return index
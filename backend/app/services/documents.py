@@ -1,18 +1,391 @@
 from __future__ import annotations
 
-from collections.abc import Sequence
+import base64
+import json
+import os
+from collections import Counter, deque
+from collections.abc import (
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Generator,
+    Iterable,
+    Iterator,
+    Sequence,
+)
+from contextlib import aclosing, asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
 from io import BytesIO
+from typing import Any
+from uuid import UUID, uuid4
 
-import docx  # type: ignore[import-untyped]
-import pytesseract
-from PIL import Image
-from PyPDF2 import PdfReader
-from sqlalchemy import select
+import numpy as np
+from sqlalchemy import and_, delete, func, insert, or_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
+from backend.app.core.config import get_settings
 from backend.app.models.db.documents import Document, DocumentChunk
+from backend.app.services.chunking import (
+    ChunkingOptions,
+    ChunkStrategy,
+    chunk_text,
+    make_chunker,
+)
+from backend.app.services.dedup import DedupMode, content_hash, get_simhash_index, simhash
 from backend.app.services.embeddings import EmbeddingService
+from backend.app.services.extraction import aiter_text, iter_text
+from backend.app.services.keyword_index import get_keyword_index
+from backend.app.services.query_cache import bump_corpus_version
+from backend.app.services.vector_index import get_vector_index
+
+_IN_CLAUSE_SIZE = 500
+_EXPORT_BATCH_SIZE = 500
+
+
+@dataclass
+class IngestResult:
+    document: Document
+    chunk_count: int
+    duplicate_count: int = 0
+    # Stored chunks an upsert kept as they were (text, embedding and all).
+    reused_count: int = 0
+
+
+@dataclass
+class DocumentSummary:
+    """A document row without its chunks; ``chunk_count`` comes from an aggregate."""
+
+    id: UUID
+    title: str
+    source: str | None
+    external_id: str | None
+    meta: dict | None
+    created_at: datetime
+    updated_at: datetime | None
+    chunk_count: int
+
+
+@dataclass
+class DocumentPage:
+    documents: list[DocumentSummary]
+    # Opaque keyset cursor for the page after this one; ``None`` on the last page.
+    next_cursor: str | None = None
+
+
+class EmptyDocumentError(ValueError):
+    """A document yielded no readable text, so there is nothing to chunk or store."""
+
+
+def _encode_cursor(created_at: datetime, document_id: UUID) -> str:
+    raw = json.dumps([created_at.isoformat(), str(document_id)]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, document_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), UUID(document_id)
+    except (ValueError, TypeError) as exc:
+        raise ValueError("Invalid cursor.") from exc
+
+
+@dataclass
+class BatchDocument:
+    """One document of a bulk ingest: metadata plus its text as a stream of pieces."""
+
+    title: str
+    pieces: Iterable[str] | AsyncIterable[str]
+    source: str | None = None
+    meta: dict = field(default_factory=dict)
+    external_id: str | None = None
+
+
+class _ChunkReuse:
+    """Matches a re-ingested document's chunks against its stored ones by content hash.
+
+    Each stored chunk can be claimed once by a new chunk with the same hash; claimed rows
+    stay in place (only their ``chunk_index`` may move) and whatever is left unclaimed
+    at the end is stale.
+    """
+
+    def __init__(self, stored: Iterable[tuple[UUID, int, str]]) -> None:
+        self._by_hash: dict[str, deque[tuple[UUID, int]]] = {}
+        for chunk_id, chunk_index, digest in stored:
+            self._by_hash.setdefault(digest, deque()).append((chunk_id, chunk_index))
+        self.moves: list[dict[str, Any]] = []
+        self.reused = 0
+
+    @classmethod
+    async def load(cls, session: AsyncSession, document_id: UUID) -> _ChunkReuse:
+        stmt = (
+            select(DocumentChunk.id, DocumentChunk.chunk_index, DocumentChunk.content_hash)
+            .where(DocumentChunk.document_id == document_id)
+            .order_by(DocumentChunk.chunk_index)
+        )
+        rows = (await session.execute(stmt)).all()
+        unhashed = [row.id for row in rows if row.content_hash is None]
+        hashes: dict[UUID, str] = {}
+        # Chunks stored before content hashes existed are hashed from their text.
+        for start in range(0, len(unhashed), _IN_CLAUSE_SIZE):
+            batch = unhashed[start : start + _IN_CLAUSE_SIZE]
+            stmt = select(DocumentChunk.id, DocumentChunk.content).where(
+                DocumentChunk.id.in_(batch)
+            )
+            for chunk_id, content in (await session.execute(stmt)).all():
+                hashes[chunk_id] = content_hash(content)
+        return cls(
+            (row.id, row.chunk_index, row.content_hash or hashes[row.id]) for row in rows
+        )
+
+    def claim(self, digest: str, chunk_index: int) -> bool:
+        bucket = self._by_hash.get(digest)
+        if not bucket:
+            return False
+        chunk_id, stored_index = bucket.popleft()
+        if stored_index != chunk_index:
+            self.moves.append({"id": chunk_id, "chunk_index": chunk_index})
+        self.reused += 1
+        return True
+
+    def stale_ids(self) -> list[UUID]:
+        return [chunk_id for bucket in self._by_hash.values() for chunk_id, _ in bucket]
+
+
+class _BulkWriter:
+    """Buffers new documents and chunks and writes them with multi-row INSERTs.
+
+    Rows go through SQLAlchemy Core ``insert()`` executemany (batched into multi-row
+    ``VALUES`` by the dialect) instead of one ORM object per chunk. Chunks are embedded
+    ``batch_size`` at a time across document boundaries, so many small documents still
+    fill whole embedding batches.
+
+    Chunks matching an existing chunk (exactly, or within the SimHash distance in
+    ``near`` mode) are stored as references via ``duplicate_of``: they keep their text
+    and position but are neither embedded nor indexed for search.
+
+    When a document is re-ingested, chunks claimed by its ``_ChunkReuse`` are skipped
+    entirely and ``reconcile`` deletes the stored chunks that are gone.
+    """
+
+    def __init__(
+        self,
+        service: DocumentService,
+        *,
+        batch_size: int,
+        embedder: EmbeddingService | None = None,
+        on_progress: Callable[[int], None] | None = None,
+        dedup: DedupMode | None = None,
+    ) -> None:
+        settings = get_settings()
+        self.service = service
+        self.batch_size = max(1, batch_size)
+        self.embedder = embedder
+        self.on_progress = on_progress
+        self.dedup = dedup or settings.dedup_mode
+        self.min_words = settings.dedup_min_words
+        self.chunk_ids: list[UUID] = []
+        self.promoted_ids: list[UUID] = []
+        self.removed_ids: list[UUID] = []
+        self.duplicates: Counter[UUID] = Counter()
+        self._documents: list[dict[str, Any]] = []
+        self._chunks: list[dict[str, Any]] = []
+
+    def add_document(self, document: Document) -> None:
+        self._documents.append(
+            {
+                "id": document.id,
+                "title": document.title,
+                "source": document.source,
+                "meta": document.meta,
+                "content_type": document.content_type,
+                "external_id": document.external_id,
+                "created_at": document.created_at,
+            }
+        )
+
+    async def add_chunks(
+        self,
+        document_id: UUID,
+        start_index: int,
+        chunks: Iterable[str],
+        embeddings: Sequence[Sequence[float] | None] | None = None,
+        reuse: _ChunkReuse | None = None,
+    ) -> None:
+        for offset, content in enumerate(chunks):
+            digest = None
+            if reuse is not None:
+                digest = content_hash(content)
+                if reuse.claim(digest, start_index + offset):
+                    continue
+            embedding = None
+            if embeddings is not None and offset < len(embeddings):
+                embedding = embeddings[offset]
+            self._chunks.append(
+                {
+                    "id": uuid4(),
+                    "document_id": document_id,
+                    "chunk_index": start_index + offset,
+                    "content": content,
+                    "embedding": embedding,
+                    "content_hash": digest,
+                    "simhash": None,
+                    "duplicate_of": None,
+                }
+            )
+            if len(self._chunks) >= self.batch_size:
+                await self.flush()
+
+    async def flush(self) -> None:
+        session = self.service.session
+        if self._documents:
+            await session.execute(insert(Document), self._documents)
+            self._documents = []
+        if not self._chunks:
+            return
+
+        rows, self._chunks = self._chunks, []
+        await self._deduplicate(rows)
+        fresh = [row for row in rows if row["duplicate_of"] is None]
+        contents = [row["content"] for row in fresh]
+        if self.embedder is not None and fresh:
+            # Rows stay float32 array views; the column type packs them straight to bytes.
+            vectors = await self.embedder.embed_batch(contents)
+            for row, vector in zip(fresh, vectors):
+                row["embedding"] = vector
+        await session.execute(insert(DocumentChunk), rows)
+
+        self.chunk_ids.extend(row["id"] for row in rows)
+        if self.on_progress is not None:
+            self.on_progress(len(self.chunk_ids))
+
+    async def _deduplicate(self, rows: list[dict[str, Any]]) -> None:
+        """Hash rows and point each duplicate at its canonical chunk."""
+
+        for row in rows:
+            if row["content_hash"] is None:
+                row["content_hash"] = content_hash(row["content"])
+            if self.dedup == "near":
+                row["simhash"] = simhash(row["content"], min_words=self.min_words)
+        if self.dedup == "off":
+            return
+
+        session = self.service.session
+        # Earlier batches of this ingest are flushed already, so the query sees them too.
+        stmt = select(DocumentChunk.content_hash, DocumentChunk.id).where(
+            DocumentChunk.content_hash.in_({row["content_hash"] for row in rows}),
+            DocumentChunk.duplicate_of.is_(None),
+        )
+        canonical: dict[str, UUID] = {}
+        for digest, chunk_id in (await session.execute(stmt)).all():
+            canonical.setdefault(digest, chunk_id)
+
+        near_index = None
+        if self.dedup == "near":
+            near_index = get_simhash_index(
+                session, max_distance=get_settings().dedup_max_distance
+            )
+            await near_index.ensure_loaded(session)
+
+        for row in rows:
+            match = canonical.get(row["content_hash"])
+            if match is None and near_index is not None and row["simhash"] is not None:
+                match = near_index.find(row["simhash"])
+            if match is not None:
+                row["duplicate_of"] = match
+                row["embedding"] = None
+                self.duplicates[row["document_id"]] += 1
+                continue
+            canonical[row["content_hash"]] = row["id"]
+            if near_index is not None and row["simhash"] is not None:
+                near_index.add(row["id"], row["simhash"])
+
+    async def reconcile(self, reuse: _ChunkReuse) -> None:
+        """Finish a re-ingested document: renumber kept chunks and delete stale ones."""
+
+        await self.flush()
+        session = self.service.session
+        if reuse.moves:
+            await session.execute(update(DocumentChunk), reuse.moves)
+        stale = reuse.stale_ids()
+        if not stale:
+            return
+        await self._promote_references(stale)
+        for start in range(0, len(stale), _IN_CLAUSE_SIZE):
+            batch = stale[start : start + _IN_CLAUSE_SIZE]
+            await session.execute(delete(DocumentChunk).where(DocumentChunk.id.in_(batch)))
+        # Later documents of this ingest must not be deduplicated against deleted rows.
+        get_simhash_index(session).remove(stale)
+        self.removed_ids.extend(stale)
+
+    async def _promote_references(self, deleted: Sequence[UUID]) -> None:
+        """Make one surviving duplicate of each deleted chunk canonical in its place."""
+
+        session = self.service.session
+        deleted_set = set(deleted)
+        referrers: list[Any] = []
+        for start in range(0, len(deleted), _IN_CLAUSE_SIZE):
+            stmt = (
+                select(
+                    DocumentChunk.id,
+                    DocumentChunk.duplicate_of,
+                    DocumentChunk.content,
+                    DocumentChunk.simhash,
+                )
+                .where(DocumentChunk.duplicate_of.in_(deleted[start : start + _IN_CLAUSE_SIZE]))
+                .order_by(DocumentChunk.document_id, DocumentChunk.chunk_index)
+            )
+            rows = (await session.execute(stmt)).all()
+            referrers.extend(row for row in rows if row.id not in deleted_set)
+        if not referrers:
+            return
+
+        heirs: dict[UUID, Any] = {}
+        repointed: list[dict[str, Any]] = []
+        for row in referrers:
+            heir = heirs.setdefault(row.duplicate_of, row)
+            if heir is not row:
+                repointed.append({"id": row.id, "duplicate_of": heir.id})
+        promoted = list(heirs.values())
+        contents = [row.content for row in promoted]
+        vectors: Any = [None] * len(promoted)
+        if self.embedder is not None:
+            vectors = await self.embedder.embed_batch(contents)
+        await session.execute(
+            update(DocumentChunk),
+            [
+                {"id": row.id, "duplicate_of": None, "embedding": vector}
+                for row, vector in zip(promoted, vectors)
+            ],
+        )
+        if repointed:
+            await session.execute(update(DocumentChunk), repointed)
+
+        self.promoted_ids.extend(row.id for row in promoted)
+        if self.dedup == "near":
+            near_index = get_simhash_index(session)
+            for row in promoted:
+                if row.simhash is not None:
+                    near_index.add(row.id, row.simhash)
+
+
+async def _aiter(pieces: Iterable[str] | AsyncIterable[str]) -> AsyncIterator[str]:
+    """Iterate sync or async ``pieces``; closing this closes a generator underneath too."""
+
+    try:
+        if isinstance(pieces, AsyncIterable):
+            async for piece in pieces:
+                yield piece
+        else:
+            for piece in pieces:
+                yield piece
+    finally:
+        # e.g. ``aiter_text``, which holds an extraction slot and an open file until closed.
+        if hasattr(pieces, "aclose"):
+            await pieces.aclose()
+        elif isinstance(pieces, Generator):
+            pieces.close()
 
 
 class DocumentService:
@@ -30,17 +403,21 @@ class DocumentService:
         meta: dict | None = None,
         chunk_size: int = 800,
         chunk_overlap: int = 80,
+        chunking: ChunkingOptions | None = None,
         embed: bool = True,
         embedding_service: EmbeddingService | None = None,
     ) -> Document:
-        chunks = self._chunk_text(content, chunk_size=chunk_size, overlap=chunk_overlap)
+        options = chunking or self.chunking_options(
+            chunk_size=chunk_size, chunk_overlap=chunk_overlap
+        )
+        chunks = chunk_text(content, options)
         if not chunks:
-            raise ValueError("Document must contain readable text.")
+            raise EmptyDocumentError("Document must contain readable text.")
 
-        embeddings: Sequence[Sequence[float]] | None = None
+        embeddings: np.ndarray | None = None
         if embed:
             service = embedding_service or EmbeddingService()
-            embeddings = await service.embed(chunks)
+            embeddings = await service.embed_batch(chunks)
 
         return await self.create_document(
             title=title,
@@ -57,23 +434,254 @@ class DocumentService:
         source: str | None = None,
         meta: dict | None = None,
         chunks: Sequence[str],
-        embeddings: Sequence[Sequence[float]] | None = None,
+        embeddings: Sequence[Sequence[float]] | np.ndarray | None = None,
     ) -> Document:
-        document = Document(title=title, source=source, meta=meta or {})
+        document = self._new_document(title, source, meta)
+        async with self._bulk_writer(batch_size=max(1, len(chunks))) as writer:
+            writer.add_document(document)
+            await writer.add_chunks(document.id, 0, chunks, embeddings)
+        return document
 
-        for idx, chunk_text in enumerate(chunks):
-            embedding = None
-            if embeddings is not None and idx < len(embeddings):
-                embedding = list(embeddings[idx])
+    async def ingest_stream(
+        self,
+        *,
+        title: str,
+        source: str | None,
+        pieces: Iterable[str] | AsyncIterable[str],
+        meta: dict | None = None,
+        chunk_size: int = 800,
+        chunk_overlap: int = 80,
+        chunking: ChunkingOptions | None = None,
+        embed: bool = True,
+        embedding_service: EmbeddingService | None = None,
+        batch_size: int | None = None,
+        on_progress: Callable[[int], None] | None = None,
+        external_id: str | None = None,
+        match_source: bool = False,
+    ) -> IngestResult:
+        """Chunk, embed and insert a stream of text pieces in bounded batches.
+
+        Only one batch of chunks (and its embeddings) is held at a time, so peak memory
+        does not grow with the document. Everything commits in a single transaction;
+        ``on_progress`` is called with the running chunk count after every batch.
+        See ``ingest_many`` for how ``external_id`` and ``match_source`` upsert.
+        """
+
+        document = BatchDocument(
+            title=title, source=source, meta=meta or {}, pieces=pieces, external_id=external_id
+        )
+        [result] = await self.ingest_many(
+            [document],
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            chunking=chunking,
+            embed=embed,
+            embedding_service=embedding_service,
+            batch_size=batch_size,
+            on_progress=on_progress,
+            match_source=match_source,
+        )
+        return result
+
+    async def ingest_many(
+        self,
+        documents: Iterable[BatchDocument] | AsyncIterable[BatchDocument],
+        *,
+        chunk_size: int = 800,
+        chunk_overlap: int = 80,
+        chunking: ChunkingOptions | None = None,
+        embed: bool = True,
+        embedding_service: EmbeddingService | None = None,
+        batch_size: int | None = None,
+        on_progress: Callable[[int], None] | None = None,
+        match_source: bool = False,
+    ) -> list[IngestResult]:
+        """Ingest several documents in one transaction with shared embedding/insert batches.
+
+        A document whose ``external_id`` (or, with ``match_source``, whose ``source``)
+        matches a stored document replaces it in place: chunks whose text is unchanged keep
+        their rows and embeddings, only new chunks are embedded and inserted, and chunks no
+        longer present are deleted.
 
-            document.chunks.append(
-                DocumentChunk(chunk_index=idx, content=chunk_text, embedding=embedding)
+        A document without readable text aborts the whole batch with ``EmptyDocumentError``.
+        """
+
+        options = chunking or self.chunking_options(
+            chunk_size=chunk_size, chunk_overlap=chunk_overlap
+        )
+        embedder = (embedding_service or EmbeddingService()) if embed else None
+        results: list[IngestResult] = []
+        async with self._bulk_writer(
+            batch_size=batch_size or get_settings().ingest_batch_size,
+            embedder=embedder,
+            on_progress=on_progress,
+        ) as writer:
+            async for item in _aiter(documents):
+                document, reuse = await self._upsert_target(writer, item, match_source)
+                chunker = make_chunker(options)
+                chunk_count = 0
+                async with aclosing(_aiter(item.pieces)) as stream:
+                    async for piece in stream:
+                        chunks = chunker.feed(piece)
+                        await writer.add_chunks(document.id, chunk_count, chunks, reuse=reuse)
+                        chunk_count += len(chunks)
+                chunks = chunker.finish()
+                await writer.add_chunks(document.id, chunk_count, chunks, reuse=reuse)
+                chunk_count += len(chunks)
+                if not chunk_count:
+                    raise EmptyDocumentError(f"Document '{item.title}' must contain readable text.")
+                if reuse is not None:
+                    await writer.reconcile(reuse)
+                results.append(
+                    IngestResult(
+                        document=document,
+                        chunk_count=chunk_count,
+                        reused_count=reuse.reused if reuse is not None else 0,
+                    )
+                )
+        for result in results:
+            result.duplicate_count = writer.duplicates[result.document.id]
+        return results
+
+    async def _upsert_target(
+        self, writer: _BulkWriter, item: BatchDocument, match_source: bool
+    ) -> tuple[Document, _ChunkReuse | None]:
+        """The stored document ``item`` replaces (with its chunks to reuse), or a new one."""
+
+        if item.external_id is not None:
+            stmt = select(Document).where(Document.external_id == item.external_id)
+        elif match_source and item.source is not None:
+            stmt = (
+                select(Document)
+                .where(Document.source == item.source)
+                .order_by(Document.created_at.desc())
+                .limit(1)
             )
+        else:
+            document = self._new_document(item.title, item.source, item.meta)
+            writer.add_document(document)
+            return document, None
 
-        self.session.add(document)
-        await self.session.flush()
-        await self.session.commit()
-        return document
+        # Earlier documents of this batch may carry the same key.
+        await writer.flush()
+        document = (await self.session.execute(stmt)).scalars().first()
+        if document is None:
+            document = self._new_document(item.title, item.source, item.meta)
+            document.external_id = item.external_id
+            writer.add_document(document)
+            return document, None
+
+        document.title = item.title
+        document.source = item.source if item.source is not None else document.source
+        document.meta = item.meta
+        document.updated_at = datetime.utcnow()
+        return document, await _ChunkReuse.load(self.session, document.id)
+
+    async def ingest_path(
+        self,
+        *,
+        path: str | os.PathLike[str],
+        filename: str,
+        content_type: str | None,
+        title: str | None = None,
+        source: str | None = None,
+        meta: dict | None = None,
+        chunk_size: int = 800,
+        chunk_overlap: int = 80,
+        chunking: ChunkingOptions | None = None,
+        embed: bool = True,
+        embedding_service: EmbeddingService | None = None,
+        on_progress: Callable[[int], None] | None = None,
+        external_id: str | None = None,
+        match_source: bool = False,
+    ) -> IngestResult:
+        """Stream a file spooled to disk through extraction, chunking and embedding.
+
+        Extraction runs on the shared process pool, so parsing and OCR never block the
+        event loop.
+        """
+
+        document = self.file_document(
+            path=path,
+            filename=filename,
+            content_type=content_type,
+            title=title,
+            source=source,
+            meta=meta,
+            external_id=external_id,
+        )
+        try:
+            return await self.ingest_stream(
+                title=document.title,
+                source=document.source,
+                pieces=document.pieces,
+                meta=document.meta,
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+                chunking=chunking,
+                embed=embed,
+                embedding_service=embedding_service,
+                on_progress=on_progress,
+                external_id=document.external_id,
+                match_source=match_source,
+            )
+        except EmptyDocumentError as exc:
+            raise EmptyDocumentError("Uploaded file is empty or unreadable.") from exc
+
+    @staticmethod
+    def _new_document(title: str, source: str | None, meta: dict | None) -> Document:
+        return Document(
+            id=uuid4(), title=title, source=source, meta=meta or {}, created_at=datetime.utcnow()
+        )
+
+    @asynccontextmanager
+    async def _bulk_writer(self, **options: Any) -> AsyncIterator[_BulkWriter]:
+        """Yield a ``_BulkWriter``; commit once at the end or roll everything back."""
+
+        writer = _BulkWriter(self, **options)
+        try:
+            yield writer
+            await writer.flush()
+            await self.session.commit()
+        except BaseException:
+            await self.session.rollback()
+            # Near-duplicate fingerprints are registered while writing; the search
+            # indexes only learn about chunks once they are committed.
+            get_simhash_index(self.session).remove([*writer.chunk_ids, *writer.promoted_ids])
+            raise
+        await self._index_chunks([*writer.chunk_ids, *writer.promoted_ids])
+        self._unindex_chunks(writer.removed_ids)
+        bump_corpus_version(self.session)
+
+    async def _index_chunks(self, chunk_ids: Sequence[UUID]) -> None:
+        """Add committed chunks to the in-process search indexes that are already loaded.
+
+        Runs after the commit, so the shared ``MmapVectorStore`` never holds rows of a
+        transaction that could still roll back. Rows are read back in batches (duplicates
+        are skipped), so memory stays flat however large the ingest was.
+        """
+
+        index = get_vector_index(self.session)
+        keyword_index = get_keyword_index(self.session)
+        if not chunk_ids or not (index.loaded or keyword_index.loaded):
+            return
+        for start in range(0, len(chunk_ids), _IN_CLAUSE_SIZE):
+            stmt = select(DocumentChunk.id, DocumentChunk.content, DocumentChunk.embedding).where(
+                DocumentChunk.id.in_(chunk_ids[start : start + _IN_CLAUSE_SIZE]),
+                DocumentChunk.duplicate_of.is_(None),
+            )
+            rows = (await self.session.execute(stmt)).all()
+            embedded = [row for row in rows if row.embedding is not None]
+            if index.loaded and embedded:
+                index.add([row.id for row in embedded], [row.embedding for row in embedded])
+            if keyword_index.loaded:
+                keyword_index.add([row.id for row in rows], [row.content for row in rows])
+
+    def _unindex_chunks(self, chunk_ids: Sequence[UUID]) -> None:
+        if chunk_ids:
+            get_vector_index(self.session).remove(chunk_ids)
+            get_keyword_index(self.session).remove(chunk_ids)
+            get_simhash_index(self.session).remove(chunk_ids)
 
     async def ingest_file(
         self,
@@ -86,6 +694,7 @@ class DocumentService:
         meta: dict | None = None,
         chunk_size: int = 800,
         chunk_overlap: int = 80,
+        chunking: ChunkingOptions | None = None,
         embed: bool = True,
         embedding_service: EmbeddingService | None = None,
     ) -> Document:
@@ -93,52 +702,185 @@ class DocumentService:
 
         text = self._extract_text_from_file(filename=filename, content_type=content_type, data=data)
         if not text.strip():
-            raise ValueError("Uploaded file is empty or unreadable.")
-
-        inferred_title = title or filename or "Untitled"
-        inferred_source = source or filename
-        meta = dict(meta or {})
-        meta.setdefault("filename", filename)
-        if content_type:
-            meta.setdefault("content_type", content_type)
+            raise EmptyDocumentError("Uploaded file is empty or unreadable.")
 
+        title, source, meta = self._file_metadata(filename, content_type, title, source, meta)
         return await self.ingest_text(
-            title=inferred_title,
-            source=inferred_source,
+            title=title,
+            source=source,
             content=text,
             meta=meta,
             chunk_size=chunk_size,
             chunk_overlap=chunk_overlap,
+            chunking=chunking,
             embed=embed,
             embedding_service=embedding_service,
         )
 
-    async def list_documents(self) -> list[Document]:
-        stmt = select(Document).options(selectinload(Document.chunks))
-        result = await self.session.execute(stmt)
-        return list(result.scalars())
+    def file_document(
+        self,
+        *,
+        path: str | os.PathLike[str],
+        filename: str,
+        content_type: str | None,
+        title: str | None = None,
+        source: str | None = None,
+        meta: dict | None = None,
+        external_id: str | None = None,
+    ) -> BatchDocument:
+        """Describe a spooled file for ``ingest_many``; extraction runs lazily on the pool."""
+
+        title, source, meta = self._file_metadata(filename, content_type, title, source, meta)
+        pieces = aiter_text(path=path, filename=filename, content_type=content_type)
+        return BatchDocument(
+            title=title, source=source, meta=meta, pieces=pieces, external_id=external_id
+        )
+
+    @staticmethod
+    def _summary_columns() -> tuple:
+        return (
+            Document.id,
+            Document.title,
+            Document.source,
+            Document.external_id,
+            Document.meta,
+            Document.created_at,
+            Document.updated_at,
+        )
 
     @staticmethod
-    def _chunk_text(content: str, *, chunk_size: int = 800, overlap: int = 80) -> list[str]:
-        normalized = content.replace("\r\n", "\n").strip()
-        if not normalized:
-            return []
+    def _chunk_count():
+        return (
+            select(func.count(DocumentChunk.id))
+            .where(DocumentChunk.document_id == Document.id)
+            .correlate(Document)
+            .scalar_subquery()
+            .label("chunk_count")
+        )
+
+    async def list_documents(self, *, cursor: str | None = None, limit: int = 50) -> DocumentPage:
+        """One page of documents in ``(created_at, id)`` order, starting after ``cursor``.
 
-        overlap = max(0, min(overlap, chunk_size // 2))
+        Chunks are never loaded; each row's ``chunk_count`` is a correlated count over the
+        ``document_id`` index. Raises ``ValueError`` for a malformed cursor.
+        """
+
+        stmt = (
+            select(*self._summary_columns(), self._chunk_count())
+            .order_by(Document.created_at, Document.id)
+            .limit(limit + 1)
+        )
+        if cursor is not None:
+            created_at, document_id = _decode_cursor(cursor)
+            stmt = stmt.where(
+                or_(
+                    Document.created_at > created_at,
+                    and_(Document.created_at == created_at, Document.id > document_id),
+                )
+            )
+        rows = (await self.session.execute(stmt)).all()
+        documents = [DocumentSummary(**row._mapping) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = documents[-1]
+            next_cursor = _encode_cursor(last.created_at, last.id)
+        return DocumentPage(documents=documents, next_cursor=next_cursor)
+
+    async def export_documents(
+        self, *, include_chunks: bool = False, batch_size: int = _EXPORT_BATCH_SIZE
+    ) -> AsyncIterator[tuple[DocumentSummary, list[str] | None]]:
+        """Yield every document, with its chunk texts in order when ``include_chunks``.
+
+        Rows come from a server-side cursor, ``batch_size`` at a time, so memory stays flat
+        however large the corpus is.
+        """
+
+        columns = self._summary_columns()
+        if include_chunks:
+            stmt = (
+                select(*columns, DocumentChunk.content)
+                .outerjoin(DocumentChunk, DocumentChunk.document_id == Document.id)
+                .order_by(Document.created_at, Document.id, DocumentChunk.chunk_index)
+            )
+        else:
+            stmt = select(*columns, self._chunk_count()).order_by(
+                Document.created_at, Document.id
+            )
+        stmt = stmt.execution_options(yield_per=batch_size)
+
+        current: DocumentSummary | None = None
         chunks: list[str] = []
-        start = 0
-        text_length = len(normalized)
+        result = await self.session.stream(stmt)
+        try:
+            async for row in result:
+                if not include_chunks:
+                    yield DocumentSummary(**row._mapping), None
+                    continue
+                fields = dict(row._mapping)
+                content = fields.pop("content")
+                if current is None or current.id != fields["id"]:
+                    if current is not None:
+                        current.chunk_count = len(chunks)
+                        yield current, chunks
+                    current, chunks = DocumentSummary(**fields, chunk_count=0), []
+                if content is not None:
+                    chunks.append(content)
+        finally:
+            await result.close()
+        if current is not None:
+            current.chunk_count = len(chunks)
+            yield current, chunks
 
-        while start < text_length:
-            end = min(text_length, start + chunk_size)
-            chunk = normalized[start:end].strip()
-            if chunk:
-                chunks.append(chunk)
-            if end == text_length:
-                break
-            start = max(end - overlap, start + 1)
+    @staticmethod
+    def _file_metadata(
+        filename: str,
+        content_type: str | None,
+        title: str | None,
+        source: str | None,
+        meta: dict | None,
+    ) -> tuple[str, str | None, dict]:
+        meta = dict(meta or {})
+        meta.setdefault("filename", filename)
+        if content_type:
+            meta.setdefault("content_type", content_type)
+        return title or filename or "Untitled", source or filename, meta
+
+    @staticmethod
+    def chunking_options(
+        *,
+        strategy: ChunkStrategy | None = None,
+        max_tokens: int | None = None,
+        overlap_tokens: int | None = None,
+        chunk_size: int = 800,
+        chunk_overlap: int = 80,
+    ) -> ChunkingOptions:
+        """Chunking options with unset fields taken from the configured defaults."""
 
-        return chunks
+        settings = get_settings()
+        return ChunkingOptions(
+            strategy=strategy or settings.chunk_strategy,
+            chunk_size=chunk_size,
+            overlap=chunk_overlap,
+            max_tokens=max_tokens or settings.chunk_max_tokens,
+            overlap_tokens=(
+                settings.chunk_overlap_tokens if overlap_tokens is None else overlap_tokens
+            ),
+        )
+
+    @staticmethod
+    def _chunk_text(content: str, *, chunk_size: int = 800, overlap: int = 80) -> list[str]:
+        return chunk_text(content, ChunkingOptions(chunk_size=chunk_size, overlap=overlap))
+
+    @staticmethod
+    def _iter_chunks(
+        pieces: Iterable[str], *, chunk_size: int = 800, overlap: int = 80
+    ) -> Iterator[str]:
+        """Fixed-size windows over the concatenation of ``pieces``."""
+
+        chunker = make_chunker(ChunkingOptions(chunk_size=chunk_size, overlap=overlap))
+        for piece in pieces:
+            yield from chunker.feed(piece)
+        yield from chunker.finish()
 
     @staticmethod
     def _extract_text_from_file(
@@ -148,46 +890,5 @@ class DocumentService:
 
         if not data:
             return ""
-
-        name_lower = (filename or "").lower()
-        content_type = (content_type or "").lower()
-
-        # PDF
-        if name_lower.endswith(".pdf") or "pdf" in content_type:
-            try:
-                reader = PdfReader(BytesIO(data))
-                parts: list[str] = []
-                for page in reader.pages:
-                    page_text = page.extract_text() or ""
-                    parts.append(page_text)
-                return "\n".join(parts)
-            except Exception:
-                return ""
-
-        # DOCX
-        if name_lower.endswith(".docx") or "word" in content_type:
-            try:
-                document = docx.Document(BytesIO(data))
-                return "\n".join(paragraph.text for paragraph in document.paragraphs)
-            except Exception:
-                return ""
-
-        # Images (basic OCR)
-        if any(
-            name_lower.endswith(ext)
-            for ext in (".png", ".jpg", ".jpeg", ".tiff", ".bmp")
-        ) or content_type.startswith("image/"):
-            try:
-                image = Image.open(BytesIO(data))
-                return pytesseract.image_to_string(image)
-            except Exception:
-                return ""
-
-        # Fallback: try text decode
-        for encoding in ("utf-8", "latin-1"):
-            try:
-                return data.decode(encoding)
-            except UnicodeDecodeError:
-                continue
-
-        return data.decode("utf-8", errors="ignore")
+        pieces = iter_text(filename=filename, content_type=content_type, source=BytesIO(data))
+        return "".join(pieces)
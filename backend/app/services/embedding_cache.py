@@ -0,0 +1,195 @@
+"""Content-addressed embedding cache with an in-memory LRU tier and a SQLite disk tier."""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Sequence
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+from backend.app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+CacheKey = tuple[str, bytes]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    model TEXT NOT NULL,
+    digest BLOB NOT NULL,
+    vector BLOB NOT NULL,
+    accessed_at REAL NOT NULL,
+    PRIMARY KEY (model, digest)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_embeddings_accessed_at ON embeddings (accessed_at);
+"""
+
+
+def text_digest(text: str) -> bytes:
+    """Stable (process-independent) digest used as the cache's content address."""
+
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+class EmbeddingCache:
+    """Caches float32 embeddings keyed by ``(model, sha256(text))``.
+
+    Lookups hit the in-memory LRU first, then the optional on-disk SQLite tier (which
+    also survives restarts and is shared by every worker pointing at the same file).
+    Both tiers evict least-recently-used entries once they exceed their size bound.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = 4096,
+        path: str | None = None,
+        max_disk_entries: int = 200_000,
+    ) -> None:
+        self.max_entries = max(0, max_entries)
+        self.max_disk_entries = max(1, max_disk_entries)
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._memory: OrderedDict[CacheKey, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+        self._disk_count = 0
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.executescript(_SCHEMA)
+            self._disk_count = self._count_disk()
+
+    @property
+    def persistent(self) -> bool:
+        return self._db is not None
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "memory_entries": len(self._memory),
+        }
+
+    def get_many(self, model: str, digests: Sequence[bytes]) -> list[np.ndarray | None]:
+        """Return cached vectors aligned with ``digests`` (``None`` for misses)."""
+
+        found: list[np.ndarray | None] = [None] * len(digests)
+        pending: dict[bytes, list[int]] = {}
+        with self._lock:
+            for position, digest in enumerate(digests):
+                vector = self._memory.get((model, digest))
+                if vector is not None:
+                    self._memory.move_to_end((model, digest))
+                    found[position] = vector
+                    self.hits += 1
+                else:
+                    pending.setdefault(digest, []).append(position)
+
+            if pending and self._db is not None:
+                for digest, vector in self._read_disk(model, list(pending)):
+                    self._remember((model, digest), vector)
+                    for position in pending.pop(digest):
+                        found[position] = vector
+                        self.disk_hits += 1
+
+            self.misses += sum(len(positions) for positions in pending.values())
+        return found
+
+    def put_many(self, model: str, digests: Sequence[bytes], vectors: np.ndarray) -> None:
+        with self._lock:
+            for digest, vector in zip(digests, vectors):
+                self._remember((model, digest), vector)
+            if self._db is not None and len(digests):
+                now = time.time()
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO embeddings (model, digest, vector, accessed_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    [
+                        (model, digest, np.asarray(vector, dtype=np.float32).tobytes(), now)
+                        for digest, vector in zip(digests, vectors)
+                    ],
+                )
+                self._disk_count += len(digests)
+                self._evict_disk()
+
+    def _remember(self, key: CacheKey, vector: np.ndarray) -> None:
+        if not self.max_entries:
+            return
+        stored = np.array(vector, dtype=np.float32)
+        stored.setflags(write=False)
+        self._memory[key] = stored
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _read_disk(self, model: str, digests: list[bytes]) -> list[tuple[bytes, np.ndarray]]:
+        assert self._db is not None
+        rows: list[tuple[bytes, bytes]] = []
+        # Stay well below SQLite's bound-parameter limit.
+        for start in range(0, len(digests), 500):
+            batch = digests[start : start + 500]
+            placeholders = ",".join("?" * len(batch))
+            rows.extend(
+                self._db.execute(
+                    f"SELECT digest, vector FROM embeddings "
+                    f"WHERE model = ? AND digest IN ({placeholders})",
+                    (model, *batch),
+                )
+            )
+        if rows:
+            now = time.time()
+            self._db.executemany(
+                "UPDATE embeddings SET accessed_at = ? WHERE model = ? AND digest = ?",
+                [(now, model, digest) for digest, _ in rows],
+            )
+        return [(digest, np.frombuffer(blob, dtype=np.float32)) for digest, blob in rows]
+
+    def _count_disk(self) -> int:
+        assert self._db is not None
+        (count,) = self._db.execute("SELECT count(*) FROM embeddings").fetchone()
+        return int(count)
+
+    def _evict_disk(self) -> None:
+        # The running count over-estimates on REPLACE; recount before deleting anything.
+        if self._disk_count <= self.max_disk_entries:
+            return
+        assert self._db is not None
+        self._disk_count = self._count_disk()
+        if self._disk_count <= self.max_disk_entries:
+            return
+        # Trim an extra 10% so eviction is amortised over many inserts.
+        excess = self._disk_count - self.max_disk_entries + self.max_disk_entries // 10
+        self._db.execute(
+            "DELETE FROM embeddings WHERE (model, digest) IN ("
+            "SELECT model, digest FROM embeddings ORDER BY accessed_at LIMIT ?)",
+            (excess,),
+        )
+        self._disk_count -= excess
+        logger.info("Evicted %s embeddings from the disk cache", excess)
+
+
+@lru_cache
+def get_embedding_cache() -> EmbeddingCache | None:
+    """Return the process-wide embedding cache, or ``None`` when caching is disabled."""
+
+    settings = get_settings()
+    if settings.embedding_cache_size <= 0 and not settings.embedding_cache_path:
+        return None
+    return EmbeddingCache(
+        max_entries=settings.embedding_cache_size,
+        path=settings.embedding_cache_path,
+        max_disk_entries=settings.embedding_cache_disk_size,
+    )
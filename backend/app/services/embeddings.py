@@ -1,25 +1,167 @@
 from __future__ import annotations
 
-from typing import Iterable
+import asyncio
+import hashlib
+from collections.abc import Iterable, Sequence
+from functools import lru_cache
+from typing import Protocol
 
 import numpy as np
 
+from backend.app.core.config import get_settings
+from backend.app.services.embedding_cache import EmbeddingCache, get_embedding_cache, text_digest
+
 Vector = list[float]
 
+LOCAL_MODEL_PREFIX = "local:"
+
+
+class EmbeddingBackend(Protocol):
+    """Produces a ``(len(texts), dim)`` float32 matrix for a batch of texts."""
+
+    name: str
+    dim: int
+    # Whether batches should run in a worker thread to keep the event loop free.
+    offload: bool
+
+    def embed_batch(self, texts: Sequence[str]) -> np.ndarray:
+        ...
+
+
+class HashEmbeddingBackend:
+    """Deterministic pseudo-random unit vectors seeded from a stable text digest."""
+
+    name = "stub"
+    offload = False
+
+    def __init__(self, dim: int = 1536) -> None:
+        self.dim = dim
+
+    def embed_batch(self, texts: Sequence[str]) -> np.ndarray:
+        out = np.empty((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            digest = hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest()
+            rng = np.random.default_rng(int.from_bytes(digest, "little"))
+            rng.standard_normal(dtype=np.float32, out=out[row])
+        out /= np.linalg.norm(out, axis=1, keepdims=True)
+        return out
+
+
+class SentenceTransformerBackend:
+    """Local CPU model loaded through ``sentence-transformers`` (torch or ONNX runtime)."""
+
+    offload = True
+
+    def __init__(self, model_name: str, *, device: str = "cpu", runtime: str = "torch") -> None:
+        try:
+            from sentence_transformers import SentenceTransformer  # type: ignore
+        except ImportError as exc:  # pragma: no cover - optional dependency
+            raise RuntimeError(
+                "Local embedding models require the 'sentence-transformers' package."
+            ) from exc
+
+        self.name = model_name
+        self._model = SentenceTransformer(model_name, device=device, backend=runtime)
+        self.dim = int(self._model.get_sentence_embedding_dimension())
+
+    def embed_batch(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = self._model.encode(
+            list(texts),
+            batch_size=max(1, len(texts)),
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+        )
+        return np.ascontiguousarray(vectors, dtype=np.float32)
+
+
+@lru_cache
+def get_embedding_backend(model: str) -> EmbeddingBackend:
+    """Return a cached backend for ``model`` so local weights load once per process."""
+
+    if model == "stub":
+        return HashEmbeddingBackend()
+    if model.startswith(LOCAL_MODEL_PREFIX):
+        settings = get_settings()
+        return SentenceTransformerBackend(
+            model.removeprefix(LOCAL_MODEL_PREFIX),
+            device=settings.embedding_device,
+            runtime=settings.embedding_runtime,
+        )
+    raise NotImplementedError(f"Unsupported embedding model: {model}")
+
 
 class EmbeddingService:
-    """Simple wrapper for embedding generation (stubbed for now)."""
+    """Batches texts through a pluggable embedding backend, behind the embedding cache."""
+
+    def __init__(
+        self,
+        model: str | None = None,
+        *,
+        backend: EmbeddingBackend | None = None,
+        batch_size: int | None = None,
+        cache: EmbeddingCache | None = None,
+    ) -> None:
+        settings = get_settings()
+        self.model = model or (backend.name if backend else settings.embedding_model)
+        self.batch_size = max(1, batch_size or settings.embedding_batch_size)
+        self._backend = backend
+        self.cache = cache or get_embedding_cache()
 
-    def __init__(self, model: str = "stub") -> None:
-        self.model = model
+    @property
+    def backend(self) -> EmbeddingBackend:
+        if self._backend is None:
+            self._backend = get_embedding_backend(self.model)
+        return self._backend
 
     async def embed(self, texts: Iterable[str]) -> list[Vector]:
-        if self.model == "stub":
-            return [self._hash_embed(text) for text in texts]
-        raise NotImplementedError("Only stub embeddings implemented")
-
-    def _hash_embed(self, text: str, dim: int = 1536) -> Vector:
-        rng = np.random.default_rng(abs(hash(text)) % (2**32))
-        vector = rng.standard_normal(dim)
-        norm = np.linalg.norm(vector)
-        return (vector / norm).astype(float).tolist()
+        return (await self.embed_batch(list(texts))).tolist()
+
+    async def embed_batch(self, texts: Sequence[str]) -> np.ndarray:
+        """Embed ``texts`` into one contiguous float32 matrix.
+
+        Cached vectors are copied straight in; only distinct uncached texts reach the
+        backend, in micro-batches of ``batch_size``.
+        """
+
+        backend = self.backend
+        out = np.empty((len(texts), backend.dim), dtype=np.float32)
+        if self.cache is None:
+            await self._embed_into(out, texts, list(range(len(texts))))
+            return out
+
+        digests = [text_digest(text) for text in texts]
+        if self.cache.persistent:
+            cached = await asyncio.to_thread(self.cache.get_many, self.model, digests)
+        else:
+            cached = self.cache.get_many(self.model, digests)
+
+        missing: dict[bytes, list[int]] = {}
+        for position, vector in enumerate(cached):
+            if vector is not None and vector.shape == (backend.dim,):
+                out[position] = vector
+            else:
+                missing.setdefault(digests[position], []).append(position)
+        if not missing:
+            return out
+
+        first_rows = [positions[0] for positions in missing.values()]
+        await self._embed_into(out, [texts[row] for row in first_rows], first_rows)
+        for positions in missing.values():
+            out[positions[1:]] = out[positions[0]]
+
+        new_digests = list(missing)
+        if self.cache.persistent:
+            await asyncio.to_thread(self.cache.put_many, self.model, new_digests, out[first_rows])
+        else:
+            self.cache.put_many(self.model, new_digests, out[first_rows])
+        return out
+
+    async def _embed_into(self, out: np.ndarray, texts: Sequence[str], rows: list[int]) -> None:
+        backend = self.backend
+        for start in range(0, len(texts), self.batch_size):
+            batch = texts[start : start + self.batch_size]
+            if backend.offload:
+                vectors = await asyncio.to_thread(backend.embed_batch, batch)
+            else:
+                vectors = backend.embed_batch(batch)
+            out[rows[start : start + len(batch)]] = vectors
@@ -0,0 +1,379 @@
+"""Text extraction for uploaded files, offloaded to a process pool.
+
+PDF parsing, DOCX parsing and OCR are CPU-bound and would stall the event loop, so the
+async entry point (``aiter_text``) fans them out as small jobs to a shared
+``ProcessPoolExecutor``: PDFs in page ranges, multi-frame images one frame group per
+worker. Results are yielded in document order with a bounded number of jobs in flight.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import codecs
+import logging
+import multiprocessing
+import os
+from collections import deque
+from collections.abc import AsyncIterator, Callable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager, contextmanager
+from functools import lru_cache
+from io import BytesIO
+from typing import Any, BinaryIO, Literal, TypeVar
+
+import docx  # type: ignore[import-untyped]
+import pytesseract
+from PIL import Image
+from PyPDF2 import PdfReader
+
+from backend.app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+FileSource = str | os.PathLike[str] | BinaryIO
+FileKind = Literal["pdf", "docx", "image", "text"]
+
+_READ_BLOCK_SIZE = 1 << 16
+_IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".tiff", ".tif", ".bmp")
+
+
+class ExtractionQueueFull(RuntimeError):
+    """Raised when more documents are waiting for extraction than the pool admits."""
+
+
+class ExtractionError(RuntimeError):
+    """Extraction failed after part of the document was already yielded.
+
+    Storing what came through would silently drop the rest of the document, so the
+    ingest has to fail instead.
+    """
+
+
+def detect_kind(filename: str, content_type: str | None) -> FileKind:
+    name_lower = (filename or "").lower()
+    content_type = (content_type or "").lower()
+    if name_lower.endswith(".pdf") or "pdf" in content_type:
+        return "pdf"
+    if name_lower.endswith(".docx") or "word" in content_type:
+        return "docx"
+    if name_lower.endswith(_IMAGE_EXTENSIONS) or content_type.startswith("image/"):
+        return "image"
+    return "text"
+
+
+# --- Worker-side jobs (module level so they pickle) -------------------------------
+
+
+def _ocr_page_images(page: Any) -> str:
+    """OCR the embedded images of a PDF page that has no text layer (scanned pages)."""
+
+    parts: list[str] = []
+    for image_file in page.images:
+        try:
+            parts.append(pytesseract.image_to_string(Image.open(BytesIO(image_file.data))))
+        except Exception:
+            continue
+    return "\n".join(part for part in parts if part.strip())
+
+
+def extract_pdf_pages(source: FileSource, start: int, stop: int) -> list[str]:
+    """Text of pages ``[start, stop)``; unreadable pages come back empty."""
+
+    reader = PdfReader(source)
+    pages: list[str] = []
+    for page_number in range(start, min(stop, len(reader.pages))):
+        try:
+            page = reader.pages[page_number]
+            page_text = page.extract_text() or ""
+            if not page_text.strip():
+                page_text = _ocr_page_images(page)
+        except Exception:
+            logger.warning("Skipping unreadable PDF page %s", page_number)
+            page_text = ""
+        pages.append(page_text)
+    return pages
+
+
+def extract_docx_paragraphs(source: FileSource) -> list[str]:
+    return [paragraph.text for paragraph in docx.Document(source).paragraphs]
+
+
+def ocr_image_frames(source: FileSource, frames: list[int]) -> list[str]:
+    image = Image.open(source)
+    texts: list[str] = []
+    for frame in frames:
+        image.seek(frame)
+        texts.append(pytesseract.image_to_string(image))
+    return texts
+
+
+def count_pdf_pages(source: FileSource) -> int:
+    return len(PdfReader(source).pages)
+
+
+def count_image_frames(source: FileSource) -> int:
+    return int(getattr(Image.open(source), "n_frames", 1))
+
+
+# --- Synchronous extraction (in-process) -------------------------------------------
+
+
+@contextmanager
+def _open_binary(source: FileSource) -> Iterator[BinaryIO]:
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as handle:
+            yield handle
+    else:
+        yield source
+
+
+def iter_decoded_text(source: FileSource) -> Iterator[str]:
+    """Decode as UTF-8 if the whole file is valid UTF-8, else latin-1, block by block."""
+
+    with _open_binary(source) as stream:
+        encoding = "utf-8"
+        decoder = codecs.getincrementaldecoder(encoding)()
+        try:
+            while block := stream.read(_READ_BLOCK_SIZE):
+                decoder.decode(block)
+            decoder.decode(b"", final=True)
+        except UnicodeDecodeError:
+            encoding = "latin-1"
+
+        stream.seek(0)
+        decoder = codecs.getincrementaldecoder(encoding)()
+        while block := stream.read(_READ_BLOCK_SIZE):
+            if text := decoder.decode(block):
+                yield text
+        if tail := decoder.decode(b"", final=True):
+            yield tail
+
+
+def _joined(parts: list[str], first: bool) -> Iterator[str]:
+    for index, part in enumerate(parts):
+        yield part if first and index == 0 else "\n" + part
+
+
+def iter_text(*, filename: str, content_type: str | None, source: FileSource) -> Iterator[str]:
+    """Yield extracted text piece by piece in the current process.
+
+    The pieces concatenate to the full document text; unreadable input yields nothing.
+    """
+
+    kind = detect_kind(filename, content_type)
+    try:
+        if kind == "pdf":
+            yield from _joined(extract_pdf_pages(source, 0, count_pdf_pages(source)), True)
+        elif kind == "docx":
+            yield from _joined(extract_docx_paragraphs(source), True)
+        elif kind == "image":
+            frames = list(range(count_image_frames(source)))
+            yield from _joined(ocr_image_frames(source, frames), True)
+        else:
+            yield from iter_decoded_text(source)
+    except Exception:
+        logger.warning("Could not extract text from %s", filename)
+
+
+# --- Async, pool-backed extraction --------------------------------------------------
+
+
+class ExtractionPool:
+    """Process pool with admission control and per-job timeouts.
+
+    ``max_pending`` caps how many documents may be extracting at once; beyond that,
+    ``reserve()`` raises ``ExtractionQueueFull`` instead of queueing unboundedly.
+    Only as many jobs as there are workers are handed to the executor at a time; the
+    rest wait in ``run``, so the timeout counts from when a worker picks a job up and
+    queueing behind other documents never times a job out. A job that overruns has
+    its worker processes terminated and the executor replaced, so a hung parser cannot
+    hold a worker slot. Jobs that were running next to it on the old executor are
+    retried once on the new one. With ``workers=0`` jobs run in a
+    thread instead (handy for development); a timed-out thread cannot be stopped.
+    """
+
+    def __init__(self, *, workers: int, timeout: float, max_pending: int) -> None:
+        self.workers = max(0, workers)
+        self.timeout = timeout
+        self.max_pending = max(1, max_pending)
+        self._active = 0
+        self._executor: ProcessPoolExecutor | None = None
+        self._slots: asyncio.Semaphore | None = None
+        self._slots_loop: asyncio.AbstractEventLoop | None = None
+
+    @property
+    def parallelism(self) -> int:
+        return max(1, self.workers)
+
+    @asynccontextmanager
+    async def reserve(self) -> AsyncIterator[None]:
+        if self._active >= self.max_pending:
+            raise ExtractionQueueFull("Too many documents are being extracted; retry later.")
+        self._active += 1
+        try:
+            yield
+        finally:
+            self._active -= 1
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        """Run ``fn(*args)`` off the event loop, failing with ``TimeoutError`` when slow."""
+
+        if not self.workers:
+            return await asyncio.wait_for(asyncio.to_thread(fn, *args), self.timeout)
+        async with self._worker_slot(asyncio.get_running_loop()):
+            executor = self._current_executor()
+            try:
+                return await self._submit(executor, fn, *args)
+            except BrokenProcessPool:
+                if executor is self._executor:
+                    self._recycle(executor)
+                    raise
+            # Its workers were killed because another job on them timed out: retry once.
+            return await self._submit(self._current_executor(), fn, *args)
+
+    async def _submit(self, executor: ProcessPoolExecutor, fn: Callable[..., T], *args: Any) -> T:
+        loop = asyncio.get_running_loop()
+        try:
+            return await asyncio.wait_for(loop.run_in_executor(executor, fn, *args), self.timeout)
+        except TimeoutError:
+            self._recycle(executor)
+            raise
+
+    def _worker_slot(self, loop: asyncio.AbstractEventLoop) -> asyncio.Semaphore:
+        # The pool is process-wide; a semaphore is bound to the loop it first waits on.
+        if self._slots is None or self._slots_loop is not loop:
+            self._slots = asyncio.Semaphore(self.workers)
+            self._slots_loop = loop
+        return self._slots
+
+    def _current_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def _recycle(self, executor: ProcessPoolExecutor) -> None:
+        """Terminate ``executor``'s workers and stop handing it new jobs."""
+
+        if executor is self._executor:
+            self._executor = None
+        # ProcessPoolExecutor has no public way to stop a running job before Python 3.14.
+        for process in list((executor._processes or {}).values()):
+            process.terminate()
+        # Its other running jobs are not cancelled: they fail with ``BrokenProcessPool``
+        # and retry.
+        executor.shutdown(wait=False)
+        logger.warning("Restarted the extraction worker processes")
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+@lru_cache
+def get_extraction_pool() -> ExtractionPool:
+    settings = get_settings()
+    return ExtractionPool(
+        workers=settings.extraction_workers,
+        timeout=settings.extraction_timeout,
+        max_pending=settings.extraction_max_pending,
+    )
+
+
+def shutdown_extraction_pool() -> None:
+    if get_extraction_pool.cache_info().currsize:
+        get_extraction_pool().shutdown()
+        get_extraction_pool.cache_clear()
+
+
+async def _in_order(
+    pool: ExtractionPool, jobs: Iterator[tuple[Callable[..., list[str]], tuple[Any, ...]]]
+) -> AsyncIterator[list[str]]:
+    """Run jobs on the pool with a bounded look-ahead, yielding results in job order."""
+
+    window = 2 * pool.parallelism
+    pending: deque[asyncio.Future[list[str]]] = deque()
+    try:
+        for fn, args in jobs:
+            pending.append(asyncio.ensure_future(pool.run(fn, *args)))
+            if len(pending) >= window:
+                yield await pending.popleft()
+        while pending:
+            yield await pending.popleft()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+async def aiter_text(
+    *,
+    path: str | os.PathLike[str],
+    filename: str,
+    content_type: str | None,
+    pool: ExtractionPool | None = None,
+) -> AsyncIterator[str]:
+    """Async counterpart of ``iter_text`` for a file on disk, backed by the process pool.
+
+    A file that cannot be read at all yields nothing, like ``iter_text``. A failure after
+    the first piece (or a crashed worker at any point) raises ``ExtractionError``.
+    """
+
+    pool = pool or get_extraction_pool()
+    path = os.fspath(path)
+    kind = detect_kind(filename, content_type)
+
+    async with pool.reserve():
+        if kind == "text":
+            blocks = iter_decoded_text(path)
+            while (block := await asyncio.to_thread(next, blocks, None)) is not None:
+                yield block
+            return
+
+        jobs: list[tuple[Callable[..., list[str]], tuple[Any, ...]]]
+        try:
+            if kind == "pdf":
+                page_count = await pool.run(count_pdf_pages, path)
+                step = max(1, get_settings().extraction_pdf_pages_per_job)
+            elif kind == "docx":
+                page_count, step = 1, 1
+            else:
+                page_count = await pool.run(count_image_frames, path)
+                step = -(-page_count // pool.parallelism)
+        except (TimeoutError, ExtractionQueueFull):
+            raise
+        except BrokenProcessPool as exc:
+            raise ExtractionError(f"Extraction of {filename} failed: a worker crashed.") from exc
+        except Exception:
+            logger.warning("Could not read %s", filename)
+            return
+
+        if kind == "pdf":
+            jobs = [
+                (extract_pdf_pages, (path, start, start + step))
+                for start in range(0, page_count, step)
+            ]
+        elif kind == "docx":
+            jobs = [(extract_docx_paragraphs, (path,))]
+        else:
+            jobs = [
+                (ocr_image_frames, (path, list(range(start, min(start + step, page_count)))))
+                for start in range(0, page_count, step)
+            ]
+
+        first = True
+        try:
+            async for parts in _in_order(pool, iter(jobs)):
+                for piece in _joined(parts, first):
+                    yield piece
+                first = first and not parts
+        except (TimeoutError, ExtractionQueueFull):
+            raise
+        except Exception as exc:
+            if first and not isinstance(exc, BrokenProcessPool):
+                logger.warning("Could not read %s", filename)
+                return
+            raise ExtractionError(f"Extraction of {filename} failed part-way through.") from exc
@@ -0,0 +1,280 @@
+"""Background document ingestion.
+
+Uploads handed to ``IngestionQueue.submit`` are persisted as ``IngestionJob`` rows and
+drained by a fixed number of asyncio workers in this process, so no external broker is
+needed.
+
+Several processes may share the database. Each queue owns the jobs it submitted or
+took over and renews a lease on them (``heartbeat_at``) every third of
+``INGEST_JOB_LEASE`` seconds. A worker claims a job with one conditional ``UPDATE``, so
+two processes never run the same job. Queued or running jobs whose lease has expired
+(their process died) are taken over when a queue starts and on every renewal, as long
+as their spooled upload still exists on this host.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import socket
+from dataclasses import asdict
+from datetime import datetime, timedelta
+from pathlib import Path
+from uuid import UUID, uuid4
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from backend.app.core.config import get_settings
+from backend.app.models.db.jobs import (
+    JOB_FAILED,
+    JOB_QUEUED,
+    JOB_RUNNING,
+    JOB_SUCCEEDED,
+    IngestionJob,
+)
+from backend.app.services.chunking import ChunkingOptions
+from backend.app.services.documents import DocumentService
+from backend.app.services.extraction import ExtractionError, ExtractionQueueFull
+
+logger = logging.getLogger(__name__)
+
+
+def _describe_failure(exc: Exception) -> str:
+    if isinstance(exc, ValueError):
+        return str(exc)
+    if isinstance(exc, TimeoutError):
+        return "Text extraction timed out."
+    if isinstance(exc, (ExtractionQueueFull, ExtractionError)):
+        return str(exc)
+    return "Ingestion failed unexpectedly."
+
+
+class IngestionQueue:
+    """In-process worker pool that ingests persisted upload jobs with bounded concurrency."""
+
+    def __init__(self, engine: AsyncEngine, *, workers: int, lease: float = 60.0) -> None:
+        self.workers = max(1, workers)
+        self.lease = lease
+        self.owner = f"{socket.gethostname()[:40]}:{os.getpid()}:{uuid4().hex[:8]}"
+        self._sessionmaker = async_sessionmaker(bind=engine, expire_on_commit=False)
+        self._queue: asyncio.Queue[UUID] = asyncio.Queue()
+        self._tasks: list[asyncio.Task[None]] = []
+        self._progress: dict[UUID, int] = {}
+        self._start_lock = asyncio.Lock()
+
+    def progress(self, job_id: UUID) -> int | None:
+        """Chunks stored so far for a running job (not yet committed), if known."""
+
+        return self._progress.get(job_id)
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        async with self._start_lock:
+            if self._tasks:
+                return
+            await self._recover()
+            self._tasks = [
+                asyncio.create_task(self._work(), name=f"ingestion-worker-{number}")
+                for number in range(self.workers)
+            ]
+            self._tasks.append(asyncio.create_task(self._heartbeat(), name="ingestion-lease"))
+
+    async def submit(
+        self,
+        session: AsyncSession,
+        *,
+        spool_path: str | os.PathLike[str],
+        filename: str,
+        content_type: str | None,
+        title: str | None = None,
+        source: str | None = None,
+        chunking: ChunkingOptions | None = None,
+        external_id: str | None = None,
+        match_source: bool = False,
+    ) -> IngestionJob:
+        """Persist a job for an upload spooled to disk; the queue takes ownership of the file."""
+
+        await self.start()
+        job = IngestionJob(
+            status=JOB_QUEUED,
+            owner=self.owner,
+            heartbeat_at=datetime.utcnow(),
+            filename=filename,
+            content_type=content_type,
+            title=title,
+            source=source,
+            external_id=external_id,
+            match_source=match_source,
+            spool_path=os.fspath(spool_path),
+            chunking=asdict(chunking) if chunking is not None else None,
+        )
+        session.add(job)
+        await session.commit()
+        self._queue.put_nowait(job.id)
+        return job
+
+    async def join(self) -> None:
+        """Wait until every submitted job has finished."""
+
+        await self._queue.join()
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _recover(self) -> None:
+        """Take over unfinished jobs whose owner stopped renewing its lease."""
+
+        now = datetime.utcnow()
+        expired = or_(
+            IngestionJob.heartbeat_at.is_(None),
+            IngestionJob.heartbeat_at < now - timedelta(seconds=self.lease),
+        )
+        unfinished = IngestionJob.status.in_((JOB_QUEUED, JOB_RUNNING))
+        async with self._sessionmaker() as session:
+            stmt = (
+                select(IngestionJob.id, IngestionJob.spool_path)
+                .where(unfinished, expired)
+                .order_by(IngestionJob.created_at)
+            )
+            candidates = (await session.execute(stmt)).all()
+            recovered: list[UUID] = []
+            for job_id, spool_path in candidates:
+                found = Path(spool_path).exists()
+                values = (
+                    {"status": JOB_QUEUED, "owner": self.owner, "heartbeat_at": now}
+                    if found
+                    else {
+                        "status": JOB_FAILED,
+                        "error": "Upload was lost before ingestion finished.",
+                        "finished_at": now,
+                    }
+                )
+                claim = (
+                    update(IngestionJob)
+                    .where(IngestionJob.id == job_id, unfinished, expired)
+                    .values(**values)
+                )
+                # Another process may have renewed or taken over the job meanwhile.
+                if (await session.execute(claim)).rowcount == 1 and found:
+                    recovered.append(job_id)
+            await session.commit()
+        # Only after the commit, so workers see the jobs as queued and owned by us.
+        for job_id in recovered:
+            self._queue.put_nowait(job_id)
+        if recovered:
+            logger.info("Recovered %s unfinished ingestion jobs", len(recovered))
+
+    async def _heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(self.lease / 3)
+            try:
+                async with self._sessionmaker() as session:
+                    await session.execute(
+                        update(IngestionJob)
+                        .where(
+                            IngestionJob.owner == self.owner,
+                            IngestionJob.status.in_((JOB_QUEUED, JOB_RUNNING)),
+                        )
+                        .values(heartbeat_at=datetime.utcnow())
+                    )
+                    await session.commit()
+                await self._recover()
+            except Exception:
+                logger.exception("Renewing ingestion job leases failed")
+
+    async def _work(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except Exception:
+                logger.exception("Ingestion job %s could not be processed", job_id)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: UUID) -> None:
+        async with self._sessionmaker() as session:
+            now = datetime.utcnow()
+            claim = (
+                update(IngestionJob)
+                .where(
+                    IngestionJob.id == job_id,
+                    IngestionJob.status == JOB_QUEUED,
+                    IngestionJob.owner == self.owner,
+                )
+                .values(status=JOB_RUNNING, started_at=now, heartbeat_at=now)
+            )
+            claimed = (await session.execute(claim)).rowcount == 1
+            await session.commit()
+            job = await session.get(IngestionJob, job_id) if claimed else None
+            if job is None:
+                return
+
+            spool_path = job.spool_path
+            self._progress[job_id] = 0
+
+            def record_progress(chunk_count: int) -> None:
+                self._progress[job_id] = chunk_count
+
+            try:
+                result = await DocumentService(session).ingest_path(
+                    path=spool_path,
+                    filename=job.filename,
+                    content_type=job.content_type,
+                    title=job.title,
+                    source=job.source,
+                    chunking=ChunkingOptions(**job.chunking) if job.chunking else None,
+                    on_progress=record_progress,
+                    external_id=job.external_id,
+                    match_source=bool(job.match_source),
+                )
+            except Exception as exc:
+                if not isinstance(exc, (ValueError, TimeoutError, ExtractionQueueFull)):
+                    logger.exception("Ingestion job %s failed", job_id)
+                await session.refresh(job)
+                job.status = JOB_FAILED
+                job.error = _describe_failure(exc)
+            else:
+                job.status = JOB_SUCCEEDED
+                job.document_id = result.document.id
+                job.chunk_count = result.chunk_count
+            finally:
+                self._progress.pop(job_id, None)
+
+            job.finished_at = datetime.utcnow()
+            await session.commit()
+            Path(spool_path).unlink(missing_ok=True)
+
+
+_queues: dict[AsyncEngine, IngestionQueue] = {}
+
+
+def get_ingestion_queue(bind: AsyncSession | AsyncEngine) -> IngestionQueue:
+    """Return the ingestion queue serving the database engine (or a session's engine)."""
+
+    engine = bind.bind if isinstance(bind, AsyncSession) else bind
+    if not isinstance(engine, AsyncEngine):
+        raise RuntimeError("Background ingestion requires a session bound to an AsyncEngine.")
+    queue = _queues.get(engine)
+    if queue is None:
+        settings = get_settings()
+        queue = IngestionQueue(
+            engine, workers=settings.ingest_workers, lease=settings.ingest_job_lease
+        )
+        _queues[engine] = queue
+    return queue
+
+
+async def shutdown_ingestion_queues() -> None:
+    """Stop all workers; unfinished jobs are resumed by the next process."""
+
+    queues = list(_queues.values())
+    _queues.clear()
+    for queue in queues:
+        await queue.close()
@@ -0,0 +1,227 @@
+"""BM25 keyword retrieval backed by SQLite FTS5, Postgres tsvector or an in-process index."""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import logging
+import math
+import re
+from collections import Counter
+from collections.abc import Collection, Iterable, Sequence
+from typing import Any
+from uuid import UUID
+from weakref import WeakKeyDictionary
+
+from sqlalchemy import column, func, select, table, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.db.fulltext import POSTGRES_TSV_CONFIG, SQLITE_FTS_ROWIDS_TABLE, SQLITE_FTS_TABLE
+from backend.app.models.db.documents import DocumentChunk
+from backend.app.services.search_filters import SearchFilters, allowed_chunk_ids
+
+logger = logging.getLogger(__name__)
+
+KeywordHit = tuple[UUID, float]
+
+_TOKEN_RE = re.compile(r"\w+")
+_LOAD_BATCH_SIZE = 1000
+
+
+def tokenize(text_value: str) -> list[str]:
+    return _TOKEN_RE.findall(text_value.lower())
+
+
+def query_tokens(query: str) -> list[str]:
+    """Distinct query terms; words shorter than three characters only count on their own."""
+
+    tokens = list(dict.fromkeys(tokenize(query)))
+    significant = [token for token in tokens if len(token) >= 3]
+    return significant or tokens
+
+
+class InMemoryKeywordIndex:
+    """Inverted index with Okapi BM25 scoring for backends without native full-text search.
+
+    Only the postings of the query terms are visited and the top-k is selected with a
+    heap, so query cost scales with matching postings rather than corpus size.
+    """
+
+    def __init__(self, *, k1: float = 1.2, b: float = 0.75) -> None:
+        self.k1 = k1
+        self.b = b
+        self.loaded = False
+        self._postings: dict[str, dict[UUID, int]] = {}
+        self._lengths: dict[UUID, int] = {}
+        self._terms: dict[UUID, tuple[str, ...]] = {}
+        self._total_length = 0
+        self._load_lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    async def ensure_loaded(self, session: AsyncSession) -> None:
+        if self.loaded:
+            return
+        async with self._load_lock:
+            if self.loaded:
+                return
+            stmt = select(DocumentChunk.id, DocumentChunk.content).where(
+                DocumentChunk.duplicate_of.is_(None)
+            )
+            result = await session.stream(stmt)
+            async for rows in result.partitions(_LOAD_BATCH_SIZE):
+                self.add([row.id for row in rows], [row.content for row in rows])
+            self.loaded = True
+            logger.info("Keyword index loaded with %s chunks", len(self))
+
+    def add(self, ids: Sequence[UUID], texts: Sequence[str]) -> None:
+        for chunk_id, content in zip(ids, texts):
+            if chunk_id in self._lengths:
+                continue
+            counts = Counter(tokenize(content))
+            for term, frequency in counts.items():
+                self._postings.setdefault(term, {})[chunk_id] = frequency
+            length = sum(counts.values())
+            self._lengths[chunk_id] = length
+            self._terms[chunk_id] = tuple(counts)
+            self._total_length += length
+
+    def remove(self, ids: Sequence[UUID]) -> None:
+        for chunk_id in ids:
+            length = self._lengths.pop(chunk_id, None)
+            if length is None:
+                continue
+            self._total_length -= length
+            for term in self._terms.pop(chunk_id, ()):
+                postings = self._postings.get(term)
+                if postings is not None:
+                    postings.pop(chunk_id, None)
+                    if not postings:
+                        del self._postings[term]
+
+    def search(
+        self, tokens: Sequence[str], k: int, *, allowed: Collection[UUID] | None = None
+    ) -> list[KeywordHit]:
+        """Top ``k`` chunks by BM25; with ``allowed``, only those chunks are scored.
+
+        Corpus statistics (idf, average length) stay corpus-wide either way, as in the
+        SQL backends. Each term walks whichever is shorter: its postings or ``allowed``.
+        """
+
+        if k <= 0 or not self._lengths:
+            return []
+        total = len(self._lengths)
+        average_length = self._total_length / total or 1.0
+        scores: dict[UUID, float] = {}
+        for term in tokens:
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1.0 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            matches: Iterable[tuple[UUID, int]] = postings.items()
+            if allowed is not None:
+                if len(allowed) < len(postings):
+                    matches = (
+                        (chunk_id, postings[chunk_id])
+                        for chunk_id in allowed
+                        if chunk_id in postings
+                    )
+                else:
+                    matches = (item for item in postings.items() if item[0] in allowed)
+            for chunk_id, frequency in matches:
+                norm = self.k1 * (1.0 - self.b + self.b * self._lengths[chunk_id] / average_length)
+                gain = idf * frequency * (self.k1 + 1.0) / (frequency + norm)
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + gain
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+
+_memory_indexes: WeakKeyDictionary[Engine, InMemoryKeywordIndex] = WeakKeyDictionary()
+_backends: WeakKeyDictionary[Engine, str] = WeakKeyDictionary()
+
+
+def get_keyword_index(session: AsyncSession) -> InMemoryKeywordIndex:
+    """Return the in-process keyword index for the session's database engine."""
+
+    engine: Any = session.get_bind()
+    index = _memory_indexes.get(engine)
+    if index is None:
+        index = InMemoryKeywordIndex()
+        _memory_indexes[engine] = index
+    return index
+
+
+async def keyword_backend(session: AsyncSession) -> str:
+    """Resolve which keyword backend serves this engine: ``fts5``, ``postgres`` or ``memory``."""
+
+    engine: Any = session.get_bind()
+    backend = _backends.get(engine)
+    if backend is None:
+        backend = "memory"
+        if engine.dialect.name == "postgresql":
+            backend = "postgres"
+        elif engine.dialect.name == "sqlite":
+            found = await session.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {"name": SQLITE_FTS_TABLE},
+            )
+            if found.first() is not None:
+                backend = "fts5"
+        _backends[engine] = backend
+    return backend
+
+
+async def keyword_search(
+    session: AsyncSession,
+    tokens: Sequence[str],
+    limit: int,
+    *,
+    filters: SearchFilters | None = None,
+) -> list[KeywordHit]:
+    """Return up to ``limit`` ``(chunk_id, score)`` pairs, best match first.
+
+    ``filters`` restrict the candidates inside the ranking query (or, in memory, to the
+    resolved chunk ids), so the limit applies to matching chunks only.
+    """
+
+    if not tokens or limit <= 0:
+        return []
+
+    backend = await keyword_backend(session)
+    if backend == "fts5":
+        match = " OR ".join('"{}"'.format(token.replace('"', '""')) for token in tokens)
+        fts = table(SQLITE_FTS_TABLE, column("rowid"), column("rank"), column(SQLITE_FTS_TABLE))
+        rowids = table(SQLITE_FTS_ROWIDS_TABLE, column("fts_rowid"), column("chunk_id"))
+        stmt = (
+            select(rowids.c.chunk_id, fts.c.rank)
+            .join_from(fts, rowids, rowids.c.fts_rowid == fts.c.rowid)
+            .where(fts.c[SQLITE_FTS_TABLE].op("MATCH")(match))
+            .order_by(fts.c.rank)
+            .limit(limit)
+        )
+        if filters is not None:
+            stmt = stmt.where(rowids.c.chunk_id.in_(filters.searchable_chunk_ids()))
+        result = await session.execute(stmt)
+        # FTS5's rank is bm25(), lower-is-better; flip it so all backends agree.
+        return [(UUID(chunk_id), -float(rank)) for chunk_id, rank in result.all()]
+
+    if backend == "postgres":
+        vector = func.to_tsvector(POSTGRES_TSV_CONFIG, DocumentChunk.content)
+        tsquery = func.to_tsquery(POSTGRES_TSV_CONFIG, " | ".join(tokens))
+        score = func.ts_rank_cd(vector, tsquery)
+        stmt = (
+            select(DocumentChunk.id, score.label("score"))
+            .where(vector.bool_op("@@")(tsquery), DocumentChunk.duplicate_of.is_(None))
+            .order_by(score.desc())
+            .limit(limit)
+        )
+        if filters is not None:
+            stmt = stmt.where(DocumentChunk.id.in_(filters.searchable_chunk_ids()))
+        result = await session.execute(stmt)
+        return [(chunk_id, float(value)) for chunk_id, value in result.all()]
+
+    index = get_keyword_index(session)
+    await index.ensure_loaded(session)
+    allowed = await allowed_chunk_ids(session, filters) if filters is not None else None
+    return index.search(tokens, limit, allowed=allowed)
@@ -1,10 +1,43 @@
-"""LLM service abstractions live here."""
+"""LLM service abstractions live here.
+
+``LLMService`` validates prompts and delegates to an ``LLMBackend``: a deterministic stub
+when no API key is configured, otherwise an OpenAI-compatible HTTP backend. HTTP
+backends are shared per process (one pooled ``httpx.AsyncClient`` each) and cap
+in-flight requests with a semaphore, retry transient failures with jittered exponential
+backoff, and can coalesce concurrent completions into batched ``/completions`` calls.
+"""
 
 from __future__ import annotations
 
+import asyncio
+import json
+import logging
+import random
+import re
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable, Sequence
 from dataclasses import dataclass
+from typing import Any, Protocol
+
+import httpx
+import numpy as np
 
 from backend.app.core.config import Settings
+from backend.app.services.chunking import approx_token_count
+from backend.app.services.embeddings import EmbeddingService
+from backend.app.services.response_cache import CacheProbe, ResponseCache, get_response_cache
+from backend.app.services.stage_metrics import record, timed
+
+logger = logging.getLogger(__name__)
+
+# A streamed token of the stub and of cache replays: a word and the whitespace after it.
+_STUB_TOKEN_RE = re.compile(r"\S+\s*|\s+")
+_RETRY_STATUSES = frozenset({408, 409, 429, 500, 502, 503, 504})
+_MAX_BACKOFF = 8.0
+
+
+class LLMProviderError(RuntimeError):
+    """The LLM provider failed or kept failing after retries."""
 
 
 @dataclass
@@ -13,24 +46,425 @@ class LLMResponse:
     answer: str
 
 
+@dataclass
+class LLMUsage:
+    """Prompt and answer size of one ``LLMService`` call, and whether a cache served it.
+
+    Token counts are ``approx_token_count`` estimates and are filled in on cache hits too;
+    ``cache_hit`` tells whether the provider was actually called.
+    """
+
+    tokens_in: int = 0
+    tokens_out: int = 0
+    cache_hit: bool = False
+    semantic_hit: bool = False
+
+
+class LLMBackend(Protocol):
+    """Turns a prompt into an answer, whole or as a stream of text deltas."""
+
+    name: str
+
+    async def complete(self, prompt: str) -> str:
+        ...
+
+    def stream(self, prompt: str) -> AsyncIterator[str]:
+        ...
+
+    async def aclose(self) -> None:
+        ...
+
+
+class StubLLMBackend:
+    """Deterministic offline answers; streams them word by word."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    async def complete(self, prompt: str) -> str:
+        return f"[stub:{self.name}] {prompt}"
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        for match in _STUB_TOKEN_RE.finditer(await self.complete(prompt)):
+            yield match.group()
+            # Hand control back between tokens, as a network-bound provider would.
+            await asyncio.sleep(0)
+
+    async def aclose(self) -> None:
+        return None
+
+
+class _CompletionBatcher:
+    """Coalesces concurrent prompts into one request of up to ``max_size`` prompts.
+
+    A batch is sent when it is full or ``window`` seconds after its first prompt.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[list[str]], Awaitable[list[str]]],
+        *,
+        max_size: int,
+        window: float,
+    ) -> None:
+        self._send = send
+        self.max_size = max_size
+        self.window = window
+        self._pending: list[tuple[str, asyncio.Future[str]]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    async def submit(self, prompt: str) -> str:
+        future: asyncio.Future[str] = asyncio.get_running_loop().create_future()
+        self._pending.append((prompt, future))
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: list[tuple[str, asyncio.Future[str]]]) -> None:
+        try:
+            answers = await self._send([prompt for prompt, _ in batch])
+        except Exception as exc:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for (_, future), answer in zip(batch, answers):
+            if not future.done():
+                future.set_result(answer)
+
+
+class OpenAICompatibleBackend:
+    """Chat completions against any OpenAI-compatible endpoint (OpenAI, vLLM, a mock).
+
+    With ``batch_size > 1``, ``complete`` goes through the legacy ``/completions``
+    endpoint, which accepts a list of prompts, so concurrent callers share requests.
+    Streams are only retried until their first delta has been yielded.
+    """
+
+    def __init__(
+        self,
+        *,
+        name: str,
+        base_url: str,
+        api_key: str,
+        model: str,
+        timeout: float = 30.0,
+        max_concurrency: int = 16,
+        max_retries: int = 3,
+        retry_backoff: float = 0.5,
+        batch_size: int = 1,
+        batch_window: float = 0.005,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        self.name = name
+        self.model = model
+        self.max_retries = max(0, max_retries)
+        self.retry_backoff = retry_backoff
+        self.retries = 0
+        max_concurrency = max(1, max_concurrency)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._client = httpx.AsyncClient(
+            base_url=base_url.rstrip("/"),
+            headers={"Authorization": f"Bearer {api_key}"},
+            timeout=httpx.Timeout(timeout, connect=min(timeout, 5.0)),
+            limits=httpx.Limits(
+                max_connections=max_concurrency, max_keepalive_connections=max_concurrency
+            ),
+            transport=transport,
+        )
+        self._batcher = (
+            _CompletionBatcher(self._complete_batch, max_size=batch_size, window=batch_window)
+            if batch_size > 1
+            else None
+        )
+
+    async def complete(self, prompt: str) -> str:
+        if self._batcher is not None:
+            return await self._batcher.submit(prompt)
+        data = await self._post_json("/chat/completions", self._chat_payload(prompt))
+        return data["choices"][0]["message"].get("content") or ""
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        payload = {**self._chat_payload(prompt), "stream": True}
+        for attempt in range(self.max_retries + 1):
+            started = False
+            try:
+                async with self._semaphore:
+                    async with self._client.stream(
+                        "POST", "/chat/completions", json=payload
+                    ) as response:
+                        if response.status_code not in _RETRY_STATUSES:
+                            await self._raise_for_status(response)
+                            async for delta in self._sse_deltas(response):
+                                started = True
+                                yield delta
+                            return
+                        retry_after = _retry_after(response)
+                        error: Exception = LLMProviderError(
+                            f"{self.name} returned HTTP {response.status_code}"
+                        )
+            except httpx.TransportError as exc:
+                if started:
+                    raise LLMProviderError(f"{self.name} stream broke off: {exc}") from exc
+                retry_after, error = None, exc
+            await self._before_retry(attempt, retry_after, error)
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    def _chat_payload(self, prompt: str) -> dict[str, Any]:
+        return {"model": self.model, "messages": [{"role": "user", "content": prompt}]}
+
+    async def _complete_batch(self, prompts: list[str]) -> list[str]:
+        data = await self._post_json("/completions", {"model": self.model, "prompt": prompts})
+        answers = [""] * len(prompts)
+        for choice in data["choices"]:
+            answers[choice["index"]] = choice.get("text") or ""
+        return answers
+
+    async def _post_json(self, path: str, payload: dict[str, Any]) -> dict[str, Any]:
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self._semaphore:
+                    response = await self._client.post(path, json=payload)
+                if response.status_code not in _RETRY_STATUSES:
+                    await self._raise_for_status(response)
+                    try:
+                        return response.json()
+                    except ValueError:
+                        # An HTML error page or a cut-off body from a proxy: try again.
+                        retry_after, error = None, LLMProviderError(
+                            f"{self.name} returned a malformed JSON body: {response.text[:200]!r}"
+                        )
+                else:
+                    retry_after = _retry_after(response)
+                    error = LLMProviderError(f"{self.name} returned HTTP {response.status_code}")
+            except httpx.TransportError as exc:
+                retry_after, error = None, exc
+            await self._before_retry(attempt, retry_after, error)
+        raise AssertionError("unreachable")
+
+    async def _before_retry(
+        self, attempt: int, retry_after: float | None, error: Exception
+    ) -> None:
+        """Sleep before the next attempt, or raise once retries are used up."""
+
+        if attempt >= self.max_retries:
+            if isinstance(error, LLMProviderError):
+                raise error
+            raise LLMProviderError(f"{self.name} request failed: {error}") from error
+        self.retries += 1
+        # Full jitter: spread retries of many concurrent callers instead of synchronising them.
+        delay = random.uniform(0, min(_MAX_BACKOFF, self.retry_backoff * 2**attempt))
+        if retry_after is not None:
+            delay = min(_MAX_BACKOFF, max(delay, retry_after))
+        logger.warning("Retrying %s in %.2fs after: %s", self.name, delay, error)
+        await asyncio.sleep(delay)
+
+    async def _raise_for_status(self, response: httpx.Response) -> None:
+        if response.is_success:
+            return
+        await response.aread()
+        raise LLMProviderError(
+            f"{self.name} returned HTTP {response.status_code}: {response.text[:200]}"
+        )
+
+    @staticmethod
+    async def _sse_deltas(response: httpx.Response) -> AsyncIterator[str]:
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            data = line.removeprefix("data:").strip()
+            if data == "[DONE]":
+                return
+            choices = json.loads(data).get("choices") or [{}]
+            delta = (choices[0].get("delta") or {}).get("content")
+            if delta:
+                yield delta
+
+
+def _retry_after(response: httpx.Response) -> float | None:
+    try:
+        return float(response.headers["retry-after"])
+    except (KeyError, ValueError):
+        return None
+
+
+_backends: dict[tuple[Any, ...], LLMBackend] = {}
+
+
+def get_llm_backend(settings: Settings) -> LLMBackend:
+    """Return the process-wide backend for the configured provider.
+
+    Without an API key (or with ``LLM_PROVIDER=stub``) answers come from the offline stub.
+    Any other provider name is served by the OpenAI-compatible backend at ``LLM_BASE_URL``.
+    """
+
+    key = (
+        settings.llm_provider,
+        settings.openai_api_key,
+        settings.llm_base_url,
+        settings.llm_model,
+    )
+    backend = _backends.get(key)
+    if backend is not None:
+        return backend
+    if not settings.openai_api_key or settings.llm_provider == "stub":
+        backend = StubLLMBackend(settings.llm_provider)
+    else:
+        backend = OpenAICompatibleBackend(
+            name=settings.llm_provider,
+            base_url=settings.llm_base_url,
+            api_key=settings.openai_api_key,
+            model=settings.llm_model,
+            timeout=settings.llm_timeout,
+            max_concurrency=settings.llm_max_concurrency,
+            max_retries=settings.llm_max_retries,
+            retry_backoff=settings.llm_retry_backoff,
+            batch_size=settings.llm_batch_size,
+            batch_window=settings.llm_batch_window_ms / 1000,
+        )
+    _backends[key] = backend
+    return backend
+
+
+async def shutdown_llm_backends() -> None:
+    """Close pooled HTTP clients (called from the app lifespan)."""
+
+    backends = list(_backends.values())
+    _backends.clear()
+    for backend in backends:
+        await backend.aclose()
+
+
 class LLMService:
-    """Lightweight LLM facade with deterministic fallback behaviour."""
+    """Lightweight LLM facade over a pluggable backend, behind the response cache.
 
-    def __init__(self, settings: Settings) -> None:
+    ``chat`` and ``stream`` accept the user's ``question`` and the retrieved ``contexts``
+    lines; with both, a cached answer to a similar question over the same context can be
+    reused (see ``services.response_cache``).
+    """
+
+    def __init__(
+        self,
+        settings: Settings,
+        backend: LLMBackend | None = None,
+        *,
+        cache: ResponseCache | None = None,
+        embedding_service: EmbeddingService | None = None,
+    ) -> None:
         self.provider = settings.llm_provider
         self.api_key = settings.openai_api_key
+        self.backend = backend or get_llm_backend(settings)
+        self.cache = cache if cache is not None else get_response_cache()
+        self.namespace = f"{self.backend.name}:{settings.llm_model}"
+        self._embedder = embedding_service
+
+    async def chat(
+        self,
+        prompt: str,
+        *,
+        question: str | None = None,
+        contexts: Sequence[str] | None = None,
+        usage: LLMUsage | None = None,
+    ) -> LLMResponse:
+        """Return the answer for ``prompt``, from the cache when possible.
+
+        A passed ``usage`` is filled in with the call's token counts and cache outcome.
+        """
+
+        prompt = self._normalize(prompt)
+        probe = await self._lookup(prompt, question, contexts)
+        if probe is not None and probe.answer is not None:
+            self._account(usage, prompt, probe.answer, probe)
+            return LLMResponse(provider=self.provider, answer=probe.answer)
+        with timed("llm.generate"):
+            answer = await self.backend.complete(prompt)
+        self._store(probe, answer)
+        self._account(usage, prompt, answer, probe)
+        return LLMResponse(provider=self.provider, answer=answer)
 
-    async def chat(self, prompt: str) -> LLMResponse:
-        """Return a deterministic answer until a real provider integration is added."""
+    async def stream(
+        self,
+        prompt: str,
+        *,
+        question: str | None = None,
+        contexts: Sequence[str] | None = None,
+        usage: LLMUsage | None = None,
+    ) -> AsyncIterator[str]:
+        """Yield the answer incrementally; the tokens concatenate to ``chat``'s answer.
 
+        Cached answers are replayed word by word; a generated one is cached once the
+        stream has completed. A passed ``usage`` is filled in once the stream ends.
+        """
+
+        prompt = self._normalize(prompt)
+        probe = await self._lookup(prompt, question, contexts)
+        if probe is not None and probe.answer is not None:
+            self._account(usage, prompt, probe.answer, probe)
+            for match in _STUB_TOKEN_RE.finditer(probe.answer):
+                yield match.group()
+            return
+        tokens: list[str] = []
+        start = time.perf_counter()
+        first_token = True
+        async for token in self.backend.stream(prompt):
+            if first_token:
+                record("llm.first_token", (time.perf_counter() - start) * 1000)
+                first_token = False
+            tokens.append(token)
+            yield token
+        record("llm.generate", (time.perf_counter() - start) * 1000)
+        answer = "".join(tokens)
+        self._store(probe, answer)
+        self._account(usage, prompt, answer, probe)
+
+    async def _lookup(
+        self, prompt: str, question: str | None, contexts: Sequence[str] | None
+    ) -> CacheProbe | None:
+        if self.cache is None:
+            return None
+        with timed("llm.cache_lookup"):
+            return await self.cache.lookup(
+                self.namespace, prompt, question=question, contexts=contexts, embed=self._embed
+            )
+
+    @staticmethod
+    def _account(
+        usage: LLMUsage | None, prompt: str, answer: str, probe: CacheProbe | None
+    ) -> None:
+        if usage is None:
+            return
+        usage.tokens_in = approx_token_count(prompt)
+        usage.tokens_out = approx_token_count(answer)
+        usage.cache_hit = probe is not None and probe.answer is not None
+        usage.semantic_hit = probe is not None and probe.semantic
+
+    def _store(self, probe: CacheProbe | None, answer: str) -> None:
+        if probe is not None and self.cache is not None:
+            self.cache.store(probe, answer)
+
+    async def _embed(self, text: str) -> np.ndarray:
+        if self._embedder is None:
+            self._embedder = EmbeddingService()
+        return (await self._embedder.embed_batch([text]))[0]
+
+    @staticmethod
+    def _normalize(prompt: str) -> str:
         normalized_prompt = prompt.strip()
         if not normalized_prompt:
             raise ValueError("Prompt must not be empty.")
-
-        if not self.api_key:
-            fallback = f"[stub:{self.provider}] {normalized_prompt}"
-            return LLMResponse(provider=self.provider, answer=fallback)
-
-        # Placeholder for real provider integration (OpenAI, Claude, etc.)
-        fallback = f"[provider:{self.provider}] {normalized_prompt}"
-        return LLMResponse(provider=self.provider, answer=fallback)
+        return normalized_prompt
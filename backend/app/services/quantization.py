@@ -0,0 +1,84 @@
+"""Compact encodings for embedding vectors.
+
+Stored embeddings (the non-pgvector fallback column) are packed into a small binary
+blob instead of JSON text: a 6-byte header (magic, format, dimension) followed by a
+little-endian payload.
+
+- ``float32``: lossless, 4 bytes per dimension (~5x smaller than JSON).
+- ``float16``: 2 bytes per dimension; relative error around 1e-3.
+- ``int8``: symmetric scalar quantization, 1 byte per dimension plus a float32 scale.
+
+``sign_codes`` reduces vectors to one bit per dimension for coarse Hamming-distance
+scans; callers rescore the resulting shortlist with the full-precision vectors.
+"""
+
+from __future__ import annotations
+
+import struct
+from collections.abc import Sequence
+from typing import Literal
+
+import numpy as np
+
+EmbeddingStorage = Literal["float32", "float16", "int8"]
+
+_MAGIC = b"E"
+_HEADER = struct.Struct("<cBI")
+_SCALE = struct.Struct("<f")
+_FORMAT_CODES: dict[str, int] = {"float32": 1, "float16": 2, "int8": 3}
+_INT8_LIMIT = 127
+# Popcount per byte value, for numpy versions without ``np.bitwise_count``.
+_POPCOUNT_TABLE = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1)
+
+
+def encode_embedding(
+    vector: Sequence[float] | np.ndarray, storage: EmbeddingStorage = "float32"
+) -> bytes:
+    array = np.asarray(vector, dtype=np.float32).reshape(-1)
+    header = _HEADER.pack(_MAGIC, _FORMAT_CODES[storage], array.shape[0])
+    if storage == "float32":
+        return header + array.astype("<f4", copy=False).tobytes()
+    if storage == "float16":
+        return header + array.astype("<f2").tobytes()
+    peak = float(np.abs(array).max()) if array.size else 0.0
+    scale = peak / _INT8_LIMIT if peak > 0 else 1.0
+    codes = np.clip(np.rint(array / scale), -_INT8_LIMIT, _INT8_LIMIT).astype(np.int8)
+    return header + _SCALE.pack(scale) + codes.tobytes()
+
+
+def decode_embedding(data: bytes | bytearray | memoryview) -> np.ndarray:
+    """Decode a blob written by ``encode_embedding`` into a float32 vector."""
+
+    magic, code, dim = _HEADER.unpack_from(data)
+    if magic != _MAGIC:
+        raise ValueError("Not an encoded embedding.")
+    offset = _HEADER.size
+    if code == _FORMAT_CODES["float32"]:
+        return np.frombuffer(data, dtype="<f4", count=dim, offset=offset).astype(np.float32)
+    if code == _FORMAT_CODES["float16"]:
+        return np.frombuffer(data, dtype="<f2", count=dim, offset=offset).astype(np.float32)
+    if code == _FORMAT_CODES["int8"]:
+        (scale,) = _SCALE.unpack_from(data, offset)
+        codes = np.frombuffer(data, dtype=np.int8, count=dim, offset=offset + _SCALE.size)
+        return codes.astype(np.float32) * np.float32(scale)
+    raise ValueError(f"Unknown embedding format {code}.")
+
+
+def sign_codes(vectors: np.ndarray) -> np.ndarray:
+    """One bit per dimension (set where the component is positive), packed into uint64."""
+
+    matrix = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    packed = np.packbits(matrix > 0, axis=1)
+    padding = -packed.shape[1] % 8
+    if padding:
+        packed = np.pad(packed, ((0, 0), (0, padding)))
+    return np.ascontiguousarray(packed).view(np.uint64)
+
+
+def hamming_distances(codes: np.ndarray, query: np.ndarray) -> np.ndarray:
+    """Bit differences between each row of ``codes`` and the single-row ``query`` code."""
+
+    diff = codes ^ query.reshape(1, -1)
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(diff).sum(axis=1, dtype=np.int32)
+    return _POPCOUNT_TABLE[diff.view(np.uint8)].sum(axis=1, dtype=np.int32)
@@ -0,0 +1,141 @@
+"""TTL + LRU cache for retrieval results, invalidated by a corpus version.
+
+Entries are keyed by ``(corpus version, normalised query, mode, limit, …)``. Every
+committed ingest bumps the version of its database engine, which drops all entries, so
+results never outlive the corpus they were computed from in this process. Other worker
+processes only notice through expiry, so ``QUERY_CACHE_TTL`` bounds their staleness.
+
+Concurrent misses for the same key are single-flighted: the first caller computes the
+result and the others await it instead of embedding and searching again.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any, Generic, TypeVar
+from weakref import WeakKeyDictionary
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.core.config import get_settings
+
+T = TypeVar("T")
+
+
+def normalize_query(query: str) -> str:
+    """Case-folded query with runs of whitespace collapsed, as used in cache keys."""
+
+    return " ".join(query.casefold().split())
+
+
+class QueryCache(Generic[T]):
+    """Bounded result cache; entries expire ``ttl`` seconds after they were computed."""
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = 1024,
+        ttl: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+        self._clock = clock
+        self._entries: OrderedDict[Hashable, tuple[float, T]] = OrderedDict()
+        self._inflight: dict[Hashable, asyncio.Future[T]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "entries": len(self._entries),
+            "version": self.version,
+        }
+
+    def bump(self) -> None:
+        """Invalidate everything: the corpus changed."""
+
+        self.version += 1
+        self._entries.clear()
+
+    async def get_or_compute(self, key: Hashable, compute: Callable[[], Awaitable[T]]) -> T:
+        """Return the cached value for ``key`` or compute it, at most once at a time.
+
+        Results are only stored if the version did not change while computing. If the
+        computing caller fails or is cancelled, the waiting callers compute themselves.
+        """
+
+        version = self.version
+        full_key = (version, key)
+        entry = self._entries.get(full_key)
+        if entry is not None:
+            if entry[0] > self._clock():
+                self._entries.move_to_end(full_key)
+                self.hits += 1
+                return entry[1]
+            del self._entries[full_key]
+
+        flight = self._inflight.get(full_key)
+        if flight is not None:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(flight)
+            except asyncio.CancelledError:
+                if not flight.cancelled():
+                    raise
+            return await self.get_or_compute(key, compute)
+
+        self.misses += 1
+        flight = self._inflight[full_key] = asyncio.get_running_loop().create_future()
+        try:
+            value = await compute()
+        except BaseException:
+            flight.cancel()
+            raise
+        finally:
+            del self._inflight[full_key]
+        flight.set_result(value)
+        if version == self.version:
+            self._entries[full_key] = (self._clock() + self.ttl, value)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+
+_caches: WeakKeyDictionary[Engine, QueryCache[Any]] = WeakKeyDictionary()
+
+
+def get_query_cache(session: AsyncSession) -> QueryCache[Any] | None:
+    """Return the process-wide result cache for the session's engine (``None`` if off)."""
+
+    settings = get_settings()
+    if settings.query_cache_size <= 0 or settings.query_cache_ttl <= 0:
+        return None
+    engine: Any = session.get_bind()
+    cache = _caches.get(engine)
+    if cache is None:
+        cache = _caches[engine] = QueryCache(
+            max_entries=settings.query_cache_size, ttl=settings.query_cache_ttl
+        )
+    return cache
+
+
+def bump_corpus_version(session: AsyncSession) -> None:
+    """Invalidate cached results for the session's engine after its corpus changed."""
+
+    cache = _caches.get(session.get_bind())  # type: ignore[arg-type]
+    if cache is not None:
+        cache.bump()
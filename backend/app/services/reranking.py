@@ -0,0 +1,207 @@
+"""Second-stage reranking of search candidates under a latency budget.
+
+``SearchService.retrieve(..., rerank=True)`` over-fetches ``rerank_candidates``
+first-stage hits and passes them to ``rerank_matches``. The configured reranker scores
+them in batches of ``rerank_batch_size``. If scoring does not finish within
+``rerank_budget_ms``, the request keeps the first-stage order instead of waiting.
+
+``RERANK_MODEL=lexical`` (the default) scores with BM25 over the candidates plus a
+boost for query terms that appear close together. Any other value names a local
+``sentence-transformers`` cross-encoder (for example
+``cross-encoder/ms-marco-MiniLM-L-6-v2``), which then runs in a worker thread.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import time
+from collections import Counter
+from collections.abc import Callable, Sequence
+from functools import lru_cache
+from typing import Any, Protocol
+
+from backend.app.core.config import get_settings
+from backend.app.services.keyword_index import query_tokens, tokenize
+from backend.app.services.stage_metrics import record
+
+logger = logging.getLogger(__name__)
+
+BatchScorer = Callable[[Sequence[int]], list[float]]
+
+
+class Reranker(Protocol):
+    name: str
+    # Whether scoring is heavy enough to run in a worker thread.
+    offload: bool
+
+    def prepare(self, query: str, candidates: Sequence[str]) -> BatchScorer:
+        """Return a function scoring the candidates at the given positions."""
+        ...
+
+
+class LexicalReranker:
+    """BM25 over the candidate set, boosted when the query terms occur close together.
+
+    The boost multiplies BM25 by up to ``1 + proximity_weight``. It grows with the share
+    of query terms the passage contains and shrinks with the width of the smallest
+    window holding one occurrence of each.
+    """
+
+    name = "lexical"
+    offload = False
+
+    def __init__(self, *, k1: float = 1.2, b: float = 0.75, proximity_weight: float = 0.5):
+        self.k1 = k1
+        self.b = b
+        self.proximity_weight = proximity_weight
+
+    def prepare(self, query: str, candidates: Sequence[str]) -> BatchScorer:
+        terms = query_tokens(query)
+        documents = [tokenize(text) for text in candidates]
+        frequency = Counter(term for tokens in documents for term in set(tokens) & set(terms))
+        count = len(documents)
+        idf = {
+            term: math.log(1 + (count - frequency[term] + 0.5) / (frequency[term] + 0.5))
+            for term in terms
+        }
+        average_length = sum(len(tokens) for tokens in documents) / count if count else 0.0
+
+        def score(positions: Sequence[int]) -> list[float]:
+            return [
+                self._score(terms, idf, documents[position], average_length)
+                for position in positions
+            ]
+
+        return score
+
+    def _score(
+        self, terms: list[str], idf: dict[str, float], tokens: list[str], average_length: float
+    ) -> float:
+        if not tokens or not terms:
+            return 0.0
+        occurrences: dict[str, list[int]] = {}
+        for position, token in enumerate(tokens):
+            if token in idf:
+                occurrences.setdefault(token, []).append(position)
+        norm = self.k1 * (1 - self.b + self.b * len(tokens) / (average_length or 1.0))
+        bm25 = sum(
+            idf[term] * len(found) * (self.k1 + 1) / (len(found) + norm)
+            for term, found in occurrences.items()
+        )
+        if len(occurrences) < 2:
+            return bm25
+        coverage = len(occurrences) / len(terms)
+        closeness = len(occurrences) / _smallest_window(occurrences)
+        return bm25 * (1 + self.proximity_weight * coverage * closeness)
+
+
+def _smallest_window(occurrences: dict[str, list[int]]) -> int:
+    """Width of the shortest token span containing every term at least once."""
+
+    events = sorted((position, term) for term, found in occurrences.items() for position in found)
+    needed = len(occurrences)
+    counts: Counter[str] = Counter()
+    covered = 0
+    best = events[-1][0] - events[0][0] + 1
+    left = 0
+    for position, term in events:
+        counts[term] += 1
+        covered += counts[term] == 1
+        while covered == needed:
+            best = min(best, position - events[left][0] + 1)
+            left_term = events[left][1]
+            counts[left_term] -= 1
+            covered -= counts[left_term] == 0
+            left += 1
+    return max(best, needed)
+
+
+class CrossEncoderReranker:
+    """Local cross-encoder loaded through ``sentence-transformers``."""
+
+    offload = True
+
+    def __init__(self, model_name: str, *, device: str = "cpu") -> None:
+        try:
+            from sentence_transformers import CrossEncoder  # type: ignore
+        except ImportError as exc:  # pragma: no cover - optional dependency
+            raise RuntimeError(
+                "Cross-encoder reranking requires the 'sentence-transformers' package."
+            ) from exc
+
+        self.name = model_name
+        self._model = CrossEncoder(model_name, device=device)
+
+    def prepare(self, query: str, candidates: Sequence[str]) -> BatchScorer:
+        def score(positions: Sequence[int]) -> list[float]:
+            pairs = [(query, candidates[position]) for position in positions]
+            scores = self._model.predict(pairs, batch_size=max(1, len(pairs)))
+            return [float(value) for value in scores]
+
+        return score
+
+
+@lru_cache
+def get_reranker(model: str) -> Reranker:
+    """Return a cached reranker for ``model`` so local weights load once per process."""
+
+    if model == "lexical":
+        return LexicalReranker()
+    return CrossEncoderReranker(model, device=get_settings().embedding_device)
+
+
+async def rerank_matches(
+    query: str,
+    matches: list[dict[str, Any]],
+    *,
+    limit: int,
+    reranker: Reranker | None = None,
+    budget_ms: float | None = None,
+    batch_size: int | None = None,
+) -> list[dict[str, Any]]:
+    """Reorder ``matches`` (first-stage order) by reranker score and keep ``limit``.
+
+    Falls back to the first ``limit`` matches in their original order when scoring
+    overruns ``budget_ms``. An offloaded batch that is still running is left to finish
+    in its thread, but the request does not wait for it.
+    """
+
+    settings = get_settings()
+    reranker = reranker if reranker is not None else get_reranker(settings.rerank_model)
+    budget_ms = budget_ms if budget_ms is not None else settings.rerank_budget_ms
+    batch_size = max(1, batch_size if batch_size is not None else settings.rerank_batch_size)
+    if len(matches) < 2:
+        return matches[:limit]
+
+    start = time.perf_counter()
+    texts = [str(match.get("content", "")) for match in matches]
+
+    async def call(function: Callable[..., Any], *args: Any) -> Any:
+        if reranker.offload:
+            return await asyncio.to_thread(function, *args)
+        result = function(*args)
+        # Inline scoring never yields, so give the loop (and the deadline) a chance.
+        await asyncio.sleep(0)
+        return result
+
+    scores: list[float] = []
+    try:
+        async with asyncio.timeout(budget_ms / 1000):
+            score_batch = await call(reranker.prepare, query, texts)
+            for first in range(0, len(texts), batch_size):
+                positions = range(first, min(first + batch_size, len(texts)))
+                scores.extend(await call(score_batch, positions))
+    except TimeoutError:
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        record("search.rerank_fallback", elapsed_ms)
+        logger.info(
+            "Reranking %d candidates overran %.0f ms; keeping first-stage order.",
+            len(texts),
+            budget_ms,
+        )
+        return matches[:limit]
+
+    order = sorted(range(len(matches)), key=lambda position: (-scores[position], position))
+    return [matches[position] for position in order[:limit]]
@@ -0,0 +1,191 @@
+"""Cache of LLM answers, in front of ``LLMService.chat`` / ``stream``.
+
+Every answer is stored under a hash of its namespace (provider and model) and prompt.
+Callers that pass the user's question and the retrieved context lines additionally
+make the answer findable by meaning: a later question whose embedding has a cosine
+similarity of at least ``similarity_threshold`` to a cached one, asked over exactly
+the same set of context lines, gets the cached answer. Entries expire after ``ttl``
+seconds and the least recently used are evicted beyond ``max_entries``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Sequence
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+
+from backend.app.core.config import get_settings
+
+
+@dataclass
+class _Entry:
+    answer: str
+    expires_at: float
+    context_key: bytes | None = None
+    vector: np.ndarray | None = None
+
+
+@dataclass
+class CacheProbe:
+    """Result of a lookup; pass it back to ``store`` after generating on a miss."""
+
+    key: bytes
+    answer: str | None = None
+    semantic: bool = False
+    context_key: bytes | None = None
+    vector: np.ndarray | None = None
+
+
+def _digest(*parts: str) -> bytes:
+    hasher = hashlib.sha256()
+    for part in parts:
+        hasher.update(part.encode("utf-8"))
+        hasher.update(b"\0")
+    return hasher.digest()
+
+
+class ResponseCache:
+    """Size-bounded TTL cache with an exact tier and an optional semantic tier."""
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = 1024,
+        ttl: float = 600.0,
+        similarity_threshold: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+        self._clock = clock
+        self._entries: OrderedDict[bytes, _Entry] = OrderedDict()
+        # Entry keys per context set, for the semantic tier.
+        self._by_context: dict[bytes, set[bytes]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict[str, float]:
+        lookups = self.hits + self.semantic_hits + self.misses
+        return {
+            "hits": self.hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.semantic_hits) / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+        }
+
+    async def lookup(
+        self,
+        namespace: str,
+        prompt: str,
+        *,
+        question: str | None = None,
+        contexts: Sequence[str] | None = None,
+        embed: Callable[[str], Awaitable[np.ndarray]] | None = None,
+    ) -> CacheProbe:
+        """Find an answer by exact prompt, then (if enabled) by similar question.
+
+        The question is only embedded when the exact tier misses and the semantic tier
+        applies (threshold set, ``question``, ``contexts`` and ``embed`` given).
+        """
+
+        probe = CacheProbe(key=_digest(namespace, prompt))
+        entry = self._get(probe.key)
+        if entry is not None:
+            self.hits += 1
+            probe.answer = entry.answer
+            return probe
+
+        if (
+            self.similarity_threshold is not None
+            and question is not None
+            and contexts is not None
+            and embed is not None
+        ):
+            probe.context_key = _digest(namespace, *sorted(contexts))
+            vector = np.asarray(await embed(question), dtype=np.float32)
+            norm = float(np.linalg.norm(vector))
+            probe.vector = vector / norm if norm else vector
+            match = self._most_similar(probe.context_key, probe.vector)
+            if match is not None:
+                self.semantic_hits += 1
+                probe.answer, probe.semantic = match.answer, True
+                return probe
+
+        self.misses += 1
+        return probe
+
+    def store(self, probe: CacheProbe, answer: str) -> None:
+        entry = _Entry(
+            answer=answer,
+            expires_at=self._clock() + self.ttl,
+            context_key=probe.context_key,
+            vector=probe.vector,
+        )
+        self._discard(probe.key)
+        self._entries[probe.key] = entry
+        if entry.context_key is not None and entry.vector is not None:
+            self._by_context.setdefault(entry.context_key, set()).add(probe.key)
+        while len(self._entries) > self.max_entries:
+            self._discard(next(iter(self._entries)))
+
+    def _get(self, key: bytes) -> _Entry | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= self._clock():
+            self._discard(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _most_similar(self, context_key: bytes, vector: np.ndarray) -> _Entry | None:
+        assert self.similarity_threshold is not None
+        best_key, best_score = None, self.similarity_threshold
+        now = self._clock()
+        for key in list(self._by_context.get(context_key, ())):
+            entry = self._entries[key]
+            if entry.expires_at <= now:
+                self._discard(key)
+                continue
+            if entry.vector is None or entry.vector.shape != vector.shape:
+                continue
+            score = float(entry.vector @ vector)
+            if score >= best_score:
+                best_key, best_score = key, score
+        return self._get(best_key) if best_key is not None else None
+
+    def _discard(self, key: bytes) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None or entry.context_key is None:
+            return
+        keys = self._by_context.get(entry.context_key)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_context[entry.context_key]
+
+
+@lru_cache
+def get_response_cache() -> ResponseCache | None:
+    """Return the process-wide LLM response cache, or ``None`` when it is disabled."""
+
+    settings = get_settings()
+    if settings.llm_cache_size <= 0 or settings.llm_cache_ttl <= 0:
+        return None
+    return ResponseCache(
+        max_entries=settings.llm_cache_size,
+        ttl=settings.llm_cache_ttl,
+        similarity_threshold=settings.llm_cache_similarity,
+    )
@@ -1,84 +1,432 @@
 from __future__ import annotations
 
+import asyncio
+import functools
+import html
 import re
+from collections.abc import Sequence
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Literal
+from uuid import UUID
 
-from sqlalchemy import func, or_, select
+import numpy as np
+from sqlalchemy import or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from backend.app.core.config import get_settings
 from backend.app.models.db.documents import DocumentChunk
 from backend.app.services.embeddings import EmbeddingService
+from backend.app.services.keyword_index import keyword_search, query_tokens
+from backend.app.services.query_cache import QueryCache, get_query_cache, normalize_query
+from backend.app.services.reranking import rerank_matches
+from backend.app.services.search_filters import SearchFilters, allowed_chunk_ids
+from backend.app.services.stage_metrics import note_cache_hit, timed
+from backend.app.services.vector_index import get_vector_index
+
+SearchMode = Literal["vector", "keyword", "hybrid"]
+Hit = tuple[UUID, float]
+
+_ELLIPSIS = "…"
+
+
+@dataclass(frozen=True)
+class SnippetOptions:
+    """How search results are cut down instead of returning whole chunks.
+
+    ``width`` is the window size in characters (``None`` keeps the whole chunk); with
+    ``highlight`` the snippet is HTML: the text is escaped and every matched query word
+    is wrapped in ``mark``.
+    """
+
+    width: int | None = 200
+    highlight: bool = False
+    mark: tuple[str, str] = ("<mark>", "</mark>")
+
+
+@lru_cache(maxsize=256)
+def _terms_pattern(terms: frozenset[str]) -> re.Pattern[str]:
+    """One case-insensitive whole-word alternation, so matching stays in the regex engine."""
+
+    alternatives = "|".join(re.escape(term) for term in sorted(terms, key=len, reverse=True))
+    return re.compile(rf"(?<!\w)(?:{alternatives})(?!\w)", re.IGNORECASE)
+
+
+def make_snippet(content: str, tokens: Sequence[str], options: SnippetOptions) -> str:
+    """Cut the window of ``content`` holding the most query-term matches.
+
+    Without matches (e.g. a purely semantic hit) the window starts at the beginning.
+    Window edges snap to whitespace and are marked with an ellipsis.
+    """
+
+    pattern = _terms_pattern(frozenset(tokens)) if tokens else None
+    matches = [m.span() for m in pattern.finditer(content)] if pattern else []
+    width = len(content) if options.width is None else max(1, options.width)
+    start, end = 0, min(len(content), width)
+    keep_until = 0
+    if matches and len(content) > width:
+        # Densest run of matches fitting in the window (two pointers over match starts).
+        best, first = (0, 0), 0
+        for last in range(len(matches)):
+            while matches[last][1] - matches[first][0] > width:
+                first += 1
+            if last - first > best[1] - best[0]:
+                best = (first, last)
+        span_start, span_end = matches[best[0]][0], matches[best[1]][1]
+        centred = span_start - (width - (span_end - span_start)) // 2
+        start = max(0, min(centred, len(content) - width))
+        end = min(len(content), start + width)
+        keep_until = span_end
+        # Do not cut words at the edges (matched words are never dropped).
+        if start > 0 and not content[start - 1].isspace():
+            space = content.find(" ", start, span_start)
+            start = space + 1 if space >= 0 else start
+    if end < len(content) and not content[end].isspace():
+        space = content.rfind(" ", max(start, keep_until), end)
+        end = space if space > start else end
+
+    window = content[start:end].strip()
+    if options.highlight:
+        window = _highlight(window, pattern if matches else None, options.mark)
+    return f"{_ELLIPSIS if start > 0 else ''}{window}{_ELLIPSIS if end < len(content) else ''}"
+
+
+def _highlight(text: str, pattern: re.Pattern[str] | None, mark: tuple[str, str]) -> str:
+    """Escape ``text`` for HTML, wrapping ``pattern`` matches in the ``mark`` tags."""
+
+    if pattern is None:
+        return html.escape(text)
+    opening, closing = mark
+    parts: list[str] = []
+    position = 0
+    for match in pattern.finditer(text):
+        parts.append(html.escape(text[position : match.start()]))
+        parts.append(f"{opening}{html.escape(match.group())}{closing}")
+        position = match.end()
+    parts.append(html.escape(text[position:]))
+    return "".join(parts)
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[Hit]],
+    *,
+    k: int = 60,
+    weights: Sequence[float] | None = None,
+) -> list[Hit]:
+    """Fuse ranked lists with (weighted) reciprocal-rank fusion, best first."""
+
+    weights = weights or [1.0] * len(rankings)
+    scores: dict[UUID, float] = {}
+    for ranking, weight in zip(rankings, weights):
+        for position, (chunk_id, _) in enumerate(ranking, start=1):
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + weight / (k + position)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+def _has_pgvector() -> bool:
+    """Whether the embedding column is a pgvector type (vs. the JSON fallback)."""
+
+    return hasattr(DocumentChunk.embedding, "l2_distance")
 
 
 class SearchService:
-    def __init__(self, session: AsyncSession) -> None:
+    def __init__(
+        self,
+        session: AsyncSession,
+        embedding_service: EmbeddingService | None = None,
+        cache: QueryCache | None = None,
+    ) -> None:
         self.session = session
+        self.embedder = embedding_service or EmbeddingService()
+        self.cache = cache if cache is not None else get_query_cache(session)
+
+    async def retrieve(
+        self,
+        query: str,
+        limit: int = 5,
+        mode: SearchMode = "vector",
+        *,
+        snippet: SnippetOptions | None = None,
+        rerank: bool = False,
+        filters: SearchFilters | None = None,
+    ) -> list[dict[str, str]]:
+        """Dispatch to keyword, vector or hybrid search, through the query-result cache.
+
+        Cached results are keyed by the normalised query, so queries differing only in
+        case or spacing share an entry. The embed, ranking and fetch stages are timed
+        (see ``services.stage_metrics``) and the current trace learns whether the result
+        came from the cache.
+
+        With ``rerank`` the (cached) top ``rerank_candidates`` whole chunks are reordered
+        by ``services.reranking`` on every call, and snippets are cut afterwards.
+
+        ``filters`` (see ``services.search_filters``) narrow the chunks every stage
+        ranks; filters without conditions are ignored.
+        """
+
+        if filters is not None and not filters.active:
+            filters = None
+        if rerank:
+            depth = max(limit, get_settings().rerank_candidates)
+            candidates = await self._cached_retrieve(query, depth, mode, None, filters)
+            with timed("search.rerank"):
+                matches = await rerank_matches(query, candidates, limit=limit)
+            if snippet is not None:
+                tokens = query_tokens(query)
+                for match in matches:
+                    match["content"] = make_snippet(match["content"], tokens, snippet)
+            return matches
+        return await self._cached_retrieve(query, limit, mode, snippet, filters)
+
+    async def _cached_retrieve(
+        self,
+        query: str,
+        limit: int,
+        mode: SearchMode,
+        snippet: SnippetOptions | None,
+        filters: SearchFilters | None,
+    ) -> list[dict[str, str]]:
+        if self.cache is None:
+            return await self._retrieve(query, limit, mode, snippet, filters)
+        computed = False
+
+        async def compute() -> list[dict[str, str]]:
+            nonlocal computed
+            computed = True
+            return await self._retrieve(query, limit, mode, snippet, filters)
 
-    async def search(self, query: str, limit: int = 5) -> list[dict[str, str]]:
+        key = (normalize_query(query), mode, limit, snippet, filters)
+        matches = await self.cache.get_or_compute(key, compute)
+        note_cache_hit(not computed)
+        return [dict(match) for match in matches]
+
+    async def _retrieve(
+        self,
+        query: str,
+        limit: int,
+        mode: SearchMode,
+        snippet: SnippetOptions | None,
+        filters: SearchFilters | None,
+    ) -> list[dict[str, str]]:
+        options = {"limit": limit, "snippet": snippet, "filters": filters}
+        if mode == "keyword":
+            return await self.search(query, **options)
+        if mode == "hybrid":
+            return await self.search_hybrid(query, **options)
+        return await self.search_by_vector(query, **options)
+
+    async def search(
+        self,
+        query: str,
+        limit: int = 5,
+        *,
+        snippet: SnippetOptions | None = None,
+        filters: SearchFilters | None = None,
+    ) -> list[dict[str, str]]:
         """Keyword-based search over chunk content.
 
-        - Rozbije dopyt na tokeny (slová >= 3 znaky).
-        - Vyberie chunky, ktoré obsahujú aspoň jeden token.
-        - Výsledky zoradí podľa počtu nájdených tokenov (desc), potom podľa indexu chunku.
+        - Rozbije dopyt na tokeny (slová >= 3 znaky, inak všetky slová).
+        - Kandidátov vráti priamo fulltextový index (SQLite FTS5, Postgres tsvector/GIN
+          alebo BM25 index v pamäti) – bez prechodu celého korpusu.
+        - Výsledky sú zoradené podľa BM25 skóre a orezané na ``limit`` už v indexe.
         """
 
-        normalized_query = query.strip().lower()
-        tokens = {t for t in re.split(r"\W+", normalized_query) if len(t) >= 3}
+        tokens = query_tokens(query)
+        hits = await self._keyword_hits(tokens, limit, filters)
+        chunk_ids = [chunk_id for chunk_id, _ in hits]
+        return await self._fetch_chunks(chunk_ids, tokens, snippet, filters)
 
-        stmt = select(DocumentChunk)
-        if tokens:
-            conditions = [
-                func.lower(DocumentChunk.content).contains(token) for token in tokens
-            ]
-            stmt = stmt.where(or_(*conditions))
-        elif normalized_query:
-            stmt = stmt.where(
-                func.lower(DocumentChunk.content).contains(normalized_query)
-            )
-        else:
-            return []
+    async def search_by_vector(
+        self,
+        query: str,
+        limit: int = 5,
+        *,
+        snippet: SnippetOptions | None = None,
+        filters: SearchFilters | None = None,
+    ) -> list[dict[str, str]]:
+        """Vector-based search over chunk embeddings with graceful fallback.
 
-        result = await self.session.execute(stmt)
-        chunks = list(result.scalars().all())
+        pgvector backends rank in SQL via ``l2_distance``; everywhere else the in-process
+        ``VectorIndex`` is used. Keyword search only kicks in when no embeddings exist.
+        """
 
-        def score(chunk: DocumentChunk) -> int:
-            text = chunk.content.lower()
-            return sum(1 for token in tokens if token in text) or 0
+        hits = await self._vector_hits(query, limit, filters)
+        if hits is None:
+            return await self.search(query=query, limit=limit, snippet=snippet, filters=filters)
+        chunk_ids = [chunk_id for chunk_id, _ in hits]
+        return await self._fetch_chunks(chunk_ids, query_tokens(query), snippet, filters)
 
-        chunks.sort(key=lambda c: (-score(c), c.chunk_index))
-        chunks = chunks[:limit]
+    async def search_hybrid(
+        self,
+        query: str,
+        limit: int = 5,
+        *,
+        snippet: SnippetOptions | None = None,
+        filters: SearchFilters | None = None,
+    ) -> list[dict[str, str]]:
+        """Run keyword and vector retrieval concurrently and fuse them with weighted RRF.
 
-        return [
-            {
-                "document_id": str(chunk.document_id),
-                "chunk_index": chunk.chunk_index,
-                "content": chunk.content,
-            }
-            for chunk in chunks
-        ]
+        Each stage over-fetches ``hybrid_candidates`` hits so documents ranked just below
+        the cut-off in one list can still be lifted by the other.
+        """
 
-    async def search_by_vector(self, query: str, limit: int = 5) -> list[dict[str, str]]:
-        """Vector-based search over chunk embeddings with graceful fallback."""
+        settings = get_settings()
+        depth = max(limit, settings.hybrid_candidates)
+        tokens = query_tokens(query)
+        await self._prepare_vector_index()
+        # Resolved up front: the concurrent vector stage must not touch the session.
+        allowed = await self._allowed_chunk_ids(filters)
+        vector_hits, keyword_hits = await asyncio.gather(
+            self._vector_hits(query, depth, filters, concurrent=True, allowed=allowed),
+            self._keyword_hits(tokens, depth, filters),
+        )
+        fused = reciprocal_rank_fusion(
+            [vector_hits or [], keyword_hits],
+            k=settings.hybrid_rrf_k,
+            weights=[settings.hybrid_vector_weight, settings.hybrid_keyword_weight],
+        )
+        chunk_ids = [chunk_id for chunk_id, _ in fused[:limit]]
+        return await self._fetch_chunks(chunk_ids, tokens, snippet, filters)
 
-        embedder = EmbeddingService()
-        query_vector = (await embedder.embed([query]))[0]
+    async def _vector_hits(
+        self,
+        query: str,
+        limit: int,
+        filters: SearchFilters | None = None,
+        *,
+        concurrent: bool = False,
+        allowed: frozenset[UUID] | None = None,
+    ) -> list[Hit] | None:
+        """Nearest chunk ids by L2 distance, or ``None`` when no embeddings are stored.
+
+        With ``concurrent=True`` the stage never touches ``self.session`` so it can run
+        alongside another query on it: pgvector gets its own session and the in-process
+        index search runs in a worker thread. The in-process index then needs the
+        filters already resolved into ``allowed``.
+        """
 
-        try:
-            distance_expr = DocumentChunk.embedding.l2_distance(query_vector)  # type: ignore[attr-defined]
-        except AttributeError:  # pragma: no cover - non-pgvector backends
-            return await self.search(query=query, limit=limit)
+        with timed("search.embed"):
+            query_vector = (await self.embedder.embed_batch([query]))[0]
 
+        with timed("search.vector"):
+            return await self._nearest(query_vector, limit, filters, concurrent, allowed)
+
+    async def _nearest(
+        self,
+        query_vector: np.ndarray,
+        limit: int,
+        filters: SearchFilters | None,
+        concurrent: bool,
+        allowed: frozenset[UUID] | None,
+    ) -> list[Hit] | None:
+        if not _has_pgvector():
+            index = get_vector_index(self.session)
+            if not concurrent:
+                await index.ensure_loaded(self.session)
+            if not len(index):
+                return None
+            if not concurrent:
+                allowed = await self._allowed_chunk_ids(filters)
+            if concurrent:
+                return await asyncio.to_thread(
+                    functools.partial(index.search, query_vector, limit, allowed=allowed)
+                )
+            return index.search(query_vector, limit, allowed=allowed)
+
+        distance_expr = DocumentChunk.embedding.l2_distance(query_vector)  # type: ignore[attr-defined]
         stmt = (
-            select(DocumentChunk)
+            select(DocumentChunk.id, distance_expr.label("distance"))
             .where(DocumentChunk.embedding.isnot(None))
             .order_by(distance_expr)
             .limit(limit)
         )
-        result = await self.session.execute(stmt)
-        return [
-            {
-                "document_id": str(chunk.document_id),
-                "chunk_index": chunk.chunk_index,
-                "content": chunk.content,
-            }
-            for chunk in result.scalars().all()
-        ]
+        if filters is not None:
+            stmt = stmt.where(DocumentChunk.id.in_(filters.searchable_chunk_ids()))
+        if concurrent:
+            async with AsyncSession(self.session.bind) as session:
+                rows = (await session.execute(stmt)).all()
+        else:
+            rows = (await self.session.execute(stmt)).all()
+        return [(row.id, float(row.distance)) for row in rows] or None
+
+    async def _keyword_hits(
+        self, tokens: Sequence[str], limit: int, filters: SearchFilters | None = None
+    ) -> list[Hit]:
+        with timed("search.keyword"):
+            return await keyword_search(self.session, tokens, limit, filters=filters)
+
+    async def _prepare_vector_index(self) -> None:
+        if not _has_pgvector():
+            await get_vector_index(self.session).ensure_loaded(self.session)
+
+    async def _allowed_chunk_ids(self, filters: SearchFilters | None) -> frozenset[UUID] | None:
+        """Chunk ids the in-process vector index may return (pgvector filters in SQL)."""
+
+        if filters is None or _has_pgvector():
+            return None
+        with timed("search.filter"):
+            return await allowed_chunk_ids(self.session, filters)
+
+    async def _fetch_chunks(
+        self,
+        chunk_ids: list[UUID],
+        tokens: Sequence[str] = (),
+        snippet: SnippetOptions | None = None,
+        filters: SearchFilters | None = None,
+    ) -> list[dict[str, str]]:
+        """Load chunks by id, preserving the ranking order of ``chunk_ids``.
+
+        Only the returned columns are selected (never the embedding) and rows come back
+        as plain Core rows, not ORM objects. Copies of the same text (same ``content_hash``)
+        collapse into the best-ranked one.
+
+        With ``filters`` a hit on a chunk outside them stands for a duplicate of it
+        inside them (duplicates are not indexed), and that duplicate is returned.
+        """
+
+        if not chunk_ids:
+            return []
+        rank = {chunk_id: position for position, chunk_id in enumerate(chunk_ids)}
+        stmt = select(
+            DocumentChunk.id,
+            DocumentChunk.document_id,
+            DocumentChunk.chunk_index,
+            DocumentChunk.content,
+            DocumentChunk.content_hash,
+            DocumentChunk.duplicate_of,
+        )
+        if filters is None:
+            stmt = stmt.where(DocumentChunk.id.in_(chunk_ids))
+        else:
+            stmt = stmt.where(
+                or_(DocumentChunk.id.in_(chunk_ids), DocumentChunk.duplicate_of.in_(chunk_ids)),
+                *filters.chunk_clauses(),
+            )
+        # Run on the session's connection: the ORM execution path adds per-row overhead
+        # that buys nothing for a column projection.
+        with timed("search.fetch"):
+            connection = await self.session.connection()
+            rows = (await connection.execute(stmt)).all()
+        chosen: dict[UUID, Any] = {}
+        for row in rows:
+            hit = row.id if row.id in rank else row.duplicate_of
+            if hit not in chosen or row.id == hit:
+                chosen[hit] = row
+        results = []
+        seen: set[str] = set()
+        for row in (chosen[hit] for hit in sorted(chosen, key=rank.__getitem__)):
+            if row.content_hash is not None:
+                if row.content_hash in seen:
+                    continue
+                seen.add(row.content_hash)
+            content = row.content
+            if snippet is not None:
+                content = make_snippet(content, tokens, snippet)
+            results.append(
+                {
+                    "document_id": str(row.document_id),
+                    "chunk_index": row.chunk_index,
+                    "content": content,
+                }
+            )
+        return results
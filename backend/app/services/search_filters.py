@@ -0,0 +1,202 @@
+"""Document filters for search, applied before the vector and keyword stages rank.
+
+The SQL backends (FTS5, tsvector, pgvector) take the restriction as a subquery of
+their ranking statement. The in-process indexes get the resolved set of chunk ids and
+score only those rows. Either way a narrow filter means less ranking work; there is no
+post-filtering of an over-fetched list.
+
+``source``, ``created_at`` and the ``content_type`` meta key (promoted to its own
+column) are indexed columns of ``documents``. Other meta keys are compared through
+JSON extraction, which scans ``documents`` but never ``document_chunks``.
+
+Meta values are compared as text, with JSON scalars written the way ``json.dumps``
+writes them: a stored ``true`` matches the filter value ``True`` or ``"true"``. SQLite
+extracts booleans as ``1``/``0`` and PostgreSQL nulls as SQL ``NULL``, so
+``meta_value_text`` renders a dialect-specific expression that undoes both.
+"""
+
+from __future__ import annotations
+
+import json
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import ColumnElement, Select, String, func, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import aliased
+from sqlalchemy.sql.functions import FunctionElement
+
+from backend.app.models.db.documents import Document, DocumentChunk
+
+# Meta keys with an indexed column of their own on ``documents``.
+PROMOTED_META_COLUMNS = {"content_type": Document.content_type}
+
+
+class meta_value_text(FunctionElement[str]):
+    """Text of ``Document.meta[key]``: strings as they are, other scalars as JSON.
+
+    Built from portable pieces (``->`` / ``->>`` on PostgreSQL, ``json_extract`` on
+    SQLite) that each dialect's compiler below arranges.
+    """
+
+    type = String()
+    inherit_cache = True
+    name = "meta_value_text"
+
+    def __init__(self, key: str) -> None:
+        super().__init__(
+            Document.meta[key],
+            Document.meta[key].as_string(),
+            Document.meta,
+            literal(f"$.{json.dumps(key)}"),
+        )
+
+
+@compiles(meta_value_text)
+def _meta_value_text(element: meta_value_text, compiler: Any, **kw: Any) -> str:
+    value, text, _, _ = (compiler.process(clause, **kw) for clause in element.clauses)
+    return f"CASE WHEN json_typeof({value}) = 'null' THEN 'null' ELSE {text} END"
+
+
+@compiles(meta_value_text, "sqlite")
+def _meta_value_text_sqlite(element: meta_value_text, compiler: Any, **kw: Any) -> str:
+    _, text, meta, path = (compiler.process(clause, **kw) for clause in element.clauses)
+    return (
+        f"CASE json_type({meta}, {path}) WHEN 'true' THEN 'true' WHEN 'false' THEN 'false' "
+        f"WHEN 'null' THEN 'null' ELSE {text} END"
+    )
+
+
+def _meta_filter_value(value: Any) -> str:
+    if isinstance(value, str):
+        return value
+    if value is None or isinstance(value, (bool, int, float)):
+        return json.dumps(value)
+    raise ValueError("Filter meta values must be strings, numbers, booleans or null.")
+
+
+def _naive_utc(value: datetime | None) -> datetime | None:
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+@dataclass(frozen=True)
+class SearchFilters:
+    """Conditions a document must meet for its chunks to be searched; all must hold.
+
+    Values are normalised into sorted tuples, so equal filters hash alike and can be
+    part of a query-cache key. Meta values are compared as text, non-strings written as
+    JSON (see the module docstring). Aware datetimes are converted to naive UTC like
+    ``Document.created_at``; ``created_before`` is exclusive.
+    """
+
+    document_ids: tuple[UUID, ...] = ()
+    sources: tuple[str, ...] = ()
+    meta: tuple[tuple[str, str], ...] = ()
+    created_after: datetime | None = None
+    created_before: datetime | None = None
+
+    def __post_init__(self) -> None:
+        meta: Any = self.meta
+        items = meta.items() if isinstance(meta, Mapping) else meta
+        fields = {
+            "document_ids": tuple(sorted({UUID(str(value)) for value in self.document_ids})),
+            "sources": tuple(sorted(set(self.sources))),
+            "meta": tuple(sorted({(str(key), _meta_filter_value(value)) for key, value in items})),
+            "created_after": _naive_utc(self.created_after),
+            "created_before": _naive_utc(self.created_before),
+        }
+        for name, value in fields.items():
+            object.__setattr__(self, name, value)
+
+    @classmethod
+    def from_mapping(cls, data: Mapping[str, Any]) -> SearchFilters:
+        """Build filters from loosely typed input such as an agent tool call.
+
+        Raises ``ValueError`` for values that cannot be parsed; a filter is never
+        dropped, since that would widen the search.
+        """
+
+        def strings(value: Any) -> Iterable[str]:
+            if value is None:
+                return ()
+            return (value,) if isinstance(value, str) else tuple(str(item) for item in value)
+
+        def moment(value: Any) -> datetime | None:
+            if value is None or isinstance(value, datetime):
+                return value
+            return datetime.fromisoformat(str(value))
+
+        meta = data.get("meta") or {}
+        if not isinstance(meta, Mapping):
+            raise ValueError("Filter 'meta' must be an object of key/value pairs.")
+        return cls(
+            document_ids=tuple(UUID(value) for value in strings(data.get("document_ids"))),
+            sources=tuple(strings(data.get("sources"))),
+            meta=tuple(meta.items()),
+            created_after=moment(data.get("created_after")),
+            created_before=moment(data.get("created_before")),
+        )
+
+    @property
+    def active(self) -> bool:
+        return bool(
+            self.document_ids
+            or self.sources
+            or self.meta
+            or self.created_after is not None
+            or self.created_before is not None
+        )
+
+    def document_clauses(self) -> list[ColumnElement[bool]]:
+        """Conditions on ``documents`` columns (the document id filter excluded)."""
+
+        clauses: list[ColumnElement[bool]] = []
+        if self.sources:
+            clauses.append(Document.source.in_(self.sources))
+        for key, value in self.meta:
+            column = PROMOTED_META_COLUMNS.get(key)
+            if column is not None:
+                clauses.append(column == value)
+            else:
+                clauses.append(meta_value_text(key) == value)
+        if self.created_after is not None:
+            clauses.append(Document.created_at >= self.created_after)
+        if self.created_before is not None:
+            clauses.append(Document.created_at < self.created_before)
+        return clauses
+
+    def chunk_clauses(self, chunk: Any = DocumentChunk) -> list[ColumnElement[bool]]:
+        """Conditions restricting ``chunk`` rows (or an alias) to matching documents."""
+
+        clauses: list[ColumnElement[bool]] = []
+        if self.document_ids:
+            clauses.append(chunk.document_id.in_(self.document_ids))
+        document_clauses = self.document_clauses()
+        if document_clauses:
+            clauses.append(chunk.document_id.in_(select(Document.id).where(*document_clauses)))
+        return clauses
+
+    def searchable_chunk_ids(self) -> Select[tuple[UUID]]:
+        """Ids of the indexed chunks holding the text of the matching documents.
+
+        Chunks stored as duplicates are not indexed, so their originals stand in for
+        them; ``SearchService`` maps such hits back to the duplicate when fetching.
+        """
+
+        chunk = aliased(DocumentChunk)
+        return select(func.coalesce(chunk.duplicate_of, chunk.id)).where(
+            *self.chunk_clauses(chunk)
+        )
+
+
+async def allowed_chunk_ids(session: AsyncSession, filters: SearchFilters) -> frozenset[UUID]:
+    """Resolve ``filters`` to chunk ids for the in-process indexes."""
+
+    result = await session.execute(filters.searchable_chunk_ids())
+    return frozenset(result.scalars())
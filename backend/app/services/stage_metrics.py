@@ -0,0 +1,132 @@
+"""Latency histograms per pipeline stage, plus a per-run breakdown of the same stages.
+
+Code wraps each stage in ``timed("search.embed")`` (or reports a measured duration
+with ``record``). The duration goes into this worker's histogram for that stage, which
+``GET /health/stages`` exposes. Inside ``trace_stages()`` it is also added to the
+returned ``StageTrace``, so a caller can attribute its own latency. The trace lives in
+a context variable, so concurrent tasks that each open one do not mix their stages.
+"""
+
+from __future__ import annotations
+
+import time
+from bisect import bisect_left
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any
+
+# Upper bucket bounds in milliseconds; one more bucket counts everything slower.
+_BUCKET_BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000)
+
+
+class StageHistogram:
+    """Fixed-bucket latency histogram; quantiles are reported as bucket upper bounds."""
+
+    def __init__(self, bounds: tuple[float, ...] = _BUCKET_BOUNDS_MS) -> None:
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, duration_ms: float) -> None:
+        self.counts[bisect_left(self.bounds, duration_ms)] += 1
+        self.count += 1
+        self.total_ms += duration_ms
+        self.max_ms = max(self.max_ms, float(duration_ms))
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return float(self.bounds[index]) if index < len(self.bounds) else self.max_ms
+        return self.max_ms
+
+    def snapshot(self) -> dict[str, Any]:
+        labels = [f"le_{bound}" for bound in self.bounds] + ["inf"]
+        return {
+            "count": self.count,
+            "mean_ms": self.total_ms / self.count if self.count else 0.0,
+            "max_ms": self.max_ms,
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+            "p99_ms": self.quantile(0.99),
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+class StageMetrics:
+    """Histograms keyed by stage name, created on first use."""
+
+    def __init__(self) -> None:
+        self._histograms: dict[str, StageHistogram] = {}
+
+    def observe(self, stage: str, duration_ms: float) -> None:
+        histogram = self._histograms.get(stage)
+        if histogram is None:
+            histogram = self._histograms[stage] = StageHistogram()
+        histogram.observe(duration_ms)
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        return {stage: self._histograms[stage].snapshot() for stage in sorted(self._histograms)}
+
+
+@lru_cache
+def get_stage_metrics() -> StageMetrics:
+    """Return this worker's stage histograms."""
+
+    return StageMetrics()
+
+
+@dataclass
+class StageTrace:
+    """Milliseconds spent per stage within one ``trace_stages()`` block."""
+
+    stages: dict[str, float] = field(default_factory=dict)
+    cache_hit: bool | None = None
+
+
+_current_trace: ContextVar[StageTrace | None] = ContextVar("stage_trace", default=None)
+
+
+@contextmanager
+def trace_stages() -> Iterator[StageTrace]:
+    """Collect the stages timed in this block (and in tasks it starts) into a trace."""
+
+    trace = StageTrace()
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+def record(stage: str, duration_ms: float) -> None:
+    get_stage_metrics().observe(stage, duration_ms)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.stages[stage] = trace.stages.get(stage, 0.0) + duration_ms
+
+
+def note_cache_hit(hit: bool) -> None:
+    """Flag the current trace as served from (or missing) a cache."""
+
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.cache_hit = hit
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, (time.perf_counter() - start) * 1000)
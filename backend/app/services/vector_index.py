@@ -0,0 +1,339 @@
+"""In-process approximate nearest neighbour index for non-pgvector backends."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+from collections.abc import Collection, Sequence
+from typing import Any, Literal
+from uuid import UUID
+from weakref import WeakKeyDictionary
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.core.config import get_settings
+from backend.app.models.db.documents import DocumentChunk
+from backend.app.services.quantization import hamming_distances, sign_codes
+from backend.app.services.vector_store import MmapVectorStore
+
+logger = logging.getLogger(__name__)
+
+_LOAD_BATCH_SIZE = 1000
+_KMEANS_ITERATIONS = 10
+_KMEANS_SAMPLES_PER_LIST = 64
+
+VectorQuantization = Literal["none", "binary"]
+
+
+class VectorIndex:
+    """IVF-flat index over a contiguous float32 matrix.
+
+    Small corpora are scanned exhaustively with a single matrix-vector product. Once the
+    index holds ``brute_force_threshold`` vectors it trains k-means centroids and only
+    scans the ``nprobe`` inverted lists closest to the query. Distances are L2, matching
+    pgvector's ``l2_distance`` ordering.
+
+    With ``quantization="binary"`` every vector also gets a 1-bit-per-dimension sign
+    code. Searches first rank candidates by Hamming distance over those codes (32x less
+    memory traffic than the float scan) and only rescore the best ``rescore_factor * k``
+    at full precision.
+    """
+
+    def __init__(
+        self,
+        *,
+        nprobe: int = 8,
+        brute_force_threshold: int = 4096,
+        quantization: VectorQuantization = "none",
+        rescore_factor: int = 8,
+    ) -> None:
+        self.nprobe = max(1, nprobe)
+        self.brute_force_threshold = max(1, brute_force_threshold)
+        self.quantization = quantization
+        self.rescore_factor = max(1, rescore_factor)
+        self.dim: int | None = None
+        self.loaded = False
+
+        self._matrix = np.empty((0, 0), dtype=np.float32)
+        self._sq_norms = np.empty(0, dtype=np.float32)
+        self._alive = np.empty(0, dtype=bool)
+        self._codes: np.ndarray | None = None
+        self._size = 0
+        self._ids: list[UUID] = []
+        self._row_of: dict[UUID, int] = {}
+
+        self._centroids: np.ndarray | None = None
+        self._assignments = np.empty(0, dtype=np.int32)
+        self._lists: list[list[int]] = []
+        self._list_arrays: dict[int, np.ndarray] = {}
+        self._trained_size = 0
+
+        self._lock = threading.RLock()
+        self._load_lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self._row_of)
+
+    async def ensure_loaded(self, session: AsyncSession) -> None:
+        """Populate the index from ``DocumentChunk.embedding`` on first use."""
+
+        if self.loaded:
+            return
+        async with self._load_lock:
+            if self.loaded:
+                return
+            stmt = select(DocumentChunk.id, DocumentChunk.embedding).where(
+                DocumentChunk.embedding.isnot(None)
+            )
+            result = await session.stream(stmt)
+            async for rows in result.partitions(_LOAD_BATCH_SIZE):
+                self.add([row.id for row in rows], [row.embedding for row in rows])
+            self.loaded = True
+            logger.info("Vector index loaded with %s vectors", len(self))
+
+    def add(self, ids: Sequence[UUID], vectors: Sequence[Sequence[float]] | np.ndarray) -> None:
+        """Append vectors; vectors whose dimension differs from the index are skipped."""
+
+        with self._lock:
+            new_ids, batch = self._filter_batch(ids, vectors)
+            if not new_ids:
+                return
+
+            self._reserve(self._size + len(new_ids))
+            start, end = self._size, self._size + len(new_ids)
+            self._matrix[start:end] = batch
+            self._sq_norms[start:end] = np.einsum("ij,ij->i", batch, batch)
+            self._alive[start:end] = True
+            if self._codes is not None:
+                self._codes[start:end] = sign_codes(batch)
+            for offset, chunk_id in enumerate(new_ids):
+                self._row_of[chunk_id] = start + offset
+            self._ids.extend(new_ids)
+            self._size = end
+
+            if self._centroids is not None:
+                self._assign_rows(start, end)
+            if self._needs_training():
+                self._train()
+
+    def remove(self, ids: Sequence[UUID]) -> None:
+        """Tombstone vectors so they are never returned again."""
+
+        with self._lock:
+            for chunk_id in ids:
+                row = self._row_of.pop(chunk_id, None)
+                if row is not None:
+                    self._alive[row] = False
+
+    def search(
+        self,
+        query: Sequence[float] | np.ndarray,
+        k: int,
+        *,
+        allowed: Collection[UUID] | None = None,
+    ) -> list[tuple[UUID, float]]:
+        """Return up to ``k`` ``(chunk_id, l2_distance)`` pairs, nearest first.
+
+        With ``allowed`` only those chunks are candidates and they are scored exactly,
+        without probing the inverted lists: a filter usually keeps a few topics, which
+        the lists nearest the query may not contain at all.
+        """
+
+        with self._lock:
+            if k <= 0 or not self._row_of or self.dim is None:
+                return []
+            q = np.asarray(query, dtype=np.float32).reshape(-1)
+            if q.shape[0] != self.dim:
+                return []
+
+            if allowed is None:
+                rows = self._candidate_rows(q)
+            else:
+                rows = self._allowed_rows(allowed)
+                if not rows.size:
+                    return []
+            if self._codes is not None:
+                rows = self._shortlist(q, rows, k)
+            if rows is None:
+                candidates = self._matrix[: self._size]
+                sq_norms = self._sq_norms[: self._size]
+                alive = self._alive[: self._size]
+            else:
+                candidates = self._matrix[rows]
+                sq_norms = self._sq_norms[rows]
+                alive = self._alive[rows]
+
+            distances = sq_norms - 2.0 * (candidates @ q) + float(q @ q)
+            distances[~alive] = np.inf
+            k = min(k, distances.shape[0])
+            top = np.argpartition(distances, k - 1)[:k]
+            top = top[np.argsort(distances[top])]
+
+            results: list[tuple[UUID, float]] = []
+            for position in top:
+                distance = distances[position]
+                if not np.isfinite(distance):
+                    break
+                row = int(position) if rows is None else int(rows[position])
+                results.append((self._ids[row], float(np.sqrt(max(distance, 0.0)))))
+            return results
+
+    def _filter_batch(
+        self, ids: Sequence[UUID], vectors: Sequence[Sequence[float]] | np.ndarray
+    ) -> tuple[list[UUID], np.ndarray]:
+        rows = [
+            (chunk_id, vector)
+            for chunk_id, vector in zip(ids, vectors)
+            if vector is not None and chunk_id not in self._row_of
+        ]
+        if not rows:
+            return [], np.empty((0, self.dim or 0), dtype=np.float32)
+
+        if self.dim is None:
+            self.dim = len(rows[0][1])
+            self._matrix = np.empty((0, self.dim), dtype=np.float32)
+            if self.quantization == "binary":
+                self._codes = np.empty((0, -(-self.dim // 64)), dtype=np.uint64)
+        matching = [(chunk_id, vector) for chunk_id, vector in rows if len(vector) == self.dim]
+        if len(matching) != len(rows):
+            logger.warning(
+                "Skipping %s vectors whose dimension differs from the index (%s)",
+                len(rows) - len(matching),
+                self.dim,
+            )
+        if not matching:
+            return [], np.empty((0, self.dim), dtype=np.float32)
+
+        batch = np.asarray([vector for _, vector in matching], dtype=np.float32)
+        return [chunk_id for chunk_id, _ in matching], batch
+
+    def _reserve(self, capacity: int) -> None:
+        if capacity <= self._matrix.shape[0]:
+            return
+        new_capacity = max(capacity, 2 * self._matrix.shape[0], 256)
+        matrix = np.empty((new_capacity, self.dim or 0), dtype=np.float32)
+        matrix[: self._size] = self._matrix[: self._size]
+        self._matrix = matrix
+        self._sq_norms = np.resize(self._sq_norms, new_capacity)
+        self._alive = np.resize(self._alive, new_capacity)
+        self._alive[self._size :] = False
+        if self._codes is not None:
+            codes = np.zeros((new_capacity, self._codes.shape[1]), dtype=np.uint64)
+            codes[: self._size] = self._codes[: self._size]
+            self._codes = codes
+        self._assignments = np.resize(self._assignments, new_capacity)
+
+    def _needs_training(self) -> bool:
+        if self._size < self.brute_force_threshold:
+            return False
+        return self._centroids is None or self._size >= 4 * self._trained_size
+
+    def _train(self) -> None:
+        nlist = max(1, int(np.sqrt(self._size)))
+        rng = np.random.default_rng(0)
+        sample_size = min(self._size, nlist * _KMEANS_SAMPLES_PER_LIST)
+        sample = self._matrix[rng.choice(self._size, size=sample_size, replace=False)]
+        centroids = sample[rng.choice(sample_size, size=nlist, replace=False)].copy()
+
+        for _ in range(_KMEANS_ITERATIONS):
+            labels = self._nearest_centroids(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            counts = np.bincount(labels, minlength=nlist).astype(np.float32)
+            nonempty = counts > 0
+            centroids[nonempty] = sums[nonempty] / counts[nonempty, None]
+
+        self._centroids = centroids
+        self._lists = [[] for _ in range(nlist)]
+        self._list_arrays = {}
+        self._assign_rows(0, self._size)
+        self._trained_size = self._size
+        logger.info("Vector index trained %s inverted lists over %s vectors", nlist, self._size)
+
+    def _assign_rows(self, start: int, end: int) -> None:
+        assert self._centroids is not None
+        labels = self._nearest_centroids(self._matrix[start:end], self._centroids)
+        self._assignments[start:end] = labels
+        for row, label in enumerate(labels.tolist(), start=start):
+            self._lists[label].append(row)
+            self._list_arrays.pop(label, None)
+
+    def _allowed_rows(self, allowed: Collection[UUID]) -> np.ndarray:
+        rows = (self._row_of.get(chunk_id) for chunk_id in allowed)
+        return np.fromiter((row for row in rows if row is not None), dtype=np.int64)
+
+    def _candidate_rows(self, q: np.ndarray) -> np.ndarray | None:
+        if self._centroids is None:
+            return None
+        nprobe = min(self.nprobe, self._centroids.shape[0])
+        centroid_distances = np.einsum("ij,ij->i", self._centroids, self._centroids) - 2.0 * (
+            self._centroids @ q
+        )
+        probes = np.argpartition(centroid_distances, nprobe - 1)[:nprobe]
+        arrays = [self._list_array(int(label)) for label in probes]
+        rows = np.concatenate(arrays) if arrays else np.empty(0, dtype=np.int64)
+        return rows if rows.size else None
+
+    def _shortlist(self, q: np.ndarray, rows: np.ndarray | None, k: int) -> np.ndarray | None:
+        """Narrow the candidate rows to those closest to ``q`` in Hamming distance."""
+
+        assert self._codes is not None
+        count = self._size if rows is None else rows.shape[0]
+        keep = k * self.rescore_factor
+        if count <= keep:
+            return rows
+        codes = self._codes[: self._size] if rows is None else self._codes[rows]
+        alive = self._alive[: self._size] if rows is None else self._alive[rows]
+        distances = hamming_distances(codes, sign_codes(q)[0])
+        distances[~alive] = np.iinfo(np.int32).max
+        best = np.argpartition(distances, keep - 1)[:keep]
+        return best if rows is None else rows[best]
+
+    def _list_array(self, label: int) -> np.ndarray:
+        array = self._list_arrays.get(label)
+        if array is None:
+            array = np.asarray(self._lists[label], dtype=np.int64)
+            self._list_arrays[label] = array
+        return array
+
+    @staticmethod
+    def _nearest_centroids(points: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        scores = points @ centroids.T
+        scores -= 0.5 * np.einsum("ij,ij->i", centroids, centroids)
+        return np.argmax(scores, axis=1).astype(np.int32)
+
+
+_indexes: WeakKeyDictionary[Engine, VectorIndex] = WeakKeyDictionary()
+_stores: dict[str, MmapVectorStore] = {}
+
+
+def get_vector_index(session: AsyncSession) -> VectorIndex | MmapVectorStore:
+    """Return the process-wide vector index for the session's database engine.
+
+    With ``VECTOR_STORE_PATH`` set, this is the memory-mapped store shared by all worker
+    processes instead of a per-process in-memory index.
+    """
+
+    store_path = get_settings().vector_store_path
+    if store_path:
+        store = _stores.get(store_path)
+        if store is None:
+            store = _stores[store_path] = MmapVectorStore(store_path)
+        return store
+
+    engine: Any = session.get_bind()
+    index = _indexes.get(engine)
+    if index is None:
+        settings = get_settings()
+        index = VectorIndex(
+            nprobe=settings.vector_index_nprobe,
+            brute_force_threshold=settings.vector_index_brute_force_threshold,
+            quantization=settings.vector_index_quantization,
+            rescore_factor=settings.vector_index_rescore_factor,
+        )
+        _indexes[engine] = index
+    return index
@@ -0,0 +1,422 @@
+"""Memory-mapped, file-backed embedding matrix for brute-force vector search.
+
+Layout under ``VECTOR_STORE_PATH``::
+
+    CURRENT              name of the active generation directory
+    LOCK                 flock target serialising writers across processes
+    gen-<id>/meta.json   {"dim": ...}
+    gen-<id>/vectors.f32 contiguous little-endian float32 rows
+    gen-<id>/ids.u128    16-byte chunk UUID per row (row i of vectors.f32)
+    gen-<id>/deleted.i64 tombstoned row numbers
+
+Writers append vectors before ids under an exclusive ``flock``, so a row only becomes
+visible once its id is on disk. Readers map the files read-only with ``np.memmap``:
+every uvicorn worker shares the same page-cache pages instead of holding its own copy,
+and picks up rows and tombstones written by other processes on its next search. A
+search is one matrix-vector product over the mapping plus ``argpartition``.
+
+``rebuild_vector_store`` writes a fresh generation from the database and switches
+``CURRENT`` atomically; readers move over on their next search.
+"""
+
+from __future__ import annotations
+
+import fcntl
+import json
+import logging
+import os
+import shutil
+import threading
+import uuid
+from collections.abc import Collection, Iterator, Sequence
+from contextlib import contextmanager
+from pathlib import Path
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import exists, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.models.db.documents import DocumentChunk
+
+logger = logging.getLogger(__name__)
+
+_ID_DTYPE = np.dtype("V16")
+_ROW_DTYPE = np.dtype("<i8")
+_VECTOR_DTYPE = np.dtype("<f4")
+_LOAD_BATCH_SIZE = 1000
+
+Row = tuple[UUID, np.ndarray]
+
+
+def _size(path: Path) -> int:
+    try:
+        return path.stat().st_size
+    except FileNotFoundError:
+        return 0
+
+
+class _Generation:
+    """One generation directory: appends (under the store lock) and read-only mappings."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.ids = np.empty(0, dtype=_ID_DTYPE)
+        self.matrix = np.empty((0, 0), dtype=np.float32)
+        self.rows = 0
+        self._inode: int | None = None
+        self._dim: int | None = None
+
+    @property
+    def dim(self) -> int | None:
+        # Fixed once written, so only an unset dimension is looked up again.
+        if self._dim is None:
+            try:
+                self._dim = int(json.loads((self.path / "meta.json").read_text())["dim"])
+            except FileNotFoundError:
+                return None
+        return self._dim
+
+    def set_dim(self, dim: int) -> None:
+        (self.path / "meta.json").write_text(json.dumps({"dim": dim}))
+        self._dim = dim
+
+    def stored_rows(self) -> int:
+        return _size(self.path / "ids.u128") // _ID_DTYPE.itemsize
+
+    def remap(self) -> bool:
+        """Map rows appended since the last call; ``True`` when anything changed."""
+
+        ids_path = self.path / "ids.u128"
+        try:
+            stat = ids_path.stat()
+        except FileNotFoundError:
+            return False
+        rows = stat.st_size // _ID_DTYPE.itemsize
+        if rows == self.rows and stat.st_ino == self._inode:
+            return False
+        dim = self.dim
+        if dim is None:
+            return False
+        if rows:
+            try:
+                ids = np.memmap(ids_path, dtype=_ID_DTYPE, mode="r", shape=(rows,))
+                matrix = np.memmap(
+                    self.path / "vectors.f32", dtype=_VECTOR_DTYPE, mode="r", shape=(rows, dim)
+                )
+            except FileNotFoundError:  # removed by a rebuild; CURRENT has moved on
+                return False
+            self.ids, self.matrix = ids, matrix
+        self._inode = stat.st_ino
+        self.rows = rows
+        return True
+
+    def append(self, rows: Sequence[Row]) -> None:
+        """Write rows after the last complete id; callers hold the store's write lock."""
+
+        dim = self.dim
+        assert dim is not None
+        start = self.stored_rows()
+        matrix = np.ascontiguousarray([vector for _, vector in rows], dtype=_VECTOR_DTYPE)
+        ids = b"".join(chunk_id.bytes for chunk_id, _ in rows)
+        # Positional writes (no O_APPEND): leftovers of an interrupted append are overwritten.
+        _write_at(self.path / "vectors.f32", matrix.tobytes(), start * dim * _VECTOR_DTYPE.itemsize)
+        _write_at(self.path / "ids.u128", ids, start * _ID_DTYPE.itemsize)
+
+    def tombstones(self, offset: int = 0) -> np.ndarray:
+        path = self.path / "deleted.i64"
+        size = _size(path)
+        size -= size % _ROW_DTYPE.itemsize
+        if size <= offset:
+            return np.empty(0, dtype=_ROW_DTYPE)
+        with open(path, "rb") as handle:
+            handle.seek(offset)
+            return np.frombuffer(handle.read(size - offset), dtype=_ROW_DTYPE)
+
+    def add_tombstones(self, rows: np.ndarray) -> None:
+        with open(self.path / "deleted.i64", "ab") as handle:
+            handle.write(rows.astype(_ROW_DTYPE).tobytes())
+
+
+def _write_at(path: Path, data: bytes, offset: int) -> None:
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT, 0o644)
+    try:
+        os.pwrite(fd, data, offset)
+    finally:
+        os.close(fd)
+
+
+class MmapVectorStore:
+    """Persistent brute-force L2 index with the same interface as ``VectorIndex``."""
+
+    # Always writable: rows added by any process are persisted, not just cached.
+    loaded = True
+
+    def __init__(self, path: str | os.PathLike[str]) -> None:
+        self.root = Path(path)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._checked_database = False
+        self._generation: _Generation | None = None
+        # ``CURRENT`` as last read, keyed by its inode and mtime (it is replaced to switch).
+        self._pointer: tuple[tuple[int, int], str] | None = None
+        # Per-process state derived from the mapping: squared norms and liveness.
+        self._sq_norms = np.empty(0, dtype=np.float32)
+        self._alive = np.empty(0, dtype=bool)
+        self._live = 0
+        self._tombstones_read = 0
+
+    @property
+    def dim(self) -> int | None:
+        return self._generation.dim if self._generation is not None else None
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return self._live
+
+    async def ensure_loaded(self, session: AsyncSession) -> None:
+        """Warn once when the store is empty although the database has embeddings."""
+
+        if self._checked_database:
+            return
+        self._checked_database = True
+        if len(self):
+            return
+        stmt = select(exists().where(DocumentChunk.embedding.isnot(None)))
+        if (await session.execute(stmt)).scalar():
+            logger.warning(
+                "Vector store %s is empty but the database has embeddings; "
+                "rebuild it with scripts/build_vector_store.py",
+                self.root,
+            )
+
+    def add(self, ids: Sequence[UUID], vectors: Sequence[Sequence[float]] | np.ndarray) -> None:
+        """Append vectors; vectors whose dimension differs from the store are skipped."""
+
+        rows = [
+            (chunk_id, np.asarray(vector, dtype=np.float32).reshape(-1))
+            for chunk_id, vector in zip(ids, vectors)
+            if vector is not None
+        ]
+        if not rows:
+            return
+        with self._lock, self.write_lock():
+            generation = self._current(create=True)
+            assert generation is not None
+            _append_matching(generation, rows)
+
+    def remove(self, ids: Sequence[UUID]) -> None:
+        """Tombstone every live row holding one of ``ids``."""
+
+        if not ids:
+            return
+        with self._lock, self.write_lock():
+            self._refresh()
+            generation = self._generation
+            if generation is None or not generation.rows:
+                return
+            targets = np.frombuffer(b"".join(chunk_id.bytes for chunk_id in ids), _ID_DTYPE)
+            rows = np.flatnonzero(np.isin(generation.ids, targets) & self._alive)
+            if rows.size:
+                generation.add_tombstones(rows)
+                self._alive[rows] = False
+                self._live -= rows.size
+                self._tombstones_read += rows.size * _ROW_DTYPE.itemsize
+
+    def search(
+        self,
+        query: Sequence[float] | np.ndarray,
+        k: int,
+        *,
+        allowed: Collection[UUID] | None = None,
+    ) -> list[tuple[UUID, float]]:
+        """Return up to ``k`` ``(chunk_id, l2_distance)`` pairs, nearest first.
+
+        With ``allowed`` only the live rows of those chunks are scored.
+        """
+
+        with self._lock:
+            self._refresh()
+            generation = self._generation
+            if k <= 0 or generation is None or not generation.rows:
+                return []
+            q = np.asarray(query, dtype=np.float32).reshape(-1)
+            if q.shape[0] != generation.matrix.shape[1]:
+                return []
+
+            if allowed is None:
+                rows = None
+                distances = self._sq_norms - 2.0 * (generation.matrix @ q) + float(q @ q)
+                distances[~self._alive] = np.inf
+            else:
+                if not allowed:
+                    return []
+                targets = np.frombuffer(b"".join(chunk_id.bytes for chunk_id in allowed), _ID_DTYPE)
+                rows = np.flatnonzero(np.isin(generation.ids, targets) & self._alive)
+                if not rows.size:
+                    return []
+                candidates = generation.matrix[rows]
+                distances = self._sq_norms[rows] - 2.0 * (candidates @ q) + float(q @ q)
+            k = min(k, distances.shape[0])
+            top = np.argpartition(distances, k - 1)[:k]
+            top = top[np.argsort(distances[top])]
+            found = top if rows is None else rows[top]
+            return [
+                (UUID(bytes=generation.ids[row].tobytes()), float(np.sqrt(max(distance, 0.0))))
+                for row, distance in zip(found.tolist(), distances[top].tolist())
+                if np.isfinite(distance)
+            ]
+
+    @contextmanager
+    def write_lock(self) -> Iterator[None]:
+        """Exclusive across processes; held for appends, tombstones and generation switches."""
+
+        with open(self.root / "LOCK", "a") as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _current(self, *, create: bool = False) -> _Generation | None:
+        pointer = self.root / "CURRENT"
+        try:
+            stat = pointer.stat()
+            key = (stat.st_ino, stat.st_mtime_ns)
+            if self._pointer is None or self._pointer[0] != key:
+                self._pointer = key, pointer.read_text().strip()
+            name = self._pointer[1]
+        except FileNotFoundError:
+            if not create:
+                return None
+            name = new_generation(self.root).path.name
+            switch_generation(self.root, name)
+        if self._generation is None or self._generation.path.name != name:
+            return _Generation(self.root / name)
+        return self._generation
+
+    def _refresh(self) -> None:
+        """Follow rows, tombstones and generation switches made by any process."""
+
+        generation = self._current()
+        if generation is None:
+            return
+        if generation is not self._generation:
+            self._generation = generation
+            self._sq_norms = np.empty(0, dtype=np.float32)
+            self._alive = np.empty(0, dtype=bool)
+            self._live = 0
+            self._tombstones_read = 0
+        previous = self._sq_norms.shape[0]
+        if generation.remap() and generation.rows > previous:
+            new = generation.matrix[previous:]
+            self._sq_norms = np.concatenate([self._sq_norms, np.einsum("ij,ij->i", new, new)])
+            self._alive = np.concatenate(
+                [self._alive, np.ones(generation.rows - previous, dtype=bool)]
+            )
+            self._live += generation.rows - previous
+        dead = generation.tombstones(self._tombstones_read)
+        if dead.size:
+            rows = np.unique(dead[dead < self._alive.shape[0]])
+            rows = rows[self._alive[rows]]
+            self._alive[rows] = False
+            self._live -= rows.size
+            self._tombstones_read += dead.size * _ROW_DTYPE.itemsize
+
+
+def _append_matching(generation: _Generation, rows: Sequence[Row]) -> None:
+    dim = generation.dim
+    if dim is None:
+        dim = rows[0][1].shape[0]
+        generation.set_dim(dim)
+    matching = [(chunk_id, vector) for chunk_id, vector in rows if vector.shape[0] == dim]
+    if len(matching) != len(rows):
+        logger.warning(
+            "Skipping %s vectors whose dimension differs from the store (%s)",
+            len(rows) - len(matching),
+            dim,
+        )
+    if matching:
+        generation.append(matching)
+
+
+def new_generation(root: Path) -> _Generation:
+    path = root / f"gen-{uuid.uuid4().hex[:12]}"
+    path.mkdir()
+    return _Generation(path)
+
+
+def switch_generation(root: Path, name: str) -> None:
+    pointer = root / f"CURRENT.{os.getpid()}.tmp"
+    pointer.write_text(name)
+    os.replace(pointer, root / "CURRENT")
+
+
+async def rebuild_vector_store(
+    session: AsyncSession, path: str | os.PathLike[str], *, batch_size: int = _LOAD_BATCH_SIZE
+) -> int:
+    """Write every stored embedding into a new generation and make it current.
+
+    The database is streamed without holding the write lock; rows appended to or
+    tombstoned in the old generation meanwhile are carried over before the switch.
+    Returns the number of live vectors.
+    """
+
+    store = MmapVectorStore(path)
+    with store.write_lock():
+        previous = store._current()
+        start_rows = previous.stored_rows() if previous else 0
+        start_tombstones = len(previous.tombstones()) if previous else 0
+
+    generation = new_generation(store.root)
+    seen: set[bytes] = set()
+    stmt = select(DocumentChunk.id, DocumentChunk.embedding).where(
+        DocumentChunk.embedding.isnot(None)
+    )
+    result = await session.stream(stmt)
+    async for batch in result.partitions(batch_size):
+        rows = [(row.id, np.asarray(row.embedding, dtype=np.float32)) for row in batch]
+        _append_matching(generation, rows)
+        seen.update(chunk_id.bytes for chunk_id, _ in rows)
+
+    with store.write_lock():
+        if previous is not None:
+            _carry_over(previous, generation, start_rows, start_tombstones, seen)
+        switch_generation(store.root, generation.path.name)
+    if previous is not None:
+        # Open mappings keep working on POSIX; readers remap to the new generation.
+        shutil.rmtree(previous.path, ignore_errors=True)
+
+    count = len(MmapVectorStore(store.root))
+    logger.info("Vector store %s rebuilt with %s vectors", store.root, count)
+    return count
+
+
+def _carry_over(
+    previous: _Generation,
+    generation: _Generation,
+    start_rows: int,
+    start_tombstones: int,
+    seen: set[bytes],
+) -> None:
+    """Copy writes that reached ``previous`` during a rebuild into ``generation``."""
+
+    previous.remap()
+    late = [
+        (UUID(bytes=previous.ids[row].tobytes()), np.asarray(previous.matrix[row]))
+        for row in range(start_rows, previous.rows)
+        if previous.ids[row].tobytes() not in seen
+    ]
+    if late:
+        _append_matching(generation, late)
+
+    dead_rows = previous.tombstones()[start_tombstones:]
+    dead_rows = dead_rows[dead_rows < previous.rows]
+    if not dead_rows.size:
+        return
+    generation.remap()
+    if generation.rows:
+        doomed = np.flatnonzero(np.isin(generation.ids, previous.ids[dead_rows]))
+        if doomed.size:
+            generation.add_tombstones(doomed)
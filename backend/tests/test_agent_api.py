@@ -42,4 +42,45 @@ async def test_agent_execute_uses_document_search_and_returns_steps(db_session,
     assert "plan" in kinds
     assert "tool_call" in kinds
     assert "answer" in kinds
+    assert payload["usage"]["duration_ms"] > 0
+    assert payload["usage"]["tokens_out"] == payload["steps"][-1]["tokens_out"] > 0
 
+
+
+@pytest.mark.asyncio
+async def test_agent_execute_streams_steps_and_tokens(db_session, monkeypatch):
+    import json
+
+    monkeypatch.setenv("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+    config_module.get_settings.cache_clear()
+
+    app = create_app()
+
+    async def _override_db():
+        yield db_session
+
+    app.dependency_overrides[get_db] = _override_db
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://testserver") as client:
+        files = {"file": ("agent-notes.txt", b"hello world from the agent test", "text/plain")}
+        upload = await client.post("/api/v1/documents", files=files)
+        assert upload.status_code == 200
+
+        response = await client.post(
+            "/api/v1/agents/execute",
+            params={"stream": "ndjson"},
+            json={"goal": "Find info about hello world", "max_chunks": 3},
+        )
+
+    app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    events = [json.loads(line) for line in response.text.splitlines()]
+    order = [event.get("kind", event["event"]) for event in events if event["event"] != "token"]
+    assert order == ["plan", "tool_call", "answer", "done"]
+    assert events[1]["tool_output"] == {"match_count": 1}
+    assert events[1]["queue_wait_ms"] is not None
+    assert events[-1]["usage"]["retrieved_bytes"] == len(b"hello world from the agent test")
+    tokens = [event["text"] for event in events if event["event"] == "token"]
+    assert "hello world from the agent test" in "".join(tokens)
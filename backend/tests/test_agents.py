@@ -0,0 +1,125 @@
+import asyncio
+import time
+
+import pytest
+
+
+class _SlowSearchTool:
+    name = "document_search"
+    description = "Fake search that sleeps; 'hang' never returns."
+
+    def __init__(self, delay: float) -> None:
+        self.delay = delay
+        self.cancelled = 0
+
+    async def run(self, *, input):
+        query = input["query"]
+        try:
+            await asyncio.sleep(60 if "hang" in query else self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        shared = {"document_id": "doc-1", "chunk_index": 0, "content": "shared chunk"}
+        own = {"document_id": "doc-2", "chunk_index": len(query), "content": f"about {query}"}
+        return {"matches": [shared, own]}
+
+
+def test_plan_queries_splits_clauses_after_the_goal():
+    from backend.app.services.agents import plan_queries
+
+    goal = "Compare pricing plans and support hours; who owns billing?"
+    assert plan_queries(goal, 4) == [
+        goal,
+        "Compare pricing plans",
+        "support hours",
+        "who owns billing",
+    ]
+    assert plan_queries("Find info about hello world", 4) == ["Find info about hello world"]
+    assert plan_queries(goal, 2) == [goal, "Compare pricing plans"]
+
+
+@pytest.mark.asyncio
+async def test_agent_fans_out_tools_concurrently_and_merges_matches():
+    from backend.app.core.config import get_settings
+    from backend.app.services.agents import SimpleAgent
+    from backend.app.services.llm import LLMService, StubLLMBackend
+    from backend.app.services.response_cache import ResponseCache
+
+    llm = LLMService(get_settings(), StubLLMBackend("stub"), cache=ResponseCache())
+    tool = _SlowSearchTool(delay=0.2)
+    agent = SimpleAgent(llm, [tool], max_queries=4, max_concurrency=4, tool_budget=5.0)
+
+    start = time.perf_counter()
+    result = await agent.execute("pricing plans and support hours; billing owners", max_chunks=10)
+    elapsed = time.perf_counter() - start
+
+    # Four branches of 0.2 s each, run at once: bounded by the slowest, not their sum.
+    assert elapsed < 0.6
+    calls = [step for step in result.steps if step.kind == "tool_call"]
+    assert len(calls) == 4
+    # The chunk every branch found appears once and ranks first.
+    assert result.answer.count("shared chunk") == 1
+    assert result.answer.index("shared chunk") < result.answer.index("about")
+
+    tool.delay = 0.01
+    hanging = SimpleAgent(llm, [tool], tool_timeout=0.1)
+    result = await hanging.execute("hang here and search docs", max_chunks=10)
+    outputs = {
+        step.tool_input["query"]: step.tool_output
+        for step in result.steps
+        if step.kind == "tool_call"
+    }
+    assert outputs["hang here"] == {"error": "timeout"}
+    assert outputs["search docs"] == {"match_count": 2}
+
+    budgeted = SimpleAgent(llm, [tool], tool_timeout=30.0, tool_budget=0.3)
+    start = time.perf_counter()
+    result = await budgeted.execute("hang here and search docs", max_chunks=10)
+    assert time.perf_counter() - start < 1.0
+    outputs = {
+        step.tool_input["query"]: step.tool_output
+        for step in result.steps
+        if step.kind == "tool_call"
+    }
+    assert outputs["hang here"] == {"error": "cancelled"}
+    assert outputs["hang here and search docs"] == {"error": "cancelled"}
+    assert outputs["search docs"] == {"match_count": 2}
+    assert tool.cancelled >= 3
+
+
+@pytest.mark.asyncio
+async def test_agent_steps_report_timing_tokens_and_cache_hits(db_session):
+    from backend.app.core.config import get_settings
+    from backend.app.services.agents import DocumentSearchTool, SimpleAgent
+    from backend.app.services.documents import DocumentService
+    from backend.app.services.llm import LLMService, StubLLMBackend
+    from backend.app.services.response_cache import ResponseCache
+    from backend.app.services.stage_metrics import get_stage_metrics
+
+    await DocumentService(db_session).ingest_text(
+        title="Notes", source=None, content="hello world from the agent accounting test"
+    )
+    llm = LLMService(get_settings(), StubLLMBackend("stub"), cache=ResponseCache())
+    agent = SimpleAgent(llm, [DocumentSearchTool(db_session)])
+
+    first = await agent.execute("hello world", max_chunks=3)
+    plan, call, answer = first.steps
+    assert call.queue_wait_ms >= 0 and call.duration_ms > 0
+    assert call.cache_hit is False
+    assert {"search.embed", "search.fetch"} <= set(call.stages)
+    assert call.context_bytes == len("hello world from the agent accounting test")
+    assert answer.tokens_in > 0 and answer.tokens_out > 0
+    assert answer.cache_hit is False
+    assert first.usage.tokens_in == answer.tokens_in
+    assert first.usage.cache_misses == 2 and first.usage.cache_hits == 0
+    assert first.usage.duration_ms >= call.duration_ms + answer.duration_ms
+
+    second = await agent.execute("hello world", max_chunks=3)
+    assert [step.cache_hit for step in second.steps] == [None, True, True]
+    assert second.steps[1].stages == {}
+    assert second.usage.cache_hits == 2
+
+    stages = get_stage_metrics().snapshot()
+    assert stages["agent.tool.document_search"]["count"] >= 2
+    assert stages["llm.generate"]["count"] >= 1
+    assert sum(stages["agent.total"]["buckets"].values()) == stages["agent.total"]["count"]
@@ -1,3 +1,5 @@
+import json
+
 import pytest
 from httpx import ASGITransport, AsyncClient
 
@@ -14,3 +16,51 @@ async def test_chat_endpoint_returns_stubbed_answer() -> None:
     payload = response.json()
     assert payload["provider"] == "openai"
     assert payload["answer"].startswith("[stub:openai]")
+
+
+@pytest.mark.asyncio
+async def test_chat_endpoint_streams_sse_tokens() -> None:
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://testserver") as client:
+        full = await client.post("/api/v1/chat", json={"prompt": "Hello streaming world"})
+        streamed = await client.post(
+            "/api/v1/chat", params={"stream": "sse"}, json={"prompt": "Hello streaming world"}
+        )
+
+    assert streamed.status_code == 200
+    assert streamed.headers["content-type"].startswith("text/event-stream")
+    messages = [block.split("\n") for block in streamed.text.strip().split("\n\n")]
+    events = [
+        (lines[0].removeprefix("event: "), json.loads(lines[1].removeprefix("data: ")))
+        for lines in messages
+    ]
+    assert events[-1] == ("done", {"provider": "openai"})
+    assert {name for name, _ in events[:-1]} == {"token"}
+    tokens = [data["text"] for _, data in events[:-1]]
+    assert len(tokens) > 1
+    assert "".join(tokens) == full.json()["answer"]
+
+
+@pytest.mark.asyncio
+async def test_stream_errors_only_expose_expected_failures() -> None:
+    from backend.app.api.streaming import stream_events
+    from backend.app.services.llm import LLMProviderError
+
+    async def failing(exc: Exception):
+        yield "token", {"text": "Hel"}
+        raise exc
+
+    async def lines(exc: Exception) -> list[dict]:
+        response = stream_events(failing(exc), "ndjson")
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        return [json.loads(line) for line in body.decode().splitlines()]
+
+    assert (await lines(LLMProviderError("openai returned HTTP 503")))[-1] == {
+        "event": "error",
+        "detail": "openai returned HTTP 503",
+    }
+    leaked = await lines(RuntimeError("no such table: /srv/data/app.db"))
+    assert leaked == [
+        {"event": "token", "text": "Hel"},
+        {"event": "error", "detail": "Internal Server Error"},
+    ]
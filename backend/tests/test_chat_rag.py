@@ -33,3 +33,38 @@ async def test_chat_rag_returns_contexts(db_session, monkeypatch):
 
     app.dependency_overrides.clear()
 
+
+
+@pytest.mark.asyncio
+async def test_chat_rag_streams_contexts_before_tokens(db_session, monkeypatch):
+    import json
+
+    monkeypatch.setenv("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+    config_module.get_settings.cache_clear()
+
+    app = create_app()
+
+    async def _override_db():
+        yield db_session
+
+    app.dependency_overrides[get_db] = _override_db
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://testserver") as client:
+        files = {"file": ("rag.txt", b"rag test content", "text/plain")}
+        upload = await client.post("/api/v1/documents", files=files)
+        assert upload.status_code == 200
+
+        response = await client.post(
+            "/api/v1/chat/rag", params={"stream": "ndjson"}, json={"query": "rag", "top_k": 5}
+        )
+
+    app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert events[0]["event"] == "contexts"
+    assert any("rag" in ctx["content"] for ctx in events[0]["contexts"])
+    assert {event["event"] for event in events[1:-1]} == {"token"}
+    assert events[-1] == {"event": "done", "provider": "openai"}
+    assert "rag test content" in "".join(event["text"] for event in events[1:-1])
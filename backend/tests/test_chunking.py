@@ -0,0 +1,91 @@
+import random
+
+
+def _pieces(text: str, rng: random.Random) -> list[str]:
+    cuts = sorted(rng.sample(range(1, len(text)), 40))
+    return [text[a:b] for a, b in zip([0, *cuts], [*cuts, len(text)])]
+
+
+def test_fixed_strategy_matches_original_windows():
+    from backend.app.services.chunking import ChunkingOptions, FixedWindowChunker, chunk_text
+
+    rng = random.Random(3)
+    words = ["alpha", "beta", "\u00a0", "\n\n", " ", "\u3000", "žlté", "gamma."]
+    text = "".join(rng.choice(words) + " " for _ in range(20_000)).strip()
+
+    for chunk_size, overlap in ((120, 30), (800, 80), (7, 3)):
+        expected = []
+        start = 0
+        while start < len(text):
+            end = min(len(text), start + chunk_size)
+            if chunk := text[start:end].strip():
+                expected.append(chunk)
+            if end == len(text):
+                break
+            start = max(end - overlap, start + 1)
+        options = ChunkingOptions(chunk_size=chunk_size, overlap=overlap)
+        assert chunk_text(text, options) == expected
+
+    chunker = FixedWindowChunker(chunk_size=120, overlap=30)
+    streamed = [chunk for piece in _pieces(text, rng) for chunk in chunker.feed(piece)]
+    assert streamed + chunker.finish() == chunk_text(
+        text, ChunkingOptions(chunk_size=120, overlap=30)
+    )
+
+
+def test_sentence_chunker_respects_budget_and_streams_identically():
+    from backend.app.services.chunking import (
+        ChunkingOptions,
+        approx_token_count,
+        chunk_text,
+        make_chunker,
+    )
+
+    rng = random.Random(5)
+    vocabulary = ["vector", "index", "query", "chunk"]
+    sentences = [
+        " ".join(rng.choices(vocabulary, k=rng.randint(3, 15))) + rng.choice(".!?")
+        for _ in range(400)
+    ]
+    text = " ".join(sentences[:200]) + "\n\n" + " ".join(sentences[200:])
+    options = ChunkingOptions(strategy="sentence", max_tokens=60, overlap_tokens=10)
+
+    chunks = chunk_text(text, options)
+
+    assert all(approx_token_count(chunk) <= 60 for chunk in chunks)
+    assert all(chunk[-1] in ".!?" for chunk in chunks)
+    assert set(" ".join(chunks).split()) == set(text.split())
+
+    chunker = make_chunker(options)
+    streamed = [chunk for piece in _pieces(text, rng) for chunk in chunker.feed(piece)]
+    assert streamed + chunker.finish() == chunks
+
+
+def test_heading_chunker_starts_sections_and_repeats_heading():
+    from backend.app.services.chunking import ChunkingOptions, chunk_text
+
+    body = "\n\n".join(f"Paragraph {i} about retrieval quality." for i in range(6))
+    text = f"# Intro\nShort intro.\n\n## Details\n{body}\n## Outro\nBye."
+
+    chunks = chunk_text(text, ChunkingOptions(strategy="heading", max_tokens=24))
+
+    assert chunks[0] == "# Intro\n\nShort intro."
+    details = [chunk for chunk in chunks if chunk.startswith("## Details")]
+    assert len(details) > 1
+    assert all("Outro" not in chunk for chunk in details)
+    assert chunks[-1] == "## Outro\n\nBye."
+
+
+def test_text_without_spaces_is_counted_and_split_within_budget():
+    from backend.app.services.chunking import ChunkingOptions, approx_token_count, chunk_text
+
+    samples = ["x" * 100_000, "日本語のテキスト" * 7_500, "aGVsbG8+/d29ybGQ=" * 5_000]
+    assert approx_token_count("x" * 100_000) == 25_000
+    assert approx_token_count("日本語" * 20_000) == 60_000
+
+    for strategy in ("sentence", "paragraph", "heading"):
+        options = ChunkingOptions(strategy=strategy, max_tokens=256)
+        for text in samples:
+            chunks = chunk_text(text, options)
+            assert "".join(chunks) == text
+            assert all(approx_token_count(chunk) <= 256 for chunk in chunks)
@@ -0,0 +1,51 @@
+def _text(sentences: int) -> str:
+    return " ".join(f"Fact {n} says the value of item {n} is {n * 7}." for n in range(sentences))
+
+
+def test_pack_merges_neighbours_and_trims_chunk_overlap():
+    from backend.app.services.chunking import ChunkingOptions, chunk_text
+    from backend.app.services.context_packing import pack_context
+
+    text = _text(40)
+    chunks = chunk_text(text, ChunkingOptions(chunk_size=200, overlap=40))
+    matches = [
+        {"document_id": "a", "chunk_index": index, "content": chunks[index]} for index in (3, 2, 4)
+    ]
+    matches.append({"document_id": "b", "chunk_index": 0, "content": "Unrelated note on cats."})
+
+    pack = pack_context(matches, budget_tokens=0)
+
+    assert pack.merged == 2
+    first, second = pack.passages
+    assert first.chunk_indexes == [2, 3, 4]
+    assert first.label == "[a#2-4]"
+    assert first.content == text[text.index(chunks[2]) :][: len(first.content)]
+    assert first.content.endswith(chunks[4])
+    assert len(first.content) < sum(len(chunks[index]) for index in (2, 3, 4))
+    assert second.line() == "[b#0] Unrelated note on cats."
+    assert pack.tokens < pack.input_tokens
+
+
+def test_pack_drops_duplicates_and_fills_budget_by_relevance():
+    from backend.app.services.chunking import approx_token_count
+    from backend.app.services.context_packing import pack_context
+
+    best = _text(3)
+    matches = [
+        {"document_id": "a", "chunk_index": 0, "content": best},
+        {"document_id": "copy", "chunk_index": 5, "content": best.replace("Fact 0", "Fact zero")},
+        {"document_id": "b", "chunk_index": 0, "content": _text(30)},
+        {"document_id": "c", "chunk_index": 9, "content": "Short but relevant."},
+    ]
+
+    pack = pack_context(matches, budget_tokens=80, max_similarity=0.9)
+
+    assert pack.redundant == 1
+    assert [passage.document_id for passage in pack.passages] == ["a", "c"]
+    assert pack.skipped == 1
+    assert pack.tokens <= 80
+
+    truncated = pack_context([matches[2]], budget_tokens=20)
+    (passage,) = truncated.passages
+    assert approx_token_count(passage.line()) <= 20
+    assert matches[2]["content"].startswith(passage.content)
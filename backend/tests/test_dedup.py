@@ -0,0 +1,92 @@
+import random
+
+import pytest
+
+_VOCABULARY = [f"term{number}" for number in range(300)]
+_PASSAGE = "Hybrid retrieval " + " ".join(random.Random(1).choices(_VOCABULARY, k=80))
+
+
+def test_simhash_index_finds_near_duplicates_only():
+    from uuid import uuid4
+
+    from backend.app.services.dedup import SimHashIndex, simhash
+
+    index = SimHashIndex(max_distance=4)
+    original = uuid4()
+    index.add(original, simhash(_PASSAGE))
+    unrelated = " ".join(random.Random(2).choices(_VOCABULARY, k=80))
+
+    assert index.find(simhash(_PASSAGE + " appendix")) == original
+    assert index.find(simhash(unrelated)) is None
+    assert simhash("too short to fingerprint") is None
+
+
+@pytest.mark.asyncio
+async def test_duplicate_chunks_are_stored_as_references(db_session, monkeypatch):
+    from sqlalchemy import select
+
+    from backend.app.core import config as config_module
+    from backend.app.models.db.documents import DocumentChunk
+    from backend.app.services.documents import BatchDocument, DocumentService
+    from backend.app.services.search import SearchService
+
+    monkeypatch.setenv("DEDUP_MODE", "near")
+    config_module.get_settings.cache_clear()
+
+    service = DocumentService(db_session)
+    await service.ingest_text(title="First", source=None, content=_PASSAGE)
+    await service.ingest_text(title="Copy", source=None, content=_PASSAGE + "\n")
+    result = await service.ingest_many(
+        [BatchDocument(title="Near copy", pieces=[_PASSAGE + " appendix"])]
+    )
+
+    rows = (await db_session.execute(select(DocumentChunk))).scalars().all()
+    canonical = [row for row in rows if row.duplicate_of is None]
+    assert len(rows) == 3 and len(canonical) == 1
+    assert all(row.embedding is None for row in rows if row.duplicate_of is not None)
+    assert result[0].duplicate_count == 1
+
+    search = SearchService(db_session)
+    assert len(await search.search("hybrid retrieval", limit=5)) == 1
+    assert len(await search.search_hybrid("hybrid retrieval", limit=5)) == 1
+
+
+def test_add_missing_columns_upgrades_old_tables():
+    from sqlalchemy import create_engine, inspect
+
+    from backend.app.db.schema import add_missing_columns
+
+    engine = create_engine("sqlite://")
+    with engine.begin() as connection:
+        connection.exec_driver_sql(
+            "CREATE TABLE document_chunks (id CHAR(32) PRIMARY KEY, document_id CHAR(32), "
+            "chunk_index INTEGER, content TEXT, embedding JSON)"
+        )
+        add_missing_columns(connection)
+        columns = {column["name"] for column in inspect(connection).get_columns("document_chunks")}
+        indexes = {index["name"] for index in inspect(connection).get_indexes("document_chunks")}
+
+    assert {"content_hash", "simhash", "duplicate_of"} <= columns
+    assert "ix_document_chunks_content_hash" in indexes
+
+
+@pytest.mark.asyncio
+async def test_default_dedup_keeps_chunks_differing_in_one_token(db_session):
+    from backend.app.services.dedup import simhash
+    from backend.app.services.documents import DocumentService
+    from backend.app.services.search import SearchService
+
+    variant = _PASSAGE.replace("Hybrid", "Sparse", 1)
+    # Close enough that ``near`` mode would store the variant as a reference.
+    assert bin(simhash(_PASSAGE) ^ simhash(variant)).count("1") <= 4
+
+    service = DocumentService(db_session)
+    first = await service.ingest_text(title="First", source=None, content=_PASSAGE)
+    second = await service.ingest_text(title="Variant", source=None, content=variant)
+
+    search = SearchService(db_session)
+    both = await search.search("retrieval", limit=5)
+    assert {match["document_id"] for match in both} == {str(first.id), str(second.id)}
+    sparse = await search.search("sparse", limit=5)
+    assert [match["document_id"] for match in sparse] == [str(second.id)]
+    assert sparse[0]["content"] == variant
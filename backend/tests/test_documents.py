@@ -3,6 +3,9 @@ import pytest
 
 @pytest.mark.asyncio
 async def test_document_service_roundtrip(db_session):
+    from sqlalchemy import select
+
+    from backend.app.models.db.documents import DocumentChunk
     from backend.app.services.documents import DocumentService
 
     service = DocumentService(db_session)
@@ -14,6 +17,169 @@ async def test_document_service_roundtrip(db_session):
         embeddings=[[0.1, 0.2], [0.3, 0.4]],
     )
 
-    documents = await service.list_documents()
-    assert len(documents) == 1
-    assert documents[0].chunks[0].content == "hello world"
+    page = await service.list_documents()
+    assert len(page.documents) == 1
+    assert page.documents[0].chunk_count == 2
+    assert page.next_cursor is None
+    contents = await db_session.scalars(
+        select(DocumentChunk.content).order_by(DocumentChunk.chunk_index)
+    )
+    assert contents.first() == "hello world"
+
+
+def test_iter_chunks_matches_whole_text_chunking():
+    import random
+
+    from backend.app.services.documents import DocumentService
+
+    rng = random.Random(7)
+    words = ["alpha", "beta", "  ", "\r\n", "\n\n", "gamma.", "delta", "\r"]
+    text = "  " + "".join(rng.choice(words) + " " for _ in range(2000)) + "\r\n  "
+    expected = DocumentService._chunk_text(text, chunk_size=120, overlap=30)
+
+    cuts = sorted(rng.sample(range(1, len(text)), 200))
+    pieces = [text[a:b] for a, b in zip([0, *cuts], [*cuts, len(text)])]
+    streamed = list(DocumentService._iter_chunks(pieces, chunk_size=120, overlap=30))
+
+    assert streamed == expected
+    assert len(expected) > 10
+
+
+@pytest.mark.asyncio
+async def test_ingest_path_streams_pdf_in_batches(db_session):
+    from pathlib import Path
+
+    from backend.app.services.documents import DocumentService
+
+    sample = Path(__file__).resolve().parents[2] / "sample_docs" / "sample-notes.pdf"
+    service = DocumentService(db_session)
+
+    result = await service.ingest_path(
+        path=sample, filename=sample.name, content_type="application/pdf", chunk_size=40
+    )
+
+    assert result.chunk_count >= 1
+    page = await service.list_documents()
+    assert page.documents[0].chunk_count == result.chunk_count
+
+
+@pytest.mark.asyncio
+async def test_ingest_path_only_reports_empty_files_as_empty(db_session, tmp_path):
+    from backend.app.services.documents import DocumentService, EmptyDocumentError
+    from backend.app.services.embeddings import EmbeddingService
+
+    class FailingEmbedder(EmbeddingService):
+        async def embed_batch(self, texts):
+            raise ValueError("Embedding dimension mismatch.")
+
+    blank = tmp_path / "blank.txt"
+    blank.write_text("   \n")
+    notes = tmp_path / "notes.txt"
+    notes.write_text("Quarterly revenue grew in the north region.")
+    service = DocumentService(db_session)
+
+    with pytest.raises(EmptyDocumentError, match="empty or unreadable"):
+        await service.ingest_path(path=blank, filename=blank.name, content_type="text/plain")
+    with pytest.raises(ValueError, match="Embedding dimension mismatch.") as info:
+        await service.ingest_path(
+            path=notes,
+            filename=notes.name,
+            content_type="text/plain",
+            embedding_service=FailingEmbedder(),
+        )
+    assert not isinstance(info.value, EmptyDocumentError)
+
+
+@pytest.mark.asyncio
+async def test_reingest_only_embeds_changed_chunks(db_session):
+    from sqlalchemy import select
+
+    from backend.app.models.db.documents import Document, DocumentChunk
+    from backend.app.services.chunking import ChunkingOptions
+    from backend.app.services.documents import DocumentService
+    from backend.app.services.embeddings import EmbeddingService
+
+    class RecordingEmbedder(EmbeddingService):
+        def __init__(self) -> None:
+            super().__init__()
+            self.texts: list[str] = []
+
+        async def embed_batch(self, texts):
+            self.texts.extend(texts)
+            return await super().embed_batch(texts)
+
+    chunking = ChunkingOptions(strategy="paragraph", max_tokens=8)
+    paragraphs = {key: f"Paragraph {key} talks about {key}." for key in "ABCDE"}
+    service = DocumentService(db_session)
+
+    async def ingest(keys: str, **options):
+        embedder = RecordingEmbedder()
+        result = await service.ingest_stream(
+            title="Spec",
+            source="spec.md",
+            pieces=["\n\n".join(paragraphs[key] for key in keys)],
+            chunking=chunking,
+            embedding_service=embedder,
+            **options,
+        )
+        return result, embedder.texts
+
+    async def chunks(document_id):
+        stmt = select(DocumentChunk).where(DocumentChunk.document_id == document_id)
+        return {row.content: row for row in (await db_session.execute(stmt)).scalars()}
+
+    first, _ = await ingest("ABCD", external_id="spec")
+    before = {content: row.id for content, row in (await chunks(first.document.id)).items()}
+    # Another document holding a copy of C, stored as a reference to the first one's C.
+    other = await service.ingest_text(
+        title="Other", source=None, content=paragraphs["C"], chunking=chunking
+    )
+
+    paragraphs["B"] = "Paragraph B was rewritten."
+    second, embedded = await ingest("ABDE", external_id="spec")
+
+    assert second.document.id == first.document.id
+    assert second.reused_count == 2 and second.chunk_count == 4
+    assert sorted(embedded) == sorted([paragraphs["B"], paragraphs["E"], paragraphs["C"]])
+    stored = await chunks(first.document.id)
+    assert [stored[paragraphs[key]].chunk_index for key in "ABDE"] == [0, 1, 2, 3]
+    assert stored[paragraphs["A"]].id == before[paragraphs["A"]]
+    assert stored[paragraphs["D"]].id == before[paragraphs["D"]]
+    [promoted] = (await chunks(other.id)).values()
+    assert promoted.duplicate_of is None and promoted.embedding is not None
+
+    third, embedded = await ingest("ABDE", match_source=True)
+    assert third.document.id == first.document.id and third.reused_count == 4
+    assert embedded == []
+    assert len((await db_session.execute(select(Document))).scalars().all()) == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_closes_the_document_streams(db_session):
+    from backend.app.services.chunking import ChunkingOptions
+    from backend.app.services.documents import BatchDocument, DocumentService
+    from backend.app.services.embeddings import EmbeddingService
+
+    class FailingEmbedder(EmbeddingService):
+        async def embed_batch(self, texts):
+            raise RuntimeError("Embedding backend is down.")
+
+    closed: list[str] = []
+
+    async def pieces(name: str):
+        try:
+            for _ in range(10):
+                yield f"{name} revenue grew this quarter. "
+        finally:
+            closed.append(name)
+
+    documents = [BatchDocument(title="A", pieces=pieces("A"))]
+    with pytest.raises(RuntimeError, match="Embedding backend is down."):
+        await DocumentService(db_session).ingest_many(
+            documents,
+            chunking=ChunkingOptions(chunk_size=20, overlap=0),
+            embedding_service=FailingEmbedder(),
+            batch_size=1,
+        )
+
+    assert closed == ["A"]
@@ -1,4 +1,6 @@
-﻿import pytest
+﻿from uuid import uuid4
+
+import pytest
 from httpx import ASGITransport, AsyncClient
 
 from backend.app.api.dependencies import get_db
@@ -51,3 +53,227 @@ async def test_upload_empty_file_returns_400(db_session, monkeypatch):
     test_app.dependency_overrides.clear()
 
     assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_background_upload_returns_job_and_completes(db_session, monkeypatch):
+    from backend.app.services.ingestion_jobs import get_ingestion_queue, shutdown_ingestion_queues
+
+    monkeypatch.setenv("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+    config_module.get_settings.cache_clear()
+
+    test_app = create_app()
+
+    async def _override_db():
+        yield db_session
+
+    test_app.dependency_overrides[get_db] = _override_db
+
+    transport = ASGITransport(app=test_app)
+    try:
+        async with AsyncClient(transport=transport, base_url="http://testserver") as client:
+            files = {"file": ("notes.txt", b"hello world\nqueued for later", "text/plain")}
+            accepted = await client.post("/api/v1/documents?background=true", files=files)
+            assert accepted.status_code == 202
+            job_id = accepted.json()["id"]
+
+            await get_ingestion_queue(db_session).join()
+            response = await client.get(f"/api/v1/documents/jobs/{job_id}")
+            missing = await client.get(f"/api/v1/documents/jobs/{uuid4()}")
+    finally:
+        test_app.dependency_overrides.clear()
+        await shutdown_ingestion_queues()
+
+    payload = response.json()
+    assert payload["status"] == "succeeded"
+    assert payload["chunk_count"] >= 1
+    assert payload["document_id"]
+    assert missing.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_startup_resumes_persisted_jobs_without_new_upload(tmp_path, monkeypatch):
+    import asyncio
+
+    import backend.app.db.session as session_module
+    from backend.app.models.db.jobs import JOB_QUEUED, JOB_SUCCEEDED, IngestionJob
+
+    monkeypatch.setenv("DATABASE_URL", f"sqlite+aiosqlite:///{tmp_path / 'app.db'}")
+    config_module.get_settings.cache_clear()
+    spool = tmp_path / "upload.txt"
+    spool.write_text("persisted before the restart")
+
+    # A previous process accepted the upload and stopped before running it.
+    await session_module.init_db()
+    async with session_module.get_sessionmaker()() as session:
+        job = IngestionJob(
+            status=JOB_QUEUED,
+            filename="upload.txt",
+            content_type="text/plain",
+            spool_path=str(spool),
+        )
+        session.add(job)
+        await session.commit()
+    await session_module.close_db()
+
+    test_app = create_app()
+    async with test_app.router.lifespan_context(test_app):
+        for _ in range(100):
+            async with session_module.get_sessionmaker()() as session:
+                stored = await session.get(IngestionJob, job.id)
+            if stored.status == JOB_SUCCEEDED:
+                break
+            await asyncio.sleep(0.05)
+
+    assert stored.status == JOB_SUCCEEDED
+    assert stored.document_id is not None
+    assert not spool.exists()
+
+
+@pytest.mark.asyncio
+async def test_jobs_are_claimed_once_and_live_leases_are_respected(db_session, tmp_path):
+    from datetime import datetime, timedelta
+
+    from sqlalchemy import func, select
+
+    from backend.app.models.db.documents import Document
+    from backend.app.models.db.jobs import JOB_RUNNING, JOB_SUCCEEDED, IngestionJob
+    from backend.app.services.ingestion_jobs import IngestionQueue
+
+    now = datetime.utcnow()
+    jobs = {}
+    for name, heartbeat in (("live", now), ("stale", now - timedelta(hours=1))):
+        spool = tmp_path / f"{name}.txt"
+        spool.write_text(f"{name} job text")
+        jobs[name] = IngestionJob(
+            status=JOB_RUNNING,
+            filename=spool.name,
+            content_type="text/plain",
+            spool_path=str(spool),
+            owner="another-process",
+            heartbeat_at=heartbeat,
+        )
+    db_session.add_all(jobs.values())
+    await db_session.commit()
+
+    first = IngestionQueue(db_session.bind, workers=1, lease=60)
+    second = IngestionQueue(db_session.bind, workers=1, lease=60)
+    await first._recover()
+    await second._recover()
+    assert first._queue.qsize() == 1 and first._queue.get_nowait() == jobs["stale"].id
+    assert second._queue.empty()
+
+    stale_id = jobs["stale"].id
+    await second._run(stale_id)
+    await first._run(stale_id)
+    await first._run(stale_id)
+
+    documents = await db_session.scalar(select(func.count(Document.id)))
+    live = await db_session.get(IngestionJob, jobs["live"].id, populate_existing=True)
+    stale = await db_session.get(IngestionJob, stale_id, populate_existing=True)
+    assert documents == 1
+    assert stale.status == JOB_SUCCEEDED and stale.owner == first.owner
+    assert live.status == JOB_RUNNING and live.owner == "another-process"
+
+
+@pytest.mark.asyncio
+async def test_batch_upload_accepts_files_and_ndjson(db_session, monkeypatch):
+    import json
+
+    from backend.app.services.documents import DocumentService
+
+    monkeypatch.setenv("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+    config_module.get_settings.cache_clear()
+
+    test_app = create_app()
+
+    async def _override_db():
+        yield db_session
+
+    test_app.dependency_overrides[get_db] = _override_db
+
+    transport = ASGITransport(app=test_app)
+    async with AsyncClient(transport=transport, base_url="http://testserver") as client:
+        files = [
+            ("files", ("a.txt", b"first file text", "text/plain")),
+            ("files", ("b.txt", b"second file text", "text/plain")),
+        ]
+        multipart = await client.post("/api/v1/documents/batch", files=files)
+
+        lines = [{"title": f"Note {i}", "content": f"note number {i}"} for i in range(3)]
+        ndjson = await client.post(
+            "/api/v1/documents/batch",
+            content="\n".join(json.dumps(line) for line in lines),
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+        invalid = await client.post(
+            "/api/v1/documents/batch",
+            content='{"title": "Empty", "content": "   "}\n',
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+
+    test_app.dependency_overrides.clear()
+
+    assert multipart.status_code == 200
+    assert [doc["title"] for doc in multipart.json()["documents"]] == ["a.txt", "b.txt"]
+    assert ndjson.status_code == 200
+    assert ndjson.json()["chunk_count"] == 3
+    assert invalid.status_code == 400
+
+    page = await DocumentService(db_session).list_documents()
+    assert len(page.documents) == 5
+
+
+@pytest.mark.asyncio
+async def test_list_documents_pages_by_cursor_and_exports_ndjson(db_session, monkeypatch):
+    import json
+
+    from backend.app.services.documents import DocumentService
+
+    monkeypatch.setenv("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+    config_module.get_settings.cache_clear()
+
+    service = DocumentService(db_session)
+    for number in range(5):
+        await service.create_document(
+            title=f"Doc {number}",
+            source=None,
+            chunks=[f"chunk {index}" for index in range(number + 1)],
+            embeddings=[[0.1, 0.2]] * (number + 1),
+        )
+
+    test_app = create_app()
+
+    async def _override_db():
+        yield db_session
+
+    test_app.dependency_overrides[get_db] = _override_db
+
+    pages = []
+    transport = ASGITransport(app=test_app)
+    async with AsyncClient(transport=transport, base_url="http://testserver") as client:
+        params: dict = {"limit": 2}
+        while True:
+            response = await client.get("/api/v1/documents", params=params)
+            assert response.status_code == 200
+            pages.append(response.json())
+            if pages[-1]["next_cursor"] is None:
+                break
+            params["cursor"] = pages[-1]["next_cursor"]
+        invalid = await client.get("/api/v1/documents", params={"cursor": "not-a-cursor"})
+        export = await client.get("/api/v1/documents/export", params={"include_chunks": True})
+
+    test_app.dependency_overrides.clear()
+
+    listed = [doc for page in pages for doc in page["documents"]]
+    assert [len(page["documents"]) for page in pages] == [2, 2, 1]
+    assert len({doc["id"] for doc in listed}) == 5
+    assert sorted(doc["chunk_count"] for doc in listed) == [1, 2, 3, 4, 5]
+    assert invalid.status_code == 400
+
+    assert export.status_code == 200
+    assert export.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in export.text.splitlines()]
+    assert [line["id"] for line in lines] == [doc["id"] for doc in listed]
+    for line in lines:
+        assert line["chunks"] == [f"chunk {index}" for index in range(line["chunk_count"])]
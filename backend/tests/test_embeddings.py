@@ -0,0 +1,63 @@
+from collections.abc import Sequence
+
+import numpy as np
+import pytest
+
+from backend.app.services.embedding_cache import EmbeddingCache
+from backend.app.services.embeddings import EmbeddingService, HashEmbeddingBackend
+
+
+class _RecordingBackend:
+    name = "recording"
+    dim = 4
+    offload = True
+
+    def __init__(self) -> None:
+        self.batches: list[list[str]] = []
+
+    def embed_batch(self, texts: Sequence[str]) -> np.ndarray:
+        self.batches.append(list(texts))
+        return np.full((len(texts), self.dim), len(self.batches), dtype=np.float32)
+
+
+@pytest.mark.asyncio
+async def test_embed_batch_returns_contiguous_float32_matrix():
+    service = EmbeddingService("stub", batch_size=2)
+
+    matrix = await service.embed_batch(["a", "b", "c"])
+
+    assert matrix.shape == (3, 1536)
+    assert matrix.dtype == np.float32
+    assert matrix.flags["C_CONTIGUOUS"]
+    np.testing.assert_allclose(np.linalg.norm(matrix, axis=1), 1.0, rtol=1e-5)
+    np.testing.assert_array_equal(matrix[1], HashEmbeddingBackend().embed_batch(["b"])[0])
+
+
+@pytest.mark.asyncio
+async def test_embed_batch_splits_into_micro_batches_for_custom_backend():
+    backend = _RecordingBackend()
+    service = EmbeddingService(backend=backend, batch_size=2, cache=EmbeddingCache())
+
+    matrix = await service.embed_batch(["a", "b", "c"])
+
+    assert backend.batches == [["a", "b"], ["c"]]
+    assert matrix[:, 0].tolist() == [1.0, 1.0, 2.0]
+
+
+@pytest.mark.asyncio
+async def test_embedding_cache_skips_backend_for_repeats_and_persists(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite")
+    backend = _RecordingBackend()
+    cache = EmbeddingCache(max_entries=1, path=path)
+    service = EmbeddingService(backend=backend, cache=cache)
+
+    first = await service.embed_batch(["x", "y", "x"])
+    second = await service.embed_batch(["x", "y"])
+
+    assert backend.batches == [["x", "y"]]
+    np.testing.assert_array_equal(first[:2], second)
+    assert cache.stats()["disk_hits"] >= 1
+
+    reopened = EmbeddingService(backend=_RecordingBackend(), cache=EmbeddingCache(path=path))
+    np.testing.assert_array_equal(await reopened.embed_batch(["y"]), first[1:2])
+    assert reopened.backend.batches == []
@@ -0,0 +1,119 @@
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_aiter_text_matches_in_process_extraction(tmp_path):
+    from pathlib import Path
+
+    from backend.app.services.extraction import ExtractionPool, aiter_text, iter_text
+
+    sample = Path(__file__).resolve().parents[2] / "sample_docs" / "sample-notes.pdf"
+    notes = tmp_path / "notes.txt"
+    notes.write_text("héllo " * 50_000, encoding="utf-8")
+    pool = ExtractionPool(workers=0, timeout=30, max_pending=4)
+
+    for path, content_type in ((sample, "application/pdf"), (notes, "text/plain")):
+        expected = "".join(iter_text(filename=path.name, content_type=content_type, source=path))
+        pieces = [
+            piece
+            async for piece in aiter_text(
+                path=path, filename=path.name, content_type=content_type, pool=pool
+            )
+        ]
+        assert "".join(pieces) == expected
+
+
+@pytest.mark.asyncio
+async def test_extraction_pool_rejects_when_full():
+    from backend.app.services.extraction import ExtractionPool, ExtractionQueueFull
+
+    pool = ExtractionPool(workers=0, timeout=30, max_pending=1)
+
+    async with pool.reserve():
+        with pytest.raises(ExtractionQueueFull):
+            async with pool.reserve():
+                pass
+
+    async with pool.reserve():
+        assert await pool.run(sum, [1, 2, 3]) == 6
+
+
+@pytest.mark.asyncio
+async def test_aiter_text_fails_instead_of_truncating(tmp_path, monkeypatch):
+    from concurrent.futures.process import BrokenProcessPool
+
+    from backend.app.core.config import get_settings
+    from backend.app.services import extraction
+    from backend.app.services.extraction import ExtractionError, ExtractionPool, aiter_text
+
+    class ScriptedPool(ExtractionPool):
+        def __init__(self, failures):
+            super().__init__(workers=0, timeout=30, max_pending=4)
+            self.failures = failures
+
+        async def run(self, fn, *args):
+            if fn is extraction.count_pdf_pages:
+                return 24
+            start = args[1]
+            if start in self.failures:
+                raise self.failures[start]
+            return [f"page {start}"]
+
+    path = tmp_path / "report.pdf"
+    path.write_bytes(b"%PDF")
+    monkeypatch.setenv("EXTRACTION_PDF_PAGES_PER_JOB", "8")
+    get_settings.cache_clear()
+
+    async def extract(failures):
+        pool = ScriptedPool(failures)
+        pieces = aiter_text(path=path, filename=path.name, content_type=None, pool=pool)
+        return [piece async for piece in pieces]
+
+    assert await extract({}) == ["page 0", "\npage 8", "\npage 16"]
+    assert await extract({0: ValueError("bad xref")}) == []
+    with pytest.raises(ExtractionError):
+        await extract({16: ValueError("bad xref")})
+    with pytest.raises(ExtractionError):
+        await extract({0: BrokenProcessPool("worker died")})
+
+
+@pytest.mark.asyncio
+async def test_timed_out_job_frees_its_worker():
+    import asyncio
+    import time
+
+    from backend.app.services.extraction import ExtractionPool
+
+    pool = ExtractionPool(workers=1, timeout=10, max_pending=4)
+    try:
+        assert await pool.run(pow, 2, 3) == 8
+        pool.timeout = 1.0
+        hung = asyncio.ensure_future(pool.run(time.sleep, 60))
+        await asyncio.sleep(0.5)
+        queued = asyncio.ensure_future(pool.run(pow, 2, 10))
+        with pytest.raises(TimeoutError):
+            await hung
+        # The job waiting behind the hung one runs on fresh workers.
+        pool.timeout = 10
+        assert await queued == 1024
+        assert await pool.run(pow, 2, 5) == 32
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_timeout_counts_from_when_a_worker_starts_the_job():
+    import asyncio
+    import time
+
+    from backend.app.services.extraction import ExtractionPool
+
+    pool = ExtractionPool(workers=1, timeout=10, max_pending=4)
+    try:
+        assert await pool.run(pow, 2, 3) == 8
+        pool.timeout = 1.0
+        # Together they take longer than the timeout, but each job alone is well within.
+        jobs = [pool.run(time.sleep, 0.4) for _ in range(4)]
+        assert await asyncio.gather(*jobs) == [None] * 4
+    finally:
+        pool.shutdown()
@@ -0,0 +1,55 @@
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import delete
+
+
+def test_query_tokens_prefers_significant_terms():
+    from backend.app.services.keyword_index import query_tokens
+
+    assert query_tokens("What is in the hello doc?") == ["what", "the", "hello", "doc"]
+    assert query_tokens("is it") == ["is", "it"]
+
+
+def test_in_memory_bm25_ranks_and_removes():
+    from backend.app.services.keyword_index import InMemoryKeywordIndex
+
+    index = InMemoryKeywordIndex()
+    ids = [uuid4() for _ in range(3)]
+    index.add(
+        ids,
+        ["apple banana", "apple apple apple cherry", "banana cherry durian"],
+    )
+
+    hits = index.search(["apple"], k=5)
+    assert [chunk_id for chunk_id, _ in hits] == [ids[1], ids[0]]
+
+    index.remove([ids[1]])
+    assert [chunk_id for chunk_id, _ in index.search(["apple"], k=5)] == [ids[0]]
+
+
+@pytest.mark.asyncio
+async def test_keyword_search_uses_fts5_and_follows_deletes(db_session):
+    from backend.app.models.db.documents import DocumentChunk
+    from backend.app.services.documents import DocumentService
+    from backend.app.services.keyword_index import keyword_backend
+    from backend.app.services.search import SearchService
+
+    service = DocumentService(db_session)
+    await service.create_document(
+        title="Fruit", chunks=["apple banana", "apple apple apple cherry", "durian only"]
+    )
+    other = await service.create_document(title="More fruit", chunks=["banana apple pie"])
+
+    search = SearchService(db_session)
+    assert await keyword_backend(db_session) == "fts5"
+    matches = await search.search("apple", limit=2)
+    assert [match["content"] for match in matches][0] == "apple apple apple cherry"
+    assert len(matches) == 2
+
+    await db_session.execute(
+        delete(DocumentChunk).where(DocumentChunk.document_id == other.id)
+    )
+    await db_session.commit()
+    contents = [match["content"] for match in await search.search("pie", limit=5)]
+    assert contents == []
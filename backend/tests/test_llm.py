@@ -0,0 +1,104 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from backend.app.services.llm import LLMProviderError, OpenAICompatibleBackend
+
+
+def _backend(handler, **options) -> OpenAICompatibleBackend:
+    return OpenAICompatibleBackend(
+        name="mock",
+        base_url="http://llm.test/v1",
+        api_key="test",
+        model="mock-model",
+        retry_backoff=0.0,
+        transport=httpx.MockTransport(handler),
+        **options,
+    )
+
+
+def _chat_reply(content: str) -> httpx.Response:
+    return httpx.Response(200, json={"choices": [{"message": {"content": content}}]})
+
+
+@pytest.mark.asyncio
+async def test_retries_transient_errors_then_gives_up():
+    statuses = iter([503, 429, 200])
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        status = next(statuses)
+        return _chat_reply("ok") if status == 200 else httpx.Response(status)
+
+    backend = _backend(handler)
+    assert await backend.complete("hi") == "ok"
+    assert backend.retries == 2
+
+    failing = _backend(lambda request: httpx.Response(500), max_retries=1)
+    with pytest.raises(LLMProviderError):
+        await failing.complete("hi")
+    with pytest.raises(LLMProviderError):
+        await _backend(lambda request: httpx.Response(400)).complete("hi")
+
+
+@pytest.mark.asyncio
+async def test_retries_malformed_json_bodies_then_gives_up():
+    bodies = iter([b"<html>Bad gateway</html>", b""])
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = next(bodies, None)
+        return _chat_reply("ok") if body is None else httpx.Response(200, content=body)
+
+    backend = _backend(handler)
+    assert await backend.complete("hi") == "ok"
+    assert backend.retries == 2
+
+    html = _backend(lambda request: httpx.Response(200, text="<html>"), max_retries=1)
+    with pytest.raises(LLMProviderError, match="malformed JSON"):
+        await html.complete("hi")
+
+
+@pytest.mark.asyncio
+async def test_streams_sse_deltas():
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert json.loads(request.content)["stream"] is True
+        events = [{"choices": [{"delta": {"content": text}}]} for text in ("Hel", "lo", "!")]
+        body = "".join(f"data: {json.dumps(event)}\n\n" for event in events)
+        return httpx.Response(200, text=body + "data: [DONE]\n\n")
+
+    tokens = [token async for token in _backend(handler).stream("hi")]
+    assert tokens == ["Hel", "lo", "!"]
+
+
+@pytest.mark.asyncio
+async def test_caps_concurrency_and_batches_completions():
+    in_flight = peak = 0
+    requests = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        payload = json.loads(request.content)
+        requests.append((request.url.path, payload))
+        if request.url.path.endswith("/completions") and "prompt" in payload:
+            choices = [{"index": i, "text": p.upper()} for i, p in enumerate(payload["prompt"])]
+            return httpx.Response(200, json={"choices": list(reversed(choices))})
+        return _chat_reply(payload["messages"][0]["content"])
+
+    capped = _backend(handler, max_concurrency=2)
+    answers = await asyncio.gather(*(capped.complete(f"q{i}") for i in range(6)))
+    assert answers == [f"q{i}" for i in range(6)]
+    assert peak == 2
+
+    requests.clear()
+    batched = _backend(handler, batch_size=4, batch_window=0.05)
+    answers = await asyncio.gather(*(batched.complete(f"q{i}") for i in range(5)))
+    assert answers == [f"Q{i}" for i in range(5)]
+    assert [payload["prompt"] for _, payload in requests] == [
+        ["q0", "q1", "q2", "q3"],
+        ["q4"],
+    ]
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+
+def test_embedding_codecs_roundtrip_within_tolerance():
+    from backend.app.services.quantization import decode_embedding, encode_embedding
+
+    vector = np.random.default_rng(0).standard_normal(1536).astype(np.float32)
+    vector /= np.linalg.norm(vector)
+
+    sizes = {}
+    for storage, tolerance in (("float32", 0.0), ("float16", 1e-3), ("int8", 1e-2)):
+        blob = encode_embedding(vector, storage)
+        decoded = decode_embedding(blob)
+        sizes[storage] = len(blob)
+        assert decoded.dtype == np.float32 and decoded.shape == vector.shape
+        assert np.abs(decoded - vector).max() <= tolerance
+
+    assert sizes["float32"] > 2 * sizes["float16"] - 16 > 4 * sizes["int8"] - 64
+    with pytest.raises(ValueError):
+        decode_embedding(b"[0.1, 0.2]")
+
+
+def test_sign_codes_hamming_distance():
+    from backend.app.services.quantization import hamming_distances, sign_codes
+
+    vectors = np.array([[1.0, -1.0, 2.0], [-1.0, -1.0, -2.0]], dtype=np.float32)
+    codes = sign_codes(vectors)
+
+    assert codes.shape == (2, 1)
+    assert hamming_distances(codes, codes[0]).tolist() == [0, 2]
+
+
+@pytest.mark.asyncio
+async def test_packed_embeddings_read_back_including_legacy_json(db_session, monkeypatch):
+    from sqlalchemy import select, text
+
+    from backend.app.core.config import get_settings
+    from backend.app.models.db.documents import DocumentChunk
+    from backend.app.services.documents import DocumentService
+
+    monkeypatch.setattr(get_settings(), "embedding_storage", "int8")
+    document = await DocumentService(db_session).create_document(
+        title="Packed", chunks=["first", "second"], embeddings=[[0.5, -0.25], [0.1, 0.2]]
+    )
+    await db_session.execute(
+        text("UPDATE document_chunks SET embedding = '[0.3, 0.4]' WHERE chunk_index = 1")
+    )
+
+    stmt = (
+        select(DocumentChunk.embedding)
+        .where(DocumentChunk.document_id == document.id)
+        .order_by(DocumentChunk.chunk_index)
+    )
+    packed, legacy = (await db_session.execute(stmt)).scalars().all()
+
+    assert np.allclose(packed, [0.5, -0.25], atol=0.01)
+    assert legacy == [0.3, 0.4]
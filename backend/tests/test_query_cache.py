@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_query_cache_single_flights_and_expires():
+    from backend.app.services.query_cache import QueryCache
+
+    now = [0.0]
+    cache = QueryCache(max_entries=2, ttl=10.0, clock=lambda: now[0])
+    calls = []
+
+    async def compute(value):
+        calls.append(value)
+        await asyncio.sleep(0.01)
+        return value
+
+    results = await asyncio.gather(
+        *(cache.get_or_compute("a", lambda: compute(1)) for _ in range(5))
+    )
+    assert results == [1] * 5
+    assert calls == [1]
+    assert cache.stats()["coalesced"] == 4
+
+    assert await cache.get_or_compute("a", lambda: compute(2)) == 1
+    now[0] = 11.0
+    assert await cache.get_or_compute("a", lambda: compute(3)) == 3
+
+    await cache.get_or_compute("b", lambda: compute(4))
+    await cache.get_or_compute("c", lambda: compute(5))
+    assert len(cache) == 2
+
+    cache.bump()
+    assert len(cache) == 0
+    assert await cache.get_or_compute("c", lambda: compute(6)) == 6
+
+
+@pytest.mark.asyncio
+async def test_search_results_are_cached_until_ingest(db_session):
+    from backend.app.services.documents import DocumentService
+    from backend.app.services.embeddings import EmbeddingService
+    from backend.app.services.search import SearchService
+
+    class CountingEmbedder(EmbeddingService):
+        calls = 0
+
+        async def embed_batch(self, texts):
+            CountingEmbedder.calls += 1
+            return await super().embed_batch(texts)
+
+    documents = DocumentService(db_session)
+    await documents.ingest_text(title="One", source=None, content="alpha release notes")
+    search = SearchService(db_session, embedding_service=CountingEmbedder())
+
+    first = await search.retrieve("Alpha  notes", limit=3)
+    again = await search.retrieve("alpha notes", limit=3)
+    assert again == first
+    assert CountingEmbedder.calls == 1
+
+    await documents.ingest_text(title="Two", source=None, content="alpha beta gamma")
+    refreshed = await search.retrieve("alpha notes", limit=3)
+    assert CountingEmbedder.calls == 2
+    assert len(refreshed) == 2
@@ -0,0 +1,99 @@
+import time
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from backend.app.api.dependencies import get_db
+from backend.app.core import config as config_module
+from backend.app.main import create_app
+
+
+def _match(document_id: str, content: str) -> dict:
+    return {"document_id": document_id, "chunk_index": 0, "content": content}
+
+
+@pytest.mark.asyncio
+async def test_rerank_prefers_close_terms_in_batches_and_falls_back_on_budget():
+    from backend.app.services.reranking import LexicalReranker, rerank_matches
+
+    filler = " ".join(["words"] * 30)
+    matches = [
+        _match("far", f"vector {filler} index"),
+        _match("none", "nothing relevant here"),
+        _match("close", f"a vector index {filler}"),
+    ]
+
+    batches = []
+
+    class RecordingReranker(LexicalReranker):
+        def prepare(self, query, candidates):
+            score = super().prepare(query, candidates)
+            return lambda positions: batches.append(list(positions)) or score(positions)
+
+    reranked = await rerank_matches(
+        "vector index", matches, limit=2, reranker=RecordingReranker(), batch_size=2
+    )
+    assert [match["document_id"] for match in reranked] == ["close", "far"]
+    assert batches == [[0, 1], [2]]
+
+    class SlowReranker:
+        name = "slow"
+        offload = True
+
+        def prepare(self, query, candidates):
+            time.sleep(0.3)
+            return lambda positions: [1.0] * len(positions)
+
+    start = time.perf_counter()
+    fallback = await rerank_matches(
+        "vector index", matches, limit=2, reranker=SlowReranker(), budget_ms=50
+    )
+    assert time.perf_counter() - start < 0.25
+    assert [match["document_id"] for match in fallback] == ["far", "none"]
+
+
+@pytest.mark.asyncio
+async def test_search_and_rag_accept_rerank(db_session, monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+    config_module.get_settings.cache_clear()
+
+    app = create_app()
+
+    async def _override_db():
+        yield db_session
+
+    app.dependency_overrides[get_db] = _override_db
+
+    documents = {
+        "scattered.txt": "Latency notes. " + "Unrelated filler. " * 20 + "Budget review.",
+        "adjacent.txt": "The latency budget is fifty milliseconds. " + "Filler text. " * 20,
+    }
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://testserver") as client:
+        for name, body in documents.items():
+            files = {"file": (name, body.encode(), "text/plain")}
+            assert (await client.post("/api/v1/documents", files=files)).status_code == 200
+
+        response = await client.post(
+            "/api/v1/search",
+            json={
+                "query": "latency budget",
+                "mode": "keyword",
+                "rerank": True,
+                "limit": 1,
+                "snippet_chars": 40,
+                "highlight": True,
+            },
+        )
+        assert response.status_code == 200
+        [hit] = response.json()
+        assert "<mark>latency</mark> <mark>budget</mark>" in hit["content"]
+
+        rag = await client.post(
+            "/api/v1/chat/rag",
+            json={"query": "latency budget", "mode": "keyword", "rerank": True, "top_k": 1},
+        )
+        assert rag.status_code == 200
+        assert "fifty milliseconds" in rag.json()["contexts"][0]["content"]
+
+    app.dependency_overrides.clear()
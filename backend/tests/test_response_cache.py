@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_response_cache_exact_semantic_ttl_and_eviction():
+    from backend.app.services.response_cache import ResponseCache
+
+    now = [0.0]
+    cache = ResponseCache(max_entries=2, ttl=60.0, similarity_threshold=0.9, clock=lambda: now[0])
+    vectors = {
+        "what is alpha?": np.array([1.0, 0.0, 0.0]),
+        "what's alpha": np.array([0.98, 0.2, 0.0]),
+        "what is beta?": np.array([0.0, 1.0, 0.0]),
+    }
+
+    async def embed(text):
+        return vectors[text]
+
+    probe = await cache.lookup(
+        "ns", "prompt 1", question="what is alpha?", contexts=["a", "b"], embed=embed
+    )
+    assert probe.answer is None
+    cache.store(probe, "Alpha is the first letter.")
+
+    assert (await cache.lookup("ns", "prompt 1")).answer == "Alpha is the first letter."
+    similar = await cache.lookup(
+        "ns", "prompt 2", question="what's alpha", contexts=["b", "a"], embed=embed
+    )
+    assert similar.semantic and similar.answer == "Alpha is the first letter."
+    other_context = await cache.lookup(
+        "ns", "prompt 2", question="what's alpha", contexts=["a", "c"], embed=embed
+    )
+    unrelated = await cache.lookup(
+        "ns", "prompt 3", question="what is beta?", contexts=["a", "b"], embed=embed
+    )
+    assert other_context.answer is None and unrelated.answer is None
+    assert cache.stats() == {
+        "hits": 1,
+        "semantic_hits": 1,
+        "misses": 3,
+        "hit_rate": 0.4,
+        "entries": 1,
+    }
+
+    cache.store(unrelated, "Beta comes second.")
+    cache.store(await cache.lookup("ns", "prompt 4"), "Fourth.")
+    assert len(cache) == 2
+    assert (await cache.lookup("ns", "prompt 1")).answer is None
+
+    now[0] = 61.0
+    assert (await cache.lookup("ns", "prompt 4")).answer is None
+    assert len(cache) == 1
+
+
+@pytest.mark.asyncio
+async def test_llm_service_serves_repeated_prompts_from_cache():
+    from backend.app.core.config import get_settings
+    from backend.app.services.llm import LLMService, StubLLMBackend
+    from backend.app.services.response_cache import ResponseCache
+
+    class CountingBackend(StubLLMBackend):
+        calls = 0
+
+        async def complete(self, prompt):
+            CountingBackend.calls += 1
+            return await super().complete(prompt)
+
+    service = LLMService(get_settings(), CountingBackend("test"), cache=ResponseCache())
+    first = await service.chat("  Summarise the notes ")
+    second = await service.chat("Summarise the notes")
+    streamed = [token async for token in service.stream("Summarise the notes")]
+
+    assert second.answer == first.answer
+    assert "".join(streamed) == first.answer
+    assert len(streamed) > 1
+    assert CountingBackend.calls == 1
+    assert service.cache.stats()["hits"] == 2
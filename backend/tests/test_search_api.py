@@ -44,3 +44,97 @@ async def test_search_endpoint_returns_matches(db_session, monkeypatch):
         assert any("hello" in item["content"].lower() for item in data2)
 
     app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+async def test_search_hybrid_mode_fuses_keyword_and_vector(db_session, monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+    config_module.get_settings.cache_clear()
+
+    app = create_app()
+
+    async def _override_db():
+        yield db_session
+
+    app.dependency_overrides[get_db] = _override_db
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://testserver") as client:
+        for name, body in (("a.txt", b"quarterly revenue grew"), ("b.txt", b"team offsite notes")):
+            files = {"file": (name, body, "text/plain")}
+            upload = await client.post("/api/v1/documents", files=files)
+            assert upload.status_code == 200
+
+        response = await client.post(
+            "/api/v1/search", json={"query": "revenue", "limit": 2, "mode": "hybrid"}
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data) == 2
+        assert data[0]["content"] == "quarterly revenue grew"
+
+        keyword = await client.post(
+            "/api/v1/search", json={"query": "revenue", "limit": 5, "mode": "keyword"}
+        )
+        assert [item["content"] for item in keyword.json()] == ["quarterly revenue grew"]
+
+    app.dependency_overrides.clear()
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    from uuid import uuid4
+
+    from backend.app.services.search import reciprocal_rank_fusion
+
+    a, b, c = uuid4(), uuid4(), uuid4()
+    fused = reciprocal_rank_fusion([[(a, 0.1), (b, 0.2)], [(b, 3.0), (c, 1.0)]])
+
+    assert [chunk_id for chunk_id, _ in fused] == [b, a, c]
+
+
+@pytest.mark.asyncio
+async def test_search_returns_highlighted_snippets(db_session, monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+    config_module.get_settings.cache_clear()
+
+    app = create_app()
+
+    async def _override_db():
+        yield db_session
+
+    app.dependency_overrides[get_db] = _override_db
+
+    body = ("Background filler sentence. " * 10) + "Revenue grew sharply this quarter. " + (
+        "Closing filler sentence. " * 10
+    )
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://testserver") as client:
+        files = {"file": ("report.txt", body.encode(), "text/plain")}
+        upload = await client.post("/api/v1/documents", files=files)
+        assert upload.status_code == 200
+
+        response = await client.post(
+            "/api/v1/search",
+            json={"query": "revenue", "mode": "keyword", "snippet_chars": 60, "highlight": True},
+        )
+        assert response.status_code == 200
+        [hit] = response.json()
+        assert "<mark>Revenue</mark> grew sharply" in hit["content"]
+        assert hit["content"].startswith("…") and hit["content"].endswith("…")
+        assert len(hit["content"]) <= 60 + len("<mark></mark>") + 2
+
+    app.dependency_overrides.clear()
+
+
+def test_highlighted_snippets_escape_stored_markup():
+    from backend.app.services.search import SnippetOptions, make_snippet
+
+    content = '<img src=x onerror=alert(1)> revenue & "margin"'
+    highlighted = make_snippet(content, ["revenue"], SnippetOptions(highlight=True))
+    assert highlighted == (
+        "&lt;img src=x onerror=alert(1)&gt; <mark>revenue</mark> &amp; &quot;margin&quot;"
+    )
+    assert make_snippet("<b>no hits</b>", ["revenue"], SnippetOptions(highlight=True)) == (
+        "&lt;b&gt;no hits&lt;/b&gt;"
+    )
+    assert make_snippet(content, ["revenue"], SnippetOptions()) == content
@@ -0,0 +1,199 @@
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import numpy as np
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from backend.app.api.dependencies import get_db
+from backend.app.main import create_app
+
+
+@pytest.mark.asyncio
+async def test_filters_apply_in_every_search_mode(db_session):
+    from backend.app.services.documents import DocumentService
+    from backend.app.services.search import SearchService
+    from backend.app.services.search_filters import SearchFilters
+
+    service = DocumentService(db_session)
+    wiki = await service.ingest_text(
+        title="Wiki",
+        source="wiki",
+        content="Quarterly revenue grew in the north region.",
+        meta={"team": "red", "content_type": "text/markdown"},
+    )
+    crm = await service.ingest_text(
+        title="CRM",
+        source="crm",
+        content="Revenue forecast for the south region is flat.",
+        meta={"team": "blue", "content_type": "text/plain"},
+    )
+    # Stored as a duplicate of the wiki chunk, so only the wiki chunk is indexed.
+    copy = await service.ingest_text(
+        title="Copy", source="mirror", content="Quarterly revenue grew in the north region."
+    )
+    assert wiki.content_type == "text/markdown"
+
+    search = SearchService(db_session)
+    cases = [
+        (SearchFilters(sources=("crm",)), {str(crm.id)}),
+        (SearchFilters(meta={"team": "red"}), {str(wiki.id)}),
+        (SearchFilters(meta={"content_type": "text/plain"}), {str(crm.id)}),
+        (SearchFilters(document_ids=(copy.id,)), {str(copy.id)}),
+        (SearchFilters(created_after=datetime.now(timezone.utc) + timedelta(days=1)), set()),
+    ]
+    for mode in ("vector", "keyword", "hybrid"):
+        unfiltered = await search.retrieve("revenue region", limit=5, mode=mode)
+        assert {match["document_id"] for match in unfiltered} == {str(wiki.id), str(crm.id)}
+        for filters, expected in cases:
+            matches = await search.retrieve("revenue region", limit=5, mode=mode, filters=filters)
+            assert {match["document_id"] for match in matches} == expected, (mode, filters)
+
+
+@pytest.mark.asyncio
+async def test_meta_filters_match_json_scalars(db_session):
+    from sqlalchemy import select
+
+    from backend.app.models.db.documents import DocumentChunk
+    from backend.app.services.documents import DocumentService
+    from backend.app.services.search_filters import SearchFilters, allowed_chunk_ids
+
+    service = DocumentService(db_session)
+    documents = {}
+    for name, meta in {
+        "public": {"public": True, "pages": 3},
+        "private": {"public": False, "pages": 3.5},
+        "unset": {"public": None},
+        "text": {"public": "yes", "pages": "3"},
+    }.items():
+        document = await service.ingest_text(
+            title=name, source=None, content=f"{name} revenue report", meta=meta
+        )
+        documents[name] = document.id
+
+    async def matching(**meta):
+        filters = SearchFilters(meta=meta)
+        chunk_ids = await allowed_chunk_ids(db_session, filters)
+        stmt = select(DocumentChunk.document_id).where(DocumentChunk.id.in_(chunk_ids))
+        ids = set((await db_session.execute(stmt)).scalars())
+        return {name for name, document_id in documents.items() if document_id in ids}
+
+    assert await matching(public=True) == await matching(public="true") == {"public"}
+    assert await matching(public=False) == {"private"}
+    assert await matching(public=None) == {"unset"}
+    assert await matching(public="yes") == {"text"}
+    assert await matching(pages=3) == {"public", "text"}
+    assert await matching(pages=3.5) == {"private"}
+    with pytest.raises(ValueError):
+        SearchFilters(meta={"public": [True]})
+
+
+def test_in_process_indexes_only_score_allowed_chunks(tmp_path):
+    from backend.app.services.keyword_index import InMemoryKeywordIndex
+    from backend.app.services.vector_index import VectorIndex
+    from backend.app.services.vector_store import MmapVectorStore
+
+    rng = np.random.default_rng(0)
+    ids = [uuid4() for _ in range(300)]
+    vectors = rng.normal(size=(300, 8)).astype(np.float32)
+    allowed = frozenset(ids[::50])
+    query = vectors[0] + 0.01
+
+    def exact(k):
+        rows = sorted(ids.index(chunk_id) for chunk_id in allowed)
+        distances = np.linalg.norm(vectors[rows] - query, axis=1)
+        return [ids[rows[position]] for position in np.argsort(distances)[:k]]
+
+    index = VectorIndex(brute_force_threshold=64, nprobe=1)
+    index.add(ids, vectors)
+    store = MmapVectorStore(tmp_path / "store")
+    store.add(ids, vectors)
+    for backend in (index, store):
+        hits = backend.search(query, 3, allowed=allowed)
+        assert [chunk_id for chunk_id, _ in hits] == exact(3)
+        assert backend.search(query, 3, allowed=frozenset()) == []
+
+    keyword = InMemoryKeywordIndex()
+    keyword.add(ids[:3], ["apple pie", "apple apple tart", "banana apple"])
+    hits = keyword.search(["apple"], 5, allowed={ids[0], ids[2], uuid4()})
+    assert {chunk_id for chunk_id, _ in hits} == {ids[0], ids[2]}
+
+
+def test_filtered_search_finds_allowed_topics_far_from_the_query():
+    from backend.app.services.vector_index import VectorIndex
+
+    rng = np.random.default_rng(1)
+    topics, per_topic, dim = 40, 120, 16
+    centres = rng.normal(scale=10.0, size=(topics, dim)).astype(np.float32)
+    vectors = np.concatenate(
+        [centre + rng.normal(size=(per_topic, dim)).astype(np.float32) for centre in centres]
+    )
+    ids = [uuid4() for _ in range(len(vectors))]
+    allowed = frozenset(ids[: 5 * per_topic])
+
+    index = VectorIndex(brute_force_threshold=256, nprobe=2)
+    index.add(ids, vectors)
+    for topic in range(5, topics):
+        query = centres[topic]
+        hits = index.search(query, 3, allowed=allowed)
+        rows = np.arange(5 * per_topic)
+        nearest = rows[np.argsort(np.linalg.norm(vectors[rows] - query, axis=1))[:3]]
+        assert [chunk_id for chunk_id, _ in hits] == [ids[row] for row in nearest]
+
+
+def test_add_missing_columns_backfills_promoted_meta_keys():
+    from sqlalchemy import create_engine, inspect
+
+    from backend.app.db.schema import add_missing_columns
+
+    engine = create_engine("sqlite://")
+    with engine.begin() as connection:
+        connection.exec_driver_sql(
+            "CREATE TABLE documents (id CHAR(32) PRIMARY KEY, title VARCHAR(255), "
+            "source VARCHAR(255), meta JSON, external_id VARCHAR(255), created_at DATETIME, "
+            "updated_at DATETIME)"
+        )
+        connection.exec_driver_sql(
+            "INSERT INTO documents (id, title, meta) VALUES "
+            "('a', 'A', '{\"content_type\": \"text/plain\"}'), ('b', 'B', '{}')"
+        )
+        add_missing_columns(connection)
+        rows = connection.exec_driver_sql(
+            "SELECT id, content_type FROM documents ORDER BY id"
+        ).all()
+        indexes = {index["name"] for index in inspect(connection).get_indexes("documents")}
+
+    assert [tuple(row) for row in rows] == [("a", "text/plain"), ("b", None)]
+    assert {"ix_documents_source", "ix_documents_content_type"} <= indexes
+
+
+@pytest.mark.asyncio
+async def test_search_endpoint_accepts_filters(db_session):
+    app = create_app()
+
+    async def _override_db():
+        yield db_session
+
+    app.dependency_overrides[get_db] = _override_db
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://testserver") as client:
+        for name, body in (("a.txt", b"revenue grew"), ("b.txt", b"revenue fell")):
+            files = {"file": (name, body, "text/plain")}
+            upload = await client.post("/api/v1/documents", files=files)
+            assert upload.status_code == 200
+
+        payload = {"query": "revenue", "mode": "keyword"}
+        response = await client.post("/api/v1/search", json=payload)
+        assert len(response.json()) == 2
+
+        payload["filters"] = {"sources": ["b.txt"], "meta": {"content_type": "text/plain"}}
+        response = await client.post("/api/v1/search", json=payload)
+        assert response.status_code == 200
+        assert [item["content"] for item in response.json()] == ["revenue fell"]
+
+        payload["filters"] = {"document_ids": ["not-a-uuid"]}
+        response = await client.post("/api/v1/search", json=payload)
+        assert response.status_code == 422
+
+    app.dependency_overrides.clear()
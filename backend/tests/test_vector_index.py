@@ -0,0 +1,78 @@
+from uuid import uuid4
+
+import numpy as np
+import pytest
+
+
+def _random_unit_vectors(count: int, dim: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_vector_index_exact_search_orders_by_distance():
+    from backend.app.services.vector_index import VectorIndex
+
+    index = VectorIndex()
+    ids = [uuid4() for _ in range(3)]
+    index.add(ids, [[1.0, 0.0], [0.0, 1.0], [0.7, 0.7]])
+
+    hits = index.search([1.0, 0.1], k=2)
+
+    assert [chunk_id for chunk_id, _ in hits] == [ids[0], ids[2]]
+    assert hits[0][1] < hits[1][1]
+
+
+def test_vector_index_ivf_recall_and_remove():
+    from backend.app.services.vector_index import VectorIndex
+
+    vectors = _random_unit_vectors(2000, 32)
+    ids = [uuid4() for _ in range(len(vectors))]
+    index = VectorIndex(nprobe=16, brute_force_threshold=500)
+    index.add(ids, vectors)
+
+    query = vectors[42] + 0.01
+    hits = index.search(query, k=5)
+    assert hits[0][0] == ids[42]
+
+    index.remove([ids[42]])
+    assert ids[42] not in [chunk_id for chunk_id, _ in index.search(query, k=5)]
+
+
+@pytest.mark.asyncio
+async def test_search_by_vector_uses_in_process_index(db_session):
+    from backend.app.services.documents import DocumentService
+    from backend.app.services.embeddings import EmbeddingService
+    from backend.app.services.search import SearchService
+
+    chunks = ["alpha notes", "beta notes", "gamma notes"]
+    embeddings = await EmbeddingService().embed(chunks)
+    await DocumentService(db_session).create_document(
+        title="Greek", chunks=chunks, embeddings=embeddings
+    )
+
+    matches = await SearchService(db_session).search_by_vector("beta notes", limit=1)
+
+    assert [match["content"] for match in matches] == ["beta notes"]
+
+
+def test_vector_index_binary_shortlist_rescores_exactly():
+    from backend.app.services.vector_index import VectorIndex
+
+    vectors = _random_unit_vectors(3000, 256, seed=3)
+    ids = [uuid4() for _ in range(len(vectors))]
+    exact = VectorIndex(brute_force_threshold=10_000)
+    binary = VectorIndex(brute_force_threshold=10_000, quantization="binary", rescore_factor=8)
+    exact.add(ids, vectors)
+    binary.add(ids, vectors)
+
+    query = vectors[7] + 0.05 * _random_unit_vectors(1, 256, seed=4)[0]
+    expected = exact.search(query, k=5)
+    hits = binary.search(query, k=5)
+
+    assert hits[0] == expected[0] and hits[0][0] == ids[7]
+    rows = {chunk_id: row for row, chunk_id in enumerate(ids)}
+    for chunk_id, distance in hits:
+        assert distance == pytest.approx(np.linalg.norm(vectors[rows[chunk_id]] - query), abs=1e-4)
+    binary.remove([ids[7]])
+    assert ids[7] not in [chunk_id for chunk_id, _ in binary.search(query, k=5)]
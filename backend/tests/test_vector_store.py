@@ -0,0 +1,115 @@
+from uuid import uuid4
+
+import numpy as np
+import pytest
+
+
+def test_store_is_shared_between_processes_through_files(tmp_path):
+    from backend.app.services.vector_store import MmapVectorStore
+
+    writer = MmapVectorStore(tmp_path)
+    reader = MmapVectorStore(tmp_path)  # stands in for another worker process
+    ids = [uuid4() for _ in range(3)]
+    writer.add(ids[:2], np.array([[1.0, 0.0], [0.0, 1.0]], dtype=np.float32))
+
+    assert [chunk_id for chunk_id, _ in reader.search([0.9, 0.1], k=2)] == ids[:2]
+
+    writer.add(ids[2:], [[0.7, 0.7], [1.0, 2.0, 3.0]])  # the mismatched vector is skipped
+    writer.remove([ids[0]])
+
+    hits = reader.search([0.9, 0.1], k=3)
+    assert [chunk_id for chunk_id, _ in hits] == [ids[2], ids[1]]
+    assert hits[0][1] == pytest.approx(np.hypot(0.2, 0.6), abs=1e-6)
+    assert len(reader) == 2
+
+
+def test_reader_rereads_only_changed_files(tmp_path, monkeypatch):
+    from pathlib import Path
+
+    from backend.app.services.vector_store import (
+        MmapVectorStore,
+        new_generation,
+        switch_generation,
+    )
+
+    writer = MmapVectorStore(tmp_path)
+    reader = MmapVectorStore(tmp_path)
+    ids = [uuid4() for _ in range(4)]
+    writer.add(ids[:3], np.eye(3, dtype=np.float32))
+    writer.remove([ids[0], ids[0]])
+    assert len(reader) == 2
+
+    reads: list[str] = []
+    read_text = Path.read_text
+
+    def counting_read_text(self, *args, **kwargs):
+        reads.append(self.name)
+        return read_text(self, *args, **kwargs)
+
+    monkeypatch.setattr(Path, "read_text", counting_read_text)
+    for _ in range(3):
+        assert len(reader) == 2
+        assert len(reader.search([0.0, 1.0, 0.0], k=5)) == 2
+    assert reads == []
+
+    writer.remove([ids[1]])
+    writer.add(ids[3:], [[0.0, 0.0, 1.0]])
+    assert len(reader) == 2
+
+    generation = new_generation(tmp_path)
+    switch_generation(tmp_path, generation.path.name)
+    assert len(reader) == 0 and reads == ["CURRENT"]
+
+
+@pytest.mark.asyncio
+async def test_search_uses_store_and_rebuild_from_database(db_session, tmp_path, monkeypatch):
+    from backend.app.core.config import get_settings
+    from backend.app.services.documents import DocumentService
+    from backend.app.services.search import SearchService
+    from backend.app.services.vector_store import MmapVectorStore, rebuild_vector_store
+
+    monkeypatch.setattr(get_settings(), "vector_store_path", str(tmp_path))
+    chunks = ["alpha notes", "beta notes", "gamma notes"]
+    await DocumentService(db_session).ingest_text(
+        title="Greek", source=None, content="\n\n".join(chunks), chunk_size=12, chunk_overlap=0
+    )
+    search = SearchService(db_session)
+
+    assert [hit["content"] for hit in await search.search_by_vector("beta notes", 1)] == [
+        "beta notes"
+    ]
+    generation = (tmp_path / "CURRENT").read_text()
+
+    assert await rebuild_vector_store(db_session, tmp_path) == 3
+    assert (tmp_path / "CURRENT").read_text() != generation
+    assert len(MmapVectorStore(tmp_path)) == 3
+    assert [hit["content"] for hit in await search.search_by_vector("gamma notes", 1)] == [
+        "gamma notes"
+    ]
+
+
+@pytest.mark.asyncio
+async def test_store_only_receives_committed_chunks(db_session, tmp_path, monkeypatch):
+    from backend.app.core.config import get_settings
+    from backend.app.services.documents import DocumentService
+    from backend.app.services.vector_store import MmapVectorStore
+
+    monkeypatch.setattr(get_settings(), "vector_store_path", str(tmp_path))
+    service = DocumentService(db_session)
+    commit = db_session.commit
+
+    seen_by_other_worker = []
+
+    async def failing_commit():
+        seen_by_other_worker.append(len(MmapVectorStore(tmp_path)))
+        raise RuntimeError("commit failed")
+
+    monkeypatch.setattr(db_session, "commit", failing_commit)
+    with pytest.raises(RuntimeError):
+        await service.ingest_text(title="Lost", source=None, content="never committed")
+    assert seen_by_other_worker == [0]
+    assert len(MmapVectorStore(tmp_path)) == 0
+
+    monkeypatch.setattr(db_session, "commit", commit)
+    await service.ingest_text(title="Kept", source=None, content="committed text")
+    assert len(MmapVectorStore(tmp_path)) == 1
@@ -0,0 +1,84 @@
+"""Compare chunking strategies on a synthetic corpus: speed, chunk count and redundancy.
+
+``legacy`` is the original per-window ``strip()`` loop; ``redundancy`` is the total
+chunk length divided by the input length (overlap inflates embedding/storage cost)::
+
+    python scripts/bench_chunking.py --sentences 200000
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from backend.app.services.chunking import ChunkingOptions, chunk_text  # noqa: E402
+
+_WORDS = "the a retrieval vector index chunk embedding query latency model answer".split()
+
+
+def _corpus(sentences: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    paragraphs: list[str] = []
+    for start in range(0, sentences, 6):
+        if start % 60 == 0:
+            paragraphs.append(f"## Section {start // 60}")
+        paragraphs.append(
+            " ".join(
+                " ".join(rng.choices(_WORDS, k=rng.randint(6, 20))).capitalize() + "."
+                for _ in range(min(6, sentences - start))
+            )
+        )
+    return "\n\n".join(paragraphs)
+
+
+def _legacy(text: str, chunk_size: int = 800, overlap: int = 80) -> list[str]:
+    normalized = text.replace("\r\n", "\n").strip()
+    chunks: list[str] = []
+    start = 0
+    while start < len(normalized):
+        end = min(len(normalized), start + chunk_size)
+        chunk = normalized[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        if end == len(normalized):
+            break
+        start = max(end - overlap, start + 1)
+    return chunks
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sentences", type=int, default=100_000)
+    parser.add_argument("--max-tokens", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    text = _corpus(args.sentences)
+    print(f"{len(text):,} characters")
+    runs: list[tuple[str, Callable[[str], list[str]]]] = [("legacy", _legacy)]
+    runs.append(("fixed", lambda value: chunk_text(value, ChunkingOptions())))
+    for strategy in ("sentence", "paragraph", "heading"):
+        options = ChunkingOptions(strategy=strategy, max_tokens=args.max_tokens)  # type: ignore[arg-type]
+        runs.append((strategy, lambda value, options=options: chunk_text(value, options)))
+
+    for label, run in runs:
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            chunks = run(text)
+            best = min(best, time.perf_counter() - start)
+        redundancy = sum(len(chunk) for chunk in chunks) / len(text)
+        print(
+            f"{label:>9}: {best * 1000:8.1f} ms  {len(chunks):7d} chunks"
+            f"  redundancy {redundancy:5.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
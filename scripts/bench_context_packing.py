@@ -0,0 +1,127 @@
+"""Compare prompt context size and answer coverage: raw top-k chunks vs. packed context.
+
+Builds a synthetic corpus of fact-bearing documents (a quarter of them with a lightly
+edited copy), chunks it the way ingestion does (``fixed``, 800 characters, 80 overlap),
+and asks questions about three neighbouring facts of one document. The top ``--top-k``
+chunks by TF-IDF overlap become the context, either concatenated as before or passed
+through ``pack_context`` at several budgets. Coverage is the share of the asked-for
+fact values that made it into the context::
+
+    python scripts/bench_context_packing.py --queries 300 --top-k 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import random
+import re
+import sys
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from backend.app.services.chunking import (  # noqa: E402
+    ChunkingOptions,
+    approx_token_count,
+    chunk_text,
+)
+from backend.app.services.context_packing import pack_context  # noqa: E402
+
+_WORD_RE = re.compile(r"\w+")
+_ATTRIBUTES = ["owner", "budget", "deadline", "region", "status", "priority", "vendor"]
+_FILLER = (
+    "This section was reviewed by the team during the quarterly planning cycle. "
+    "Further details are tracked in the project wiki and the shared drive. "
+)
+
+
+def _corpus(documents: int, facts: int, rng: random.Random):
+    docs: dict[str, list[str]] = {}
+    truth: dict[str, list[tuple[str, str, str]]] = {}
+    for number in range(documents):
+        name = f"report-{number}"
+        rows = []
+        sentences = []
+        for fact in range(facts):
+            entity = f"project {name}-{fact}"
+            attribute = rng.choice(_ATTRIBUTES)
+            value = f"V{rng.randrange(10**6):06d}"
+            rows.append((entity, attribute, value))
+            sentences.append(f"In {name}, the {attribute} of {entity} is {value}. {_FILLER}")
+        text = "".join(sentences)
+        docs[name] = chunk_text(text, ChunkingOptions(chunk_size=800, overlap=80))
+        truth[name] = rows
+        if number % 4 == 0:
+            edited = text.replace("quarterly", "annual", 1)
+            docs[f"{name}-copy"] = chunk_text(edited, ChunkingOptions(chunk_size=800, overlap=80))
+    return docs, truth
+
+
+def _retriever(docs: dict[str, list[str]]):
+    entries = [
+        (name, index, chunk, Counter(_WORD_RE.findall(chunk.lower())))
+        for name, chunks in docs.items()
+        for index, chunk in enumerate(chunks)
+    ]
+    frequency = Counter(word for *_, terms in entries for word in terms)
+    idf = {word: math.log(len(entries) / count) for word, count in frequency.items()}
+
+    def search(query: str, k: int) -> list[dict]:
+        terms = set(_WORD_RE.findall(query.lower()))
+        scored = sorted(
+            entries,
+            key=lambda entry: -sum(idf.get(term, 0.0) for term in terms if term in entry[3]),
+        )
+        return [
+            {"document_id": name, "chunk_index": index, "content": chunk}
+            for name, index, chunk, _ in scored[:k]
+        ]
+
+    return search
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=40)
+    parser.add_argument("--facts", type=int, default=30, help="fact sentences per document")
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--top-k", type=int, default=8)
+    parser.add_argument("--budgets", default="300,500,800,1200,0", help="0 = no cap")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    docs, truth = _corpus(args.documents, args.facts, rng)
+    search = _retriever(docs)
+    budgets = [int(value) for value in args.budgets.split(",")]
+
+    totals = {label: [0, 0.0] for label in ["raw", *(f"packed@{b}" for b in budgets)]}
+    for _ in range(args.queries):
+        name = f"report-{rng.randrange(args.documents)}"
+        start = rng.randrange(args.facts - 2)
+        asked = truth[name][start : start + 3]
+        query = "What are " + ", ".join(f"the {a} of {e}" for e, a, _ in asked) + "?"
+        matches = search(query, args.top_k)
+
+        raw = "\n".join(f"[{m['document_id']}#{m['chunk_index']}] {m['content']}" for m in matches)
+        contexts = {"raw": raw}
+        for budget in budgets:
+            pack = pack_context(matches, budget_tokens=budget)
+            contexts[f"packed@{budget}"] = "\n".join(pack.lines())
+        for label, context in contexts.items():
+            totals[label][0] += approx_token_count(context)
+            totals[label][1] += sum(value in context for *_, value in asked) / len(asked)
+
+    raw_tokens = totals["raw"][0] / args.queries
+    print(f"{args.queries} queries, top-{args.top_k} chunks, {len(docs)} documents")
+    for label, (tokens, coverage) in totals.items():
+        mean_tokens = tokens / args.queries
+        print(
+            f"{label:>14}: {mean_tokens:7.0f} tokens  ({1 - mean_tokens / raw_tokens:6.1%} fewer)"
+            f"  coverage {coverage / args.queries:6.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Measure ingestion throughput: one document per call vs. ``ingest_many`` batches.
+
+Runs against a throwaway SQLite file with the stub embedding backend, e.g.::
+
+    python scripts/bench_ingest.py --documents 500 --words 400
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from backend.app.db.base import Base  # noqa: E402
+from backend.app.db.fulltext import ensure_fulltext_index  # noqa: E402
+from backend.app.services.documents import BatchDocument, DocumentService  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+
+_WORDS = "alpha beta gamma delta epsilon vector index chunk embed search query".split()
+
+
+def _corpus(documents: int, words: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    return [" ".join(rng.choices(_WORDS, k=words)) for _ in range(documents)]
+
+
+async def _run(texts: list[str], *, batched: bool) -> float:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp}/bench.db")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.run_sync(ensure_fulltext_index)
+        sessionmaker = async_sessionmaker(bind=engine, expire_on_commit=False)
+
+        start = time.perf_counter()
+        async with sessionmaker() as session:
+            service = DocumentService(session)
+            if batched:
+                await service.ingest_many(
+                    BatchDocument(title=f"doc-{i}", pieces=[text]) for i, text in enumerate(texts)
+                )
+            else:
+                for i, text in enumerate(texts):
+                    await service.ingest_text(title=f"doc-{i}", source=None, content=text)
+        elapsed = time.perf_counter() - start
+        await engine.dispose()
+    return elapsed
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=300)
+    parser.add_argument("--words", type=int, default=400)
+    args = parser.parse_args()
+
+    texts = _corpus(args.documents, args.words)
+    chunks = sum(len(DocumentService._chunk_text(text)) for text in texts)
+    print(f"{len(texts)} documents, {chunks} chunks")
+    for label, batched in (("per-document", False), ("ingest_many", True)):
+        elapsed = await _run(texts, batched=batched)
+        print(
+            f"{label:>13}: {elapsed:7.3f}s  {len(texts) / elapsed:8.1f} docs/s"
+            f"  {chunks / elapsed:9.1f} chunks/s"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,124 @@
+"""Measure LLM call latency percentiles under fan-out against the local mock server.
+
+Starts ``scripts/mock_llm_server.py`` (unless ``--url`` points at a running one), fires
+``--requests`` completions at once through ``OpenAICompatibleBackend`` for each client
+concurrency cap and batch size, and reports p50/p95/p99, retries and failures::
+
+    python scripts/bench_llm.py --requests 400 --caps 8,32,128 --capacity 64
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from backend.app.services.llm import LLMProviderError, OpenAICompatibleBackend  # noqa: E402
+
+
+async def _wait_until_up(url: str, timeout: float = 15.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while True:
+            try:
+                await client.get(f"{url}/stats")
+                return
+            except httpx.TransportError:
+                if time.monotonic() > deadline:
+                    raise
+                await asyncio.sleep(0.1)
+
+
+async def _run(url: str, requests: int, cap: int, batch_size: int) -> None:
+    backend = OpenAICompatibleBackend(
+        name="mock",
+        base_url=url,
+        api_key="bench",
+        model="mock",
+        max_concurrency=cap,
+        retry_backoff=0.05,
+        batch_size=batch_size,
+    )
+    latencies: list[float] = []
+    failures = 0
+
+    async def one(number: int) -> None:
+        nonlocal failures
+        start = time.perf_counter()
+        try:
+            await backend.complete(f"question {number} about the corpus")
+        except LLMProviderError:
+            failures += 1
+            return
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(number) for number in range(requests)))
+    wall = time.perf_counter() - start
+    await backend.aclose()
+
+    p50, p95, p99 = (np.percentile(latencies, q) * 1000 for q in (50, 95, 99))
+    print(
+        f"cap {cap:4d} batch {batch_size:3d}: p50 {p50:7.1f} ms  p95 {p95:7.1f} ms  "
+        f"p99 {p99:7.1f} ms  wall {wall:5.2f}s  retries {backend.retries:4d}  "
+        f"failed {failures}"
+    )
+
+
+async def _bench(args: argparse.Namespace, url: str) -> None:
+    await _wait_until_up(url)
+    for batch_size in args.batch_sizes:
+        for cap in args.caps:
+            await _run(url, args.requests, cap, batch_size)
+
+
+def _ints(value: str) -> list[int]:
+    return [int(part) for part in value.split(",") if part]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default=None, help="base URL of a running mock (…/v1)")
+    parser.add_argument("--port", type=int, default=8011)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--caps", type=_ints, default=[8, 32, 128])
+    parser.add_argument("--batch-sizes", type=_ints, default=[1, 16])
+    parser.add_argument("--capacity", type=int, default=64, help="mock: 429 above this")
+    parser.add_argument("--latency-ms", type=float, default=100.0)
+    parser.add_argument("--error-rate", type=float, default=0.01)
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if url is None:
+        url = f"http://127.0.0.1:{args.port}/v1"
+        server = subprocess.Popen(
+            [
+                sys.executable,
+                str(Path(__file__).with_name("mock_llm_server.py")),
+                f"--port={args.port}",
+                f"--capacity={args.capacity}",
+                f"--latency-ms={args.latency_ms}",
+                f"--error-rate={args.error_rate}",
+                "--seed=0",
+            ],
+            stdout=subprocess.DEVNULL,
+        )
+    try:
+        asyncio.run(_bench(args, url))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Compare loading search hits as full ORM rows vs. the projected Core query.
+
+Seeds a throwaway SQLite file with ``--chunks`` chunks carrying ``--dim`` embeddings,
+then fetches random id sets the way search results are resolved::
+
+    python scripts/bench_search_fetch.py --chunks 100000 --dim 1536
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from backend.app.db.base import Base  # noqa: E402
+from backend.app.models.db.documents import Document, DocumentChunk  # noqa: E402
+from backend.app.services.search import SearchService, SnippetOptions  # noqa: E402
+
+_WORDS = "the a retrieval vector index chunk embedding query latency model answer".split()
+
+
+async def _seed(session: AsyncSession, chunks: int, dim: int) -> list[uuid.UUID]:
+    rng = random.Random(0)
+    vectors = np.random.default_rng(0).standard_normal((1024, dim)).astype(np.float32)
+    document_id = uuid.uuid4()
+    await session.execute(
+        insert(Document),
+        [{"id": document_id, "title": "bench", "meta": {}, "created_at": datetime.utcnow()}],
+    )
+    ids: list[uuid.UUID] = []
+    for start in range(0, chunks, 2000):
+        rows = [
+            {
+                "id": uuid.uuid4(),
+                "document_id": document_id,
+                "chunk_index": index,
+                "content": " ".join(rng.choices(_WORDS, k=150)),
+                "embedding": vectors[index % len(vectors)],
+            }
+            for index in range(start, min(start + 2000, chunks))
+        ]
+        await session.execute(insert(DocumentChunk), rows)
+        ids.extend(row["id"] for row in rows)
+    await session.commit()
+    return ids
+
+
+async def _orm_fetch(session: AsyncSession, chunk_ids: list[uuid.UUID]) -> list[dict]:
+    """What search did before: hydrate whole ORM rows, embedding included."""
+
+    rank = {chunk_id: position for position, chunk_id in enumerate(chunk_ids)}
+    result = await session.execute(select(DocumentChunk).where(DocumentChunk.id.in_(chunk_ids)))
+    chunks = sorted(result.scalars().all(), key=lambda chunk: rank[chunk.id])
+    return [
+        {"document_id": str(c.document_id), "chunk_index": c.chunk_index, "content": c.content}
+        for c in chunks
+    ]
+
+
+async def _measure(label: str, fetch, id_sets: list[list[uuid.UUID]]) -> None:
+    await fetch(id_sets[0])
+    start = time.perf_counter()
+    for chunk_ids in id_sets:
+        await fetch(chunk_ids)
+    elapsed = (time.perf_counter() - start) / len(id_sets)
+    # Separate pass for memory: tracemalloc slows allocation-heavy code down a lot.
+    tracemalloc.start()
+    for chunk_ids in id_sets[:5]:
+        await fetch(chunk_ids)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:>10}: {elapsed * 1000:8.2f} ms/fetch  peak {peak / 1024:9.0f} KiB")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--fetches", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp}/bench.db")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        sessionmaker = async_sessionmaker(bind=engine, expire_on_commit=False)
+        async with sessionmaker() as session:
+            start = time.perf_counter()
+            ids = await _seed(session, args.chunks, args.dim)
+            print(f"seeded {len(ids)} chunks in {time.perf_counter() - start:.1f}s")
+
+        rng = random.Random(1)
+        for k in (10, 200):
+            print(f"-- {k} hits per fetch")
+            id_sets = [rng.sample(ids, k) for _ in range(args.fetches)]
+            async with sessionmaker() as session:
+                service = SearchService(session)
+
+                async def orm(chunk_ids, session=session):
+                    session.expunge_all()
+                    return await _orm_fetch(session, chunk_ids)
+
+                async def snippets(chunk_ids, service=service):
+                    return await service._fetch_chunks(
+                        chunk_ids, ["vector"], SnippetOptions(width=160)
+                    )
+
+                await _measure("orm", orm, id_sets)
+                await _measure("projected", service._fetch_chunks, id_sets)
+                await _measure("snippets", snippets, id_sets)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
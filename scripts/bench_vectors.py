@@ -0,0 +1,80 @@
+"""Compare embedding storage encodings and in-process vector index scans.
+
+Reports bytes per stored vector for JSON and each ``EMBEDDING_STORAGE`` codec, then
+query latency and recall@k of the float32 index against the binary-shortlist index::
+
+    python scripts/bench_vectors.py --vectors 100000 --dim 1536
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from uuid import uuid4
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from backend.app.services.quantization import encode_embedding  # noqa: E402
+from backend.app.services.vector_index import VectorIndex  # noqa: E402
+
+
+def _embeddings(count: int, dim: int, seed: int = 0, basis_seed: int = 0) -> np.ndarray:
+    """Unit vectors from a low-rank latent space, closer to real embeddings than noise."""
+
+    rng = np.random.default_rng(seed)
+    basis = np.random.default_rng(basis_seed).standard_normal((64, dim)).astype(np.float32)
+    vectors = rng.standard_normal((count, 64)).astype(np.float32) @ basis
+    vectors += 0.5 * rng.standard_normal((count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vectors", type=int, default=50_000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--rescore-factor", type=int, default=8)
+    args = parser.parse_args()
+
+    vectors = _embeddings(args.vectors, args.dim)
+    sample = vectors[0]
+    json_size = len(json.dumps(sample.tolist()))
+    print(f"{'json':>8}: {json_size:7d} bytes/vector")
+    for storage in ("float32", "float16", "int8"):
+        size = len(encode_embedding(sample, storage))  # type: ignore[arg-type]
+        print(f"{storage:>8}: {size:7d} bytes/vector  ({json_size / size:5.1f}x smaller)")
+
+    ids = [uuid4() for _ in range(args.vectors)]
+    threshold = args.vectors + 1  # exhaustive scans, so only the scan itself differs
+    exact = VectorIndex(brute_force_threshold=threshold)
+    binary = VectorIndex(
+        brute_force_threshold=threshold,
+        quantization="binary",
+        rescore_factor=args.rescore_factor,
+    )
+    exact.add(ids, vectors)
+    binary.add(ids, vectors)
+
+    queries = _embeddings(args.queries, args.dim, seed=1)
+    truth = [{chunk_id for chunk_id, _ in exact.search(q, args.k)} for q in queries]
+    for label, index in (("float32", exact), ("binary", binary)):
+        start = time.perf_counter()
+        results = [index.search(q, args.k) for q in queries]
+        elapsed = (time.perf_counter() - start) / len(queries)
+        recall = np.mean(
+            [
+                len(expected & {chunk_id for chunk_id, _ in hits}) / args.k
+                for expected, hits in zip(truth, results)
+            ]
+        )
+        print(f"{label:>8}: {elapsed * 1000:7.2f} ms/query  recall@{args.k} {recall:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Rebuild the memory-mapped vector store from the embeddings in the database.
+
+Uses ``DATABASE_URL`` and ``VECTOR_STORE_PATH`` from the environment (or ``.env``)
+unless overridden; running workers switch to the new store on their next search::
+
+    python scripts/build_vector_store.py --path ./data/vectors
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from backend.app.core.config import get_settings  # noqa: E402
+from backend.app.db.session import close_db, get_sessionmaker, init_db  # noqa: E402
+from backend.app.services.vector_store import rebuild_vector_store  # noqa: E402
+
+
+async def _rebuild(path: str, batch_size: int) -> int:
+    await init_db(retries=1)
+    try:
+        async with get_sessionmaker()() as session:
+            return await rebuild_vector_store(session, path, batch_size=batch_size)
+    finally:
+        await close_db()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--path", default=None, help="store directory (VECTOR_STORE_PATH)")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    path = args.path or get_settings().vector_store_path
+    if not path:
+        parser.error("pass --path or set VECTOR_STORE_PATH")
+    start = time.perf_counter()
+    count = asyncio.run(_rebuild(path, args.batch_size))
+    print(f"{count} vectors written to {path} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""Local OpenAI-compatible LLM server for load tests.
+
+Serves ``/v1/chat/completions`` (plain and ``stream=true`` SSE) and ``/v1/completions``
+(one prompt or a list) with configurable latency, per-token delay, capacity and error
+rate. Point the backend at it with ``LLM_BASE_URL=http://127.0.0.1:8001/v1`` and any
+``OPENAI_API_KEY``::
+
+    python scripts/mock_llm_server.py --port 8001 --latency-ms 150 --capacity 32
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+from collections.abc import AsyncIterator
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+
+def create_mock_app(
+    *,
+    latency_ms: float = 100.0,
+    jitter_ms: float = 20.0,
+    token_ms: float = 5.0,
+    tokens: int = 20,
+    capacity: int = 0,
+    error_rate: float = 0.0,
+    seed: int | None = None,
+) -> FastAPI:
+    """Build the mock; ``capacity`` > 0 answers 429 beyond that many in-flight requests."""
+
+    app = FastAPI(title="mock-llm")
+    rng = random.Random(seed)
+    state = {"in_flight": 0, "requests": 0, "rejected": 0}
+
+    def _answer(prompt: str) -> list[str]:
+        words = prompt.split()[:3] or ["empty"]
+        return [f"{words[i % len(words)]} " for i in range(tokens)]
+
+    async def _admit() -> Response | None:
+        state["requests"] += 1
+        if capacity and state["in_flight"] >= capacity:
+            state["rejected"] += 1
+            headers = {"Retry-After": "0.05"}
+            return JSONResponse({"error": "rate limited"}, status_code=429, headers=headers)
+        if error_rate and rng.random() < error_rate:
+            return JSONResponse({"error": "injected failure"}, status_code=503)
+        await asyncio.sleep(max(0.0, rng.gauss(latency_ms, jitter_ms)) / 1000)
+        return None
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request) -> Response:
+        payload = await request.json()
+        prompt = payload["messages"][-1]["content"]
+        pieces = _answer(prompt)
+        state["in_flight"] += 1
+        streaming = False
+        try:
+            rejected = await _admit()
+            if rejected is not None:
+                return rejected
+            if not payload.get("stream"):
+                await asyncio.sleep(token_ms * len(pieces) / 1000)
+                message = {"role": "assistant", "content": "".join(pieces)}
+                return JSONResponse({"choices": [{"index": 0, "message": message}]})
+            streaming = True
+        finally:
+            if not streaming:
+                state["in_flight"] -= 1
+
+        async def events() -> AsyncIterator[bytes]:
+            try:
+                for piece in pieces:
+                    await asyncio.sleep(token_ms / 1000)
+                    chunk = {"choices": [{"index": 0, "delta": {"content": piece}}]}
+                    yield f"data: {json.dumps(chunk)}\n\n".encode()
+                yield b"data: [DONE]\n\n"
+            finally:
+                state["in_flight"] -= 1
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.post("/v1/completions")
+    async def completions(request: Request) -> Response:
+        payload = await request.json()
+        prompts = payload["prompt"]
+        prompts = [prompts] if isinstance(prompts, str) else prompts
+        state["in_flight"] += 1
+        try:
+            rejected = await _admit()
+            if rejected is not None:
+                return rejected
+            # A batch costs one round trip plus the longest answer, as on a batching server.
+            await asyncio.sleep(token_ms * tokens / 1000)
+        finally:
+            state["in_flight"] -= 1
+        choices = [
+            {"index": index, "text": "".join(_answer(prompt))}
+            for index, prompt in enumerate(prompts)
+        ]
+        return JSONResponse({"choices": choices})
+
+    @app.get("/v1/stats")
+    async def stats() -> dict[str, int]:
+        return dict(state)
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency-ms", type=float, default=100.0, help="time to first token")
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--token-ms", type=float, default=5.0, help="delay per output token")
+    parser.add_argument("--tokens", type=int, default=20, help="tokens per answer")
+    parser.add_argument("--capacity", type=int, default=0, help="429 above this many in flight")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction answered 503")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    app = create_mock_app(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        token_ms=args.token_ms,
+        tokens=args.tokens,
+        capacity=args.capacity,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    print(f"mock LLM on http://{args.host}:{args.port}/v1")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()